@@ -0,0 +1,34 @@
+"""query_history (user_id, id) index
+
+Revision ID: a41c7d2e9b10
+Revises: e3aaf8039892
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a41c7d2e9b10"
+down_revision: Union[str, Sequence[str], None] = "e3aaf8039892"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_query_history_user_id_id",
+        "query_history",
+        ["user_id", "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_query_history_user_id_id", table_name="query_history", if_exists=True
+    )
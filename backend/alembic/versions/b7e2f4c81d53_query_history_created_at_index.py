@@ -0,0 +1,34 @@
+"""query_history created_at index
+
+Revision ID: b7e2f4c81d53
+Revises: a41c7d2e9b10
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2f4c81d53"
+down_revision: Union[str, Sequence[str], None] = "a41c7d2e9b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_query_history_created_at",
+        "query_history",
+        ["created_at"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_query_history_created_at", table_name="query_history", if_exists=True
+    )
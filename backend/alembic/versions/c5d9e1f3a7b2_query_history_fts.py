@@ -0,0 +1,153 @@
+"""query_history full-text search index
+
+Revision ID: c5d9e1f3a7b2
+Revises: b7e2f4c81d53
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d9e1f3a7b2"
+down_revision: Union[str, Sequence[str], None] = "b7e2f4c81d53"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# DDL sengaja disalin (bukan import dari app.history_search) supaya migration
+# tetap sama walaupun modul aplikasi berubah
+_INDEXED = (
+    "old.id > (SELECT max_id FROM query_history_fts_state) "
+    "OR old.id <= (SELECT backfilled FROM query_history_fts_state)"
+)
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS query_history_fts USING fts5("
+    "query, content='query_history', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TABLE IF NOT EXISTS query_history_fts_state ("
+    "id INTEGER PRIMARY KEY CHECK (id = 1), "
+    "max_id INTEGER NOT NULL, backfilled INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO query_history_fts_state (id, max_id, backfilled) "
+    "SELECT 1, COALESCE(MAX(id), 0), 0 FROM query_history",
+    "CREATE TRIGGER IF NOT EXISTS query_history_fts_ai AFTER INSERT ON query_history "
+    "BEGIN INSERT INTO query_history_fts(rowid, query) "
+    "VALUES (new.id, new.query); END",
+    "CREATE TRIGGER IF NOT EXISTS query_history_fts_ad AFTER DELETE ON query_history "
+    f"WHEN {_INDEXED} "
+    "BEGIN INSERT INTO query_history_fts(query_history_fts, rowid, query) "
+    "VALUES ('delete', old.id, old.query); END",
+    "CREATE TRIGGER IF NOT EXISTS query_history_fts_au "
+    "AFTER UPDATE OF query ON query_history "
+    f"WHEN {_INDEXED} "
+    "BEGIN INSERT INTO query_history_fts(query_history_fts, rowid, query) "
+    "VALUES ('delete', old.id, old.query); "
+    "INSERT INTO query_history_fts(rowid, query) VALUES (new.id, new.query); END",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS query_history_fts_ai",
+    "DROP TRIGGER IF EXISTS query_history_fts_ad",
+    "DROP TRIGGER IF EXISTS query_history_fts_au",
+    "DROP TABLE IF EXISTS query_history_fts",
+    "DROP TABLE IF EXISTS query_history_fts_state",
+]
+
+POSTGRES_UPGRADE = [
+    "ALTER TABLE query_history ADD COLUMN IF NOT EXISTS query_tsv tsvector",
+    "CREATE INDEX IF NOT EXISTS ix_query_history_query_tsv "
+    "ON query_history USING GIN (query_tsv)",
+    "CREATE OR REPLACE FUNCTION query_history_tsv_update() RETURNS trigger AS $$ "
+    "BEGIN NEW.query_tsv := to_tsvector('simple', NEW.query); RETURN NEW; END "
+    "$$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS query_history_tsv_trigger ON query_history",
+    "CREATE TRIGGER query_history_tsv_trigger "
+    "BEFORE INSERT OR UPDATE OF query ON query_history "
+    "FOR EACH ROW EXECUTE FUNCTION query_history_tsv_update()",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS query_history_tsv_trigger ON query_history",
+    "DROP FUNCTION IF EXISTS query_history_tsv_update()",
+    "DROP INDEX IF EXISTS ix_query_history_query_tsv",
+    "ALTER TABLE query_history DROP COLUMN IF EXISTS query_tsv",
+]
+
+
+# backfill baris lama per batch: after < id <= last, satu transaksi per batch
+BACKFILL_BATCH_SIZE = 1000
+
+BATCH_END = (
+    "SELECT MAX(id) FROM (SELECT id FROM query_history "
+    "WHERE id > :a AND id <= :m ORDER BY id LIMIT :n) AS batch"
+)
+
+SQLITE_BACKFILL = [
+    "INSERT INTO query_history_fts(rowid, query) SELECT id, query "
+    "FROM query_history WHERE id > :a AND id <= :b",
+    # watermark naik dalam transaksi yang sama dengan batch-nya
+    "UPDATE query_history_fts_state SET backfilled = :b",
+]
+
+POSTGRES_BACKFILL = [
+    "UPDATE query_history SET query_tsv = to_tsvector('simple', query) "
+    "WHERE id > :a AND id <= :b",
+]
+
+
+def _run(statements: list) -> None:
+    for sql in statements:
+        op.execute(sa.text(sql))
+
+
+def _backfill(statements: list, after: int, max_id: int) -> None:
+    """
+    Isi index untuk baris after < id <= max_id per BACKFILL_BATCH_SIZE baris;
+    setiap batch di-commit sendiri (autocommit_block) supaya lock tidak
+    dipegang selama seluruh tabel diproses.
+    """
+    bind = op.get_bind()
+    explicit = bind.dialect.name == "sqlite"
+    with op.get_context().autocommit_block():
+        while True:
+            params = {"a": after, "m": max_id, "n": BACKFILL_BATCH_SIZE}
+            last = bind.execute(sa.text(BATCH_END), params).scalar()
+            if last is None:
+                return
+            # SQLite: INSERT FTS + watermark harus atomik (BEGIN/COMMIT
+            # eksplisit); Postgres cukup satu UPDATE per batch
+            if explicit:
+                bind.exec_driver_sql("BEGIN")
+            for sql in statements:
+                bind.execute(sa.text(sql), {"a": after, "b": last})
+            if explicit:
+                bind.exec_driver_sql("COMMIT")
+            after = last
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite: FTS5 virtual table + trigger; Postgres: kolom tsvector + GIN.
+    # Baris baru setelah ini diindex trigger; baris lama di-backfill per batch
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        _run(POSTGRES_UPGRADE)
+        max_id = bind.execute(sa.text("SELECT MAX(id) FROM query_history")).scalar()
+        _backfill(POSTGRES_BACKFILL, 0, max_id or 0)
+    else:
+        _run(SQLITE_UPGRADE)
+        state = bind.execute(
+            sa.text("SELECT max_id, backfilled FROM query_history_fts_state")
+        ).first()
+        _backfill(SQLITE_BACKFILL, state[1], state[0])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        _run(POSTGRES_DOWNGRADE)
+    else:
+        _run(SQLITE_DOWNGRADE)
@@ -0,0 +1,46 @@
+"""query_history retrieval parameters
+
+Revision ID: d8f3a1c6b4e9
+Revises: c5d9e1f3a7b2
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d8f3a1c6b4e9"
+down_revision: Union[str, Sequence[str], None] = "c5d9e1f3a7b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = {
+    "top_k": sa.Integer,
+    "collection": lambda: sa.String(length=64),
+    "filters": sa.Text,
+}
+
+
+def _existing() -> set:
+    # database yang dibuat lewat create_all sudah punya kolomnya
+    columns = sa.inspect(op.get_bind()).get_columns("query_history")
+    return {c["name"] for c in columns}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = _existing()
+    for name, type_ in COLUMNS.items():
+        if name not in existing:
+            op.add_column("query_history", sa.Column(name, type_(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = _existing()
+    for name in COLUMNS:
+        if name in existing:
+            op.drop_column("query_history", name)
@@ -0,0 +1,98 @@
+# backend/app/admin.py
+"""
+Endpoint operasional khusus admin (ADMIN_USERNAMES).
+"""
+
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from .auth import get_current_admin
+from .backup import backup_job, list_snapshots
+from .config import PROFILE_MAX_FILES
+from .models_auth import User
+from .profiling import list_profiles, profile_path, profile_text
+from .retention import retention_job
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/profiles")
+def get_profiles(current_admin: User = Depends(get_current_admin)):
+    """
+    Daftar profil request yang tersimpan (terbaru dulu).
+    """
+    return {"items": list_profiles(), "max_files": PROFILE_MAX_FILES}
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: str = Query("pstats"),
+    limit: int = Query(50, ge=1, le=500),
+    current_admin: User = Depends(get_current_admin),
+):
+    """
+    Unduh profil dalam format pstats (buka dengan `python -m pstats` atau
+    snakeviz), atau ringkasan teks (urut cumulative time) dengan format=text.
+    """
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profil tidak ditemukan")
+    if format not in ("pstats", "text"):
+        raise HTTPException(status_code=400, detail="format harus pstats atau text")
+
+    if format == "text":
+        return PlainTextResponse(profile_text(path, limit))
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=os.path.basename(path),
+    )
+
+
+@router.get("/retention")
+def get_retention(current_admin: User = Depends(get_current_admin)):
+    """
+    Status retensi query_history dan laporan run terakhir (baris terhapus,
+    durasi, ukuran tabel sebelum/sesudah).
+    """
+    return retention_job.status()
+
+
+@router.post("/retention/run", status_code=202)
+def run_retention_now(current_admin: User = Depends(get_current_admin)):
+    """
+    Jalankan purge retensi sekarang di background.
+    """
+    if not retention_job.status()["enabled"]:
+        raise HTTPException(
+            status_code=400, detail="Retensi nonaktif (HISTORY_RETENTION_DAYS=0)"
+        )
+    retention_job.trigger()
+    return retention_job.status()
+
+
+@router.get("/backups")
+def get_backups(current_admin: User = Depends(get_current_admin)):
+    """
+    Daftar snapshot database beserta status/laporan backup terakhir
+    (durasi, byte disalin, byte ditulis, hasil integrity_check).
+    """
+    return {"status": backup_job.status(), "snapshots": list_snapshots()}
+
+
+@router.post("/backups", status_code=202)
+def create_backup(
+    full: bool = Query(False, description="snapshot lengkap, bukan incremental"),
+    current_admin: User = Depends(get_current_admin),
+):
+    """
+    Buat snapshot database sekarang di background (online, service tetap
+    melayani request selama backup).
+    """
+    options = {"incremental": False} if full else {}
+    if not backup_job.trigger(**options):
+        raise HTTPException(status_code=409, detail="Backup lain sedang berjalan")
+    return backup_job.status()
@@ -12,9 +12,15 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
-from .config import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
+from .config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    ADMIN_USERNAMES,
+    ALGORITHM,
+    SECRET_KEY,
+)
 from .db import get_db
 from .models_auth import User
+from .profiling import profiled
 from .schemas_auth import Token, UserCreate, UserOut
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -61,6 +67,7 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
 
 # ---------------- routes ----------------
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
+@profiled
 def register(user_in: UserCreate, db: Session = Depends(get_db)):
     """
     Register user baru.
@@ -80,6 +87,7 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
+@profiled
 def login(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
@@ -137,6 +145,19 @@ def get_current_user(
     return user
 
 
+def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """
+    Dependency: seperti get_current_user, tetapi hanya untuk username yang
+    terdaftar di ADMIN_USERNAMES.
+    """
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Hanya admin yang boleh mengakses endpoint ini",
+        )
+    return current_user
+
+
 @router.get("/me", response_model=UserOut)
 def me(current_user: User = Depends(get_current_user)):
     """
@@ -0,0 +1,435 @@
+# backend/app/backup.py
+"""
+Snapshot database SQLite secara online (tanpa menghentikan service).
+
+- Salinan dibuat dengan SQLite online backup API (`sqlite3.Connection.backup`)
+  per BACKUP_PAGES_PER_STEP halaman dengan jeda BACKUP_STEP_SLEEP_MS di antara
+  langkah, sehingga writer lain tetap bisa commit selama backup. Jika database
+  berubah di tengah backup, SQLite mengulang dari awal; setelah beberapa kali
+  restart, sisa backup dilakukan dalam satu langkah.
+- Hasil backup dicek dengan `PRAGMA integrity_check` sebelum disimpan.
+- Mode full: satu file `<id>.sqlite` (atau `.sqlite.gz`).
+- Mode incremental: file dipotong menjadi chunk 1 MiB yang disimpan
+  berdasarkan hash isinya (`chunks/<sha256>`); snapshot berikutnya hanya
+  menulis chunk yang berubah. Manifest `<id>.json` mencatat urutan chunk.
+- Restore / verify menyusun ulang file, mencocokkan sha256 dan menjalankan
+  integrity_check.
+
+CLI (dari folder backend):
+    python -m app.backup create [--full] [--no-compress]
+    python -m app.backup list
+    python -m app.backup verify <id>
+    python -m app.backup restore <id> <path_tujuan>
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from .config import (
+    BACKUP_COMPRESS,
+    BACKUP_DIR,
+    BACKUP_INCREMENTAL,
+    BACKUP_KEEP,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_SLEEP_MS,
+)
+from .db import engine
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = 1 << 20
+MAX_RESTARTS = 5
+_SNAPSHOT_ID_RE = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+
+class BackupError(RuntimeError):
+    pass
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _chunk_dir() -> str:
+    return os.path.join(BACKUP_DIR, "chunks")
+
+
+def _manifest_path(snapshot_id: str) -> str:
+    if not _SNAPSHOT_ID_RE.match(snapshot_id):
+        raise BackupError(f"Id snapshot tidak valid: {snapshot_id}")
+    return os.path.join(BACKUP_DIR, f"{snapshot_id}.json")
+
+
+# ---------------- salinan online ----------------
+def online_copy(
+    src_path: str,
+    dest_path: str,
+    pages_per_step: int = BACKUP_PAGES_PER_STEP,
+    sleep_s: float = BACKUP_STEP_SLEEP_MS / 1000.0,
+) -> dict:
+    """
+    Salin database `src_path` ke `dest_path` dengan online backup API.
+    Mengembalikan jumlah halaman, ukuran halaman dan jumlah restart.
+    """
+    state = {"restarts": 0, "remaining": None}
+
+    def progress(status, remaining, total):
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            # database berubah oleh koneksi lain -> backup mulai ulang
+            state["restarts"] += 1
+            if state["restarts"] > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        state["remaining"] = remaining
+
+    src = sqlite3.connect(f"file:{src_path}?mode=ro", uri=True)
+    dest = sqlite3.connect(dest_path)
+    try:
+        try:
+            src.backup(
+                dest, pages=max(1, pages_per_step), progress=progress, sleep=sleep_s
+            )
+        except _TooManyRestarts:
+            # terlalu sering berubah: selesaikan dalam satu langkah
+            src.backup(dest, pages=-1)
+        page_size = dest.execute("PRAGMA page_size").fetchone()[0]
+        page_count = dest.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        dest.close()
+        src.close()
+    return {"pages": page_count, "page_size": page_size, "restarts": state["restarts"]}
+
+
+def integrity_check(path: str) -> str:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    return "; ".join(str(r[0]) for r in rows)
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_BYTES), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ---------------- penyimpanan snapshot ----------------
+def _store_full(tmp_path: str, snapshot_id: str, compress: bool) -> tuple:
+    name = f"{snapshot_id}.sqlite" + (".gz" if compress else "")
+    path = os.path.join(BACKUP_DIR, name)
+    if compress:
+        with open(tmp_path, "rb") as src, gzip.open(path, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, CHUNK_BYTES)
+    else:
+        shutil.copyfile(tmp_path, path)
+    return name, os.path.getsize(path)
+
+
+def _store_chunks(tmp_path: str, compress: bool) -> tuple:
+    """
+    Simpan file sebagai chunk content-addressed; hanya chunk baru yang
+    ditulis. Mengembalikan (daftar hash, jumlah chunk baru, byte ditulis).
+    """
+    os.makedirs(_chunk_dir(), exist_ok=True)
+    suffix = ".gz" if compress else ""
+    hashes, new_chunks, written = [], 0, 0
+    with open(tmp_path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_BYTES), b""):
+            digest = hashlib.sha256(block).hexdigest()
+            hashes.append(digest)
+            path = os.path.join(_chunk_dir(), digest + suffix)
+            if os.path.exists(path):
+                continue
+            data = gzip.compress(block, compresslevel=6) if compress else block
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as out:
+                out.write(data)
+            os.replace(tmp, path)
+            new_chunks += 1
+            written += len(data)
+    return hashes, new_chunks, written
+
+
+def _default_db_path() -> str:
+    if engine.dialect.name != "sqlite":
+        raise BackupError(
+            f"Snapshot online hanya untuk SQLite (database: {engine.dialect.name})"
+        )
+    return engine.url.database
+
+
+def create_snapshot(
+    db_path: Optional[str] = None,
+    incremental: bool = BACKUP_INCREMENTAL,
+    compress: bool = BACKUP_COMPRESS,
+    keep: int = BACKUP_KEEP,
+) -> dict:
+    """
+    Buat satu snapshot dan kembalikan laporannya (durasi, byte disalin,
+    byte ditulis, hasil integrity_check).
+    """
+    db_path = db_path or _default_db_path()
+    if not os.path.exists(db_path):
+        raise BackupError(f"Database tidak ditemukan: {db_path}")
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    started = time.perf_counter()
+    snapshot_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    tmp_path = os.path.join(BACKUP_DIR, f".{snapshot_id}.tmp")
+
+    try:
+        copy = online_copy(db_path, tmp_path)
+        copy_s = time.perf_counter() - started
+        integrity = integrity_check(tmp_path)
+        if integrity != "ok":
+            raise BackupError(f"integrity_check gagal: {integrity}")
+
+        manifest = {
+            "id": snapshot_id,
+            "mode": "incremental" if incremental else "full",
+            "compressed": compress,
+            "created_at": datetime.utcnow().isoformat(),
+            "source": db_path,
+            "db_bytes": os.path.getsize(tmp_path),
+            "sha256": _file_sha256(tmp_path),
+            "page_size": copy["page_size"],
+            "pages": copy["pages"],
+            "restarts": copy["restarts"],
+            "integrity": integrity,
+        }
+        if incremental:
+            hashes, new_chunks, written = _store_chunks(tmp_path, compress)
+            manifest.update(
+                {"chunks": hashes, "chunks_new": new_chunks, "bytes_written": written}
+            )
+        else:
+            name, written = _store_full(tmp_path, snapshot_id, compress)
+            manifest.update({"file": name, "bytes_written": written})
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    manifest["bytes_copied"] = manifest["pages"] * manifest["page_size"]
+    manifest["copy_s"] = round(copy_s, 3)
+    manifest["duration_s"] = round(time.perf_counter() - started, 3)
+    with open(_manifest_path(snapshot_id), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    prune_snapshots(keep)
+
+    logger.info(
+        "backup %s: %d byte disalin, %d byte ditulis, %.2fs",
+        snapshot_id,
+        manifest["bytes_copied"],
+        manifest["bytes_written"],
+        manifest["duration_s"],
+    )
+    return {k: v for k, v in manifest.items() if k != "chunks"}
+
+
+def list_snapshots() -> list[dict]:
+    if not os.path.isdir(BACKUP_DIR):
+        return []
+    items = []
+    for name in os.listdir(BACKUP_DIR):
+        if name.endswith(".json") and _SNAPSHOT_ID_RE.match(name[:-5]):
+            try:
+                with open(os.path.join(BACKUP_DIR, name), encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                continue
+            manifest.pop("chunks", None)
+            items.append(manifest)
+    # terbaru dulu
+    items.sort(key=lambda m: m.get("created_at", ""), reverse=True)
+    return items
+
+
+def _load_manifest(snapshot_id: str) -> dict:
+    path = _manifest_path(snapshot_id)
+    if not os.path.exists(path):
+        raise BackupError(f"Snapshot tidak ditemukan: {snapshot_id}")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _assemble(manifest: dict, out_path: str) -> None:
+    """
+    Tulis ulang file database snapshot (full atau dari chunk) ke `out_path`.
+    """
+    opener = gzip.open if manifest["compressed"] else open
+    with open(out_path, "wb") as out:
+        if manifest["mode"] == "full":
+            with opener(os.path.join(BACKUP_DIR, manifest["file"]), "rb") as src:
+                shutil.copyfileobj(src, out, CHUNK_BYTES)
+            return
+        suffix = ".gz" if manifest["compressed"] else ""
+        for digest in manifest["chunks"]:
+            path = os.path.join(_chunk_dir(), digest + suffix)
+            if not os.path.exists(path):
+                raise BackupError(f"Chunk hilang: {digest}")
+            with opener(path, "rb") as src:
+                out.write(src.read())
+
+
+def restore_snapshot(snapshot_id: str, dest_path: str) -> dict:
+    """
+    Susun ulang file database snapshot ke `dest_path` lalu verifikasi
+    sha256 dan integrity_check. `dest_path` tidak boleh database yang
+    sedang dipakai service.
+    """
+    manifest = _load_manifest(snapshot_id)
+    started = time.perf_counter()
+    tmp = dest_path + ".restore-tmp"
+    try:
+        _assemble(manifest, tmp)
+        sha = _file_sha256(tmp)
+        if sha != manifest["sha256"]:
+            raise BackupError("sha256 hasil restore tidak cocok dengan snapshot")
+        integrity = integrity_check(tmp)
+        if integrity != "ok":
+            raise BackupError(f"integrity_check gagal: {integrity}")
+        os.replace(tmp, dest_path)
+    finally:
+        # restore gagal di tengah jalan: dest_path tidak disentuh
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return {
+        "id": snapshot_id,
+        "path": dest_path,
+        "sha256_ok": True,
+        "integrity": integrity,
+        "duration_s": round(time.perf_counter() - started, 3),
+    }
+
+
+def verify_snapshot(snapshot_id: str) -> dict:
+    """
+    Restore snapshot ke file sementara dan cek integritasnya.
+    """
+    tmp = os.path.join(BACKUP_DIR, f".verify-{uuid.uuid4().hex[:8]}.sqlite")
+    try:
+        return restore_snapshot(snapshot_id, tmp)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def prune_snapshots(keep: int = BACKUP_KEEP) -> list[str]:
+    """
+    Hapus snapshot lama (hanya `keep` terbaru disimpan) dan chunk yang tidak
+    lagi direferensikan snapshot mana pun.
+    """
+    if keep <= 0:
+        return []
+    ids = [m["id"] for m in list_snapshots()]
+    removed = []
+    for snapshot_id in ids[keep:]:
+        manifest = _load_manifest(snapshot_id)
+        if manifest.get("file"):
+            path = os.path.join(BACKUP_DIR, manifest["file"])
+            if os.path.exists(path):
+                os.remove(path)
+        os.remove(_manifest_path(snapshot_id))
+        removed.append(snapshot_id)
+
+    if removed and os.path.isdir(_chunk_dir()):
+        live = set()
+        for snapshot_id in ids[:keep]:
+            live.update(_load_manifest(snapshot_id).get("chunks", []))
+        for name in os.listdir(_chunk_dir()):
+            if name.split(".")[0] not in live:
+                os.remove(os.path.join(_chunk_dir(), name))
+    return removed
+
+
+class BackupJob:
+    """
+    Menjalankan snapshot di thread background (dipicu dari endpoint admin)
+    dan menyimpan laporan terakhir.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = False
+        self.last_report: Optional[dict] = None
+        self.last_error: Optional[str] = None
+
+    def run_once(self, **kwargs) -> Optional[dict]:
+        with self._lock:
+            if self._running:
+                return None
+            self._running = True
+        try:
+            report = create_snapshot(**kwargs)
+            self.last_report, self.last_error = report, None
+            return report
+        except Exception as e:
+            logger.exception("backup gagal")
+            self.last_error = str(e)
+            return None
+        finally:
+            with self._lock:
+                self._running = False
+
+    def trigger(self, **kwargs) -> bool:
+        """
+        Mulai snapshot di background; False jika snapshot lain sedang berjalan.
+        """
+        if self.status()["running"]:
+            return False
+        threading.Thread(target=self.run_once, kwargs=kwargs, daemon=True).start()
+        return True
+
+    def status(self) -> dict:
+        with self._lock:
+            running = self._running
+        return {
+            "running": running,
+            "last_report": self.last_report,
+            "last_error": self.last_error,
+        }
+
+
+backup_job = BackupJob()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backup database AutoMIND")
+    sub = parser.add_subparsers(dest="command", required=True)
+    create = sub.add_parser("create")
+    create.add_argument("--full", action="store_true", help="snapshot non-incremental")
+    create.add_argument("--no-compress", action="store_true")
+    sub.add_parser("list")
+    verify = sub.add_parser("verify")
+    verify.add_argument("id")
+    restore = sub.add_parser("restore")
+    restore.add_argument("id")
+    restore.add_argument("dest")
+    args = parser.parse_args()
+
+    if args.command == "create":
+        result = create_snapshot(
+            incremental=BACKUP_INCREMENTAL and not args.full,
+            compress=BACKUP_COMPRESS and not args.no_compress,
+        )
+    elif args.command == "list":
+        result = list_snapshots()
+    elif args.command == "verify":
+        result = verify_snapshot(args.id)
+    else:
+        result = restore_snapshot(args.id, args.dest)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,181 @@
+# backend/app/batching.py
+"""
+Dynamic micro-batching untuk scoring retrieval.
+
+Request yang datang bersamaan dikumpulkan (maksimal `max_batch` item atau
+`max_wait_s` sejak item pertama; selama semua worker masih sibuk batch terus
+diisi sampai penuh), lalu diproses sekaligus oleh fungsi batch di executor
+khusus; hasil dikirim balik ke masing-masing pemanggil lewat Future. Dengan begitu N sparse matrix-vector product (yang berebut GIL)
+menjadi satu sparse matrix-matrix product.
+"""
+
+import bisect
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Sequence
+
+from .profiling import current_request, profile_call
+
+logger = logging.getLogger(__name__)
+
+# interval cek worker bebas saat batch diisi selama semua worker sibuk
+_BUSY_POLL_S = 0.001
+
+
+class Histogram:
+    """
+    Histogram sederhana dengan batas bucket tetap (value <= batas; tidak kumulatif).
+    """
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._n = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._n += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+            return {
+                "count": self._n,
+                "mean": self._sum / self._n if self._n else 0.0,
+                "buckets": dict(zip(labels, self._counts)),
+            }
+
+
+class _Item:
+    __slots__ = ("group", "payload", "future", "enqueued", "profile")
+
+    def __init__(self, group, payload):
+        self.group = group
+        self.payload = payload
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+        # request profiling pemanggil: batch diprofile di thread executor
+        self.profile = current_request()
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        batch_fn: Callable[[Any, list], list],
+        max_batch: int = 32,
+        max_wait_s: float = 0.002,
+        workers: int = 1,
+    ):
+        """
+        batch_fn(group, payloads) -> list hasil (urutan sama dengan payloads).
+        Item hanya di-batch bersama item lain dengan `group` yang sama
+        (misalnya objek index yang sama).
+        """
+        self._batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max(0.0, max_wait_s)
+        self._queue: "queue.Queue[_Item]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="rag-batch"
+        )
+        # satu slot per worker; batch baru dikirim hanya jika ada worker bebas
+        self._slots = threading.Semaphore(max(1, workers))
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_wait_ms = Histogram([0.1, 0.5, 1, 2, 5, 10, 25, 50, 100])
+        self._thread = threading.Thread(
+            target=self._collect_loop, name="rag-batch-collector", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, group, payload) -> Any:
+        """
+        Masukkan satu item ke antrian dan tunggu hasilnya (blocking).
+        """
+        item = _Item(group, payload)
+        self._queue.put(item)
+        return item.future.result()
+
+    def _collect_loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            self._fill_until(batch, first.enqueued + self.max_wait_s)
+            self._wait_for_worker(batch)
+            self._executor.submit(self._run_batch, batch)
+
+    def _fill_until(self, batch: list, deadline: float) -> None:
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                if timeout <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                return
+
+    def _wait_for_worker(self, batch: list) -> None:
+        """
+        Ambil slot worker; selama semua worker sibuk, batch terus diisi
+        (backlog -> batch lebih besar, bukan antrian batch kecil di executor).
+        """
+        while len(batch) < self.max_batch:
+            if self._slots.acquire(blocking=False):
+                return
+            try:
+                batch.append(self._queue.get(timeout=_BUSY_POLL_S))
+            except queue.Empty:
+                pass
+        self._slots.acquire()
+
+    def _run_batch(self, batch: list) -> None:
+        try:
+            self._process(batch)
+        finally:
+            self._slots.release()
+
+    def _process(self, batch: list) -> None:
+        started = time.perf_counter()
+        self.batch_sizes.observe(len(batch))
+        groups: dict = {}
+        for item in batch:
+            self.queue_wait_ms.observe((started - item.enqueued) * 1000.0)
+            groups.setdefault(id(item.group), []).append(item)
+
+        for items in groups.values():
+            try:
+                results = profile_call(
+                    [it.profile for it in items],
+                    self._batch_fn,
+                    items[0].group,
+                    [it.payload for it in items],
+                )
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"micro-batch mengembalikan {len(results)} hasil "
+                        f"untuk {len(items)} item"
+                    )
+            except Exception as e:
+                logger.exception("micro-batch gagal (%d item)", len(items))
+                for it in items:
+                    it.future.set_exception(e)
+                continue
+            for it, res in zip(items, results):
+                it.future.set_result(res)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "queued": self._queue.qsize(),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
@@ -0,0 +1,267 @@
+# backend/app/build_cache.py
+"""
+Cache content-addressed untuk build_index.
+
+- Kunci build = hash(isi dataset, parameter vectorizer/opsi build, versi
+  builder). Folder output dan store cache menyimpan `manifest.json` berisi
+  kunci tersebut; jika cocok dan semua artifact ada, build dilewati.
+- Intermediate per shard: dataset dipecah menjadi shard berbasis isi
+  (batas shard ditentukan hash pertanyaan, sehingga sisipan/hapusan hanya
+  mengubah shard di sekitarnya). Hasil tokenisasi (term count) tiap shard
+  disimpan berdasarkan hash isinya dan dipakai ulang; IDF dan normalisasi
+  dihitung ulang dari gabungan count (murah), hasilnya identik dengan
+  `TfidfVectorizer.fit_transform` pada seluruh dataset.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+import joblib
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+
+# naikkan jika format/isi artifact yang dihasilkan builder berubah
+BUILDER_VERSION = "4"
+MANIFEST_FILENAME = "manifest.json"
+
+# rata-rata ukuran shard (jumlah pertanyaan); batas keras 4x target
+SHARD_TARGET_SIZE = 1024
+# jumlah build lengkap yang disimpan di store cache
+BUILD_CACHE_KEEP = 5
+
+_COUNT_PARAMS = set(CountVectorizer().get_params())
+
+
+def _sha256(parts: Iterable[str]) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def dataset_digest(
+    questions: list[str],
+    answers: Optional[list[str]],
+    metadata: Optional[dict] = None,
+) -> str:
+    """
+    Hash isi dataset (pertanyaan + jawaban + metadata), tidak bergantung
+    format file.
+    """
+    parts = [str(len(questions))]
+    parts.extend(questions)
+    if answers is not None:
+        parts.extend(answers)
+    if metadata:
+        parts.append(json.dumps(metadata, sort_keys=True, default=str))
+    return _sha256(parts)
+
+
+def vectorizer_params(vectorizer) -> dict:
+    return {k: repr(v) for k, v in sorted(vectorizer.get_params().items())}
+
+
+def build_key(dataset_sha: str, params: dict) -> str:
+    return _sha256([BUILDER_VERSION, dataset_sha, json.dumps(params, sort_keys=True)])
+
+
+# ---------------- manifest & store build lengkap ----------------
+def read_manifest(directory) -> Optional[dict]:
+    try:
+        with open(Path(directory) / MANIFEST_FILENAME, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(directory, manifest: dict) -> None:
+    path = Path(directory) / MANIFEST_FILENAME
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def manifest_matches(directory, key: str) -> Optional[dict]:
+    """
+    Manifest folder jika kuncinya sama dan semua artifact di dalamnya ada.
+    """
+    manifest = read_manifest(directory)
+    if not manifest or manifest.get("key") != key:
+        return None
+    if not all((Path(directory) / f).exists() for f in manifest.get("files", [])):
+        return None
+    return manifest
+
+
+def copy_artifacts(src, dst, manifest: dict) -> None:
+    dst = Path(dst)
+    dst.mkdir(parents=True, exist_ok=True)
+    for name in manifest["files"]:
+        shutil.copy2(Path(src) / name, dst / name)
+    write_manifest(dst, manifest)
+
+
+class BuildCache:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.shard_hits = 0
+        self.shard_misses = 0
+
+    def build_dir(self, key: str) -> Path:
+        return self.root / "builds" / key
+
+    def store(self, src, manifest: dict) -> None:
+        """
+        Simpan salinan build lengkap ke store, lalu buang build lama
+        (hanya BUILD_CACHE_KEEP terakhir yang disimpan).
+        """
+        target = self.build_dir(manifest["key"])
+        tmp = target.with_name(target.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        copy_artifacts(src, tmp, manifest)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+
+        builds = sorted(
+            (p for p in (self.root / "builds").iterdir() if p.is_dir()),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for old in builds[BUILD_CACHE_KEEP:]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    # ---------------- intermediate per shard ----------------
+    def shard_counts(self, count_params: dict, texts: list[str]):
+        """
+        (terms, count matrix CSR) satu shard; diambil dari cache jika ada.
+        """
+        params = json.dumps(
+            {k: repr(v) for k, v in sorted(count_params.items())}, sort_keys=True
+        )
+        key = _sha256([BUILDER_VERSION, params, *texts])
+        path = self.root / "shards" / f"{key}.joblib"
+        if path.exists():
+            try:
+                cached = joblib.load(path)
+                self.shard_hits += 1
+                return cached["terms"], cached["counts"]
+            except Exception:
+                pass
+
+        counter = CountVectorizer(**count_params)
+        counts = counter.fit_transform(texts).tocsr()
+        terms = counter.get_feature_names_out().tolist()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        joblib.dump({"terms": terms, "counts": counts}, tmp)
+        os.replace(tmp, path)
+        self.shard_misses += 1
+        return terms, counts
+
+    def stats(self) -> dict:
+        return {"shards_reused": self.shard_hits, "shards_built": self.shard_misses}
+
+
+def split_shards(texts: list[str], target: int = SHARD_TARGET_SIZE) -> list[tuple]:
+    """
+    Batas shard berbasis isi: shard berakhir setelah teks yang hash-nya
+    habis dibagi `target` (atau saat mencapai 4x target).
+    """
+    bounds = []
+    start = 0
+    for i, text in enumerate(texts):
+        h = int.from_bytes(
+            hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little"
+        )
+        if h % target == 0 or i + 1 - start >= 4 * target:
+            bounds.append((start, i + 1))
+            start = i + 1
+    if start < len(texts):
+        bounds.append((start, len(texts)))
+    return bounds
+
+
+def _shardable(vectorizer) -> bool:
+    # min_df/max_df/max_features bergantung statistik global -> tidak bisa
+    # dihitung per shard
+    return (
+        vectorizer.use_idf
+        and vectorizer.min_df == 1
+        and vectorizer.max_df == 1.0
+        and vectorizer.max_features is None
+        and vectorizer.vocabulary is None
+    )
+
+
+def fit_tfidf(vectorizer, texts: list[str], cache: Optional[BuildCache] = None):
+    """
+    Setara `vectorizer.fit_transform(texts)` (TfidfVectorizer), tetapi term
+    count per shard diambil dari cache jika tersedia.
+    Mengembalikan (vectorizer, matrix).
+    """
+    if cache is None or not _shardable(vectorizer):
+        return vectorizer, vectorizer.fit_transform(texts)
+
+    started = time.perf_counter()
+    hits_before = cache.shard_hits
+    count_params = {
+        k: v for k, v in vectorizer.get_params().items() if k in _COUNT_PARAMS
+    }
+    count_params["dtype"] = np.int64
+
+    shards = [
+        cache.shard_counts(count_params, texts[a:b]) for a, b in split_shards(texts)
+    ]
+    vocab_terms = sorted(set().union(*(terms for terms, _ in shards)))
+    vocabulary = {t: i for i, t in enumerate(vocab_terms)}
+
+    blocks = []
+    for terms, counts in shards:
+        remap = np.array([vocabulary[t] for t in terms], dtype=np.int64)
+        blocks.append(
+            sp.csr_matrix(
+                (counts.data, remap[counts.indices], counts.indptr),
+                shape=(counts.shape[0], len(vocab_terms)),
+            )
+        )
+    counts = sp.vstack(blocks, format="csr")
+    counts.sort_indices()
+
+    transformer = TfidfTransformer(
+        norm=vectorizer.norm,
+        use_idf=vectorizer.use_idf,
+        smooth_idf=vectorizer.smooth_idf,
+        sublinear_tf=vectorizer.sublinear_tf,
+    )
+    matrix = transformer.fit_transform(counts).astype(vectorizer.dtype, copy=False)
+    vectorizer.vocabulary_ = vocabulary
+    vectorizer.idf_ = transformer.idf_
+    print(
+        f"[OK] Sharded fit: {len(shards)} shard "
+        f"({cache.shard_hits - hits_before} dari cache) "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return vectorizer, matrix
+
+
+def new_manifest(key: str, dataset_sha: str, params: dict, files, build_time_s, report):
+    return {
+        "key": key,
+        "builder_version": BUILDER_VERSION,
+        "dataset_sha256": dataset_sha,
+        "params": params,
+        "files": sorted(files),
+        "build_time_s": round(build_time_s, 3),
+        "created_at": datetime.utcnow().isoformat(),
+        "report": report,
+    }
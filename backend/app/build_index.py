@@ -5,12 +5,45 @@ Modul sederhana untuk membangun TF-IDF index dan menyimpannya via joblib.
 Versi ini aman untuk linting (tidak ada import tak terpakai, tidak ada lambda assignment).
 """
 
+import argparse
 import json
 import os
+import re
+import sys
+import time
+from collections import Counter
 from pathlib import Path
+from typing import Optional
 
 import joblib
+import numpy as np
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+if __package__ in (None, ""):
+    # dijalankan sebagai script (python backend/app/build_index.py):
+    # daftarkan package `app` supaya import relatif di bawah tetap jalan
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = "app"
+
+from .build_cache import (
+    BuildCache,
+    build_key,
+    copy_artifacts,
+    dataset_digest,
+    fit_tfidf,
+    manifest_matches,
+    new_manifest,
+    vectorizer_params,
+    write_manifest,
+)
+from .filters import (
+    build_filter_index,
+    filter_index_nbytes,
+    load_metadata,
+    merge_values,
+)
 
 
 def _no_tqdm(iterable):
@@ -36,14 +69,40 @@ def safe_tqdm():
 
 tqdm = safe_tqdm()
 
+# nama collection yang valid (juga nama folder di <output>/collections)
+COLLECTION_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 
-def load_dataset(json_path: str) -> list[str]:
+# nama file artifact di dalam folder index (satu folder per collection)
+VECTORIZER_FILENAME = "tfidf_vectorizer.joblib"
+MATRIX_FILENAME = "tfidf_matrix.joblib"
+ANSWERS_FILENAME = "answers.joblib"
+QUESTIONS_FILENAME = "questions.joblib"
+SUGGEST_FILENAME = "suggest_index.joblib"
+RERANK_FILENAME = "rerank_char.joblib"
+FILTERS_FILENAME = "filters.joblib"
+
+# char n-gram untuk rerank tahap kedua (toleran typo & imbuhan)
+RERANK_NGRAM_RANGE = (3, 5)
+
+# ukuran blok untuk index suggest: max score per blok dipakai saat query
+# supaya prefix yang sangat umum tidak perlu men-scan seluruh range-nya
+SUGGEST_BLOCK_SIZE = 256
+
+
+def normalize_question(text: str) -> str:
+    """
+    Normalisasi pertanyaan untuk index prefix: lowercase + rapikan whitespace.
+    """
+    return " ".join(text.lower().split())
+
+
+def load_qa_pairs(json_path: str) -> list[dict]:
     """
     Memuat dataset JSON berisi list of question-answer.
     Format contoh:
     { "qa_pairs": [ {"question": "...", "answer": "..."}, ... ] }
 
-    Mengembalikan list pertanyaan (questions).
+    Mengembalikan list item (dict) yang memiliki field "question".
     """
     if not os.path.exists(json_path):
         raise FileNotFoundError(f"Dataset tidak ditemukan: {json_path}")
@@ -59,37 +118,498 @@ def load_dataset(json_path: str) -> list[str]:
     else:
         items = data.get("questions", []) if isinstance(data, dict) else []
 
-    questions = [
-        item["question"]
-        for item in items
-        if isinstance(item, dict) and "question" in item
+    return [item for item in items if isinstance(item, dict) and "question" in item]
+
+
+def load_dataset(json_path: str) -> list[str]:
+    """
+    Memuat dataset JSON (lihat `load_qa_pairs`).
+
+    Mengembalikan list pertanyaan (questions).
+    """
+    return [item["question"] for item in load_qa_pairs(json_path)]
+
+
+def matrix_nbytes(matrix) -> int:
+    """
+    Ukuran memori matrix CSR (data + indices + indptr) dalam byte.
+    """
+    if isinstance(matrix, dict):
+        return sum(matrix[k].nbytes for k in ("data", "indices", "indptr"))
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+def compact_matrix(
+    matrix,
+    prune_min_weight: Optional[float] = None,
+    prune_top_n: Optional[int] = None,
+):
+    """
+    Versi hemat memori dari matrix TF-IDF: nilai float32, indices int32, dan
+    (opsional) static pruning posting per term:
+    - prune_min_weight: buang posting dengan bobot < nilai ini
+    - prune_top_n: per term hanya simpan n posting dengan bobot terbesar
+    Setelah pruning baris dinormalisasi ulang (L2) supaya skor tetap cosine.
+    """
+    m = sp.csc_matrix(matrix, dtype=np.float32, copy=True)
+    if prune_min_weight:
+        m.data[m.data < prune_min_weight] = 0.0
+    if prune_top_n:
+        for col in np.flatnonzero(np.diff(m.indptr) > prune_top_n):
+            start, end = m.indptr[col], m.indptr[col + 1]
+            col_data = m.data[start:end]
+            drop = np.argpartition(-col_data, prune_top_n)[prune_top_n:]
+            col_data[drop] = 0.0
+    m.eliminate_zeros()
+
+    m = normalize(m.tocsr(), norm="l2", copy=False)
+    return sp.csr_matrix(
+        (
+            m.data.astype(np.float32),
+            m.indices.astype(np.int32),
+            m.indptr.astype(np.int32),
+        ),
+        shape=m.shape,
+    )
+
+
+def pack_matrix_f16(matrix) -> dict:
+    """
+    scipy.sparse tidak mendukung float16, jadi untuk mode float16 matrix
+    disimpan sebagai dict komponen CSR (data float16) dan di-upcast ke
+    float32 saat diload (lihat `unpack_matrix`). Menghemat ukuran artifact.
+    """
+    return {
+        "format": "csr-f16",
+        "shape": matrix.shape,
+        "data": matrix.data.astype(np.float16),
+        "indices": matrix.indices.astype(np.int32),
+        "indptr": matrix.indptr.astype(np.int32),
+    }
+
+
+def unpack_matrix(obj):
+    """
+    Kebalikan `pack_matrix_f16`; matrix scipy biasa dikembalikan apa adanya.
+    """
+    if isinstance(obj, dict) and obj.get("format") == "csr-f16":
+        return sp.csr_matrix(
+            (obj["data"].astype(np.float32), obj["indices"], obj["indptr"]),
+            shape=tuple(obj["shape"]),
+        )
+    return obj
+
+
+def _char_vectorizer() -> TfidfVectorizer:
+    return TfidfVectorizer(
+        analyzer="char_wb",
+        ngram_range=RERANK_NGRAM_RANGE,
+        sublinear_tf=True,
+        dtype=np.float32,
+    )
+
+
+def build_char_index(questions: list[str], cache: Optional[BuildCache] = None) -> dict:
+    """
+    Vektor TF-IDF char n-gram (char_wb) per dokumen untuk rerank tahap kedua
+    (lihat rerank.py). Baris matrix sudah ter-normalisasi L2 dan disimpan
+    float32/int32 supaya slicing baris kandidat murah saat query.
+    """
+    vectorizer, matrix = fit_tfidf(_char_vectorizer(), questions, cache)
+    matrix = sp.csr_matrix(
+        (matrix.data, matrix.indices.astype(np.int32), matrix.indptr.astype(np.int32)),
+        shape=matrix.shape,
+    )
+    return {"vectorizer": vectorizer, "matrix": matrix}
+
+
+def _top_k_ids(matrix, queries, k: int) -> list:
+    """
+    Per query: id top-k dokumen berskor > 0, skor seri diputus dengan id
+    terkecil (sama seperti rag._top_k). Dokumen berskor 0 tidak dihitung
+    supaya urutan acak di antara skor 0 tidak terbaca sebagai recall hilang.
+    """
+    sims = (queries @ matrix.T).tocsr()
+    out = []
+    for i in range(sims.shape[0]):
+        start, end = sims.indptr[i], sims.indptr[i + 1]
+        rows, vals = sims.indices[start:end], sims.data[start:end]
+        rows, vals = rows[vals > 0], vals[vals > 0]
+        out.append(rows[np.lexsort((rows, -vals))[:k]])
+    return out
+
+
+def recall_at_k(full, compact, queries, k: int = 10) -> float:
+    """
+    Rata-rata overlap top-k index compact terhadap index full precision
+    (query tanpa dokumen berskor > 0 di index full dihitung 1.0).
+    """
+    full_ids = _top_k_ids(full, queries, k)
+    compact_ids = _top_k_ids(compact, queries.astype(np.float32), k)
+    hits = [
+        len(set(a.tolist()) & set(b.tolist())) / len(a) if len(a) else 1.0
+        for a, b in zip(full_ids, compact_ids)
     ]
+    return float(np.mean(hits)) if hits else 1.0
+
+
+def _collapse_dataset(questions, answers, metadata, threshold: float):
+    """
+    Tahap dedup build: gabungkan near-duplicate (lihat dedup.py) dan
+    sejajarkan answers & metadata dengan dokumen kanonik (metadata berisi
+    gabungan nilai semua anggota cluster). Mengembalikan juga teks yang
+    diindex per dokumen: pertanyaan kanonik + aliasnya.
+    """
+    # import lokal: dedup.py memakai normalize_question dari modul ini
+    from .dedup import collapse_near_duplicates, fold_aliases
+
+    clusters, report = collapse_near_duplicates(questions, answers, threshold)
+    keep = [members[0] for members in clusters]
+    indexed = fold_aliases(questions, clusters)
+    questions = [questions[i] for i in keep]
+    if answers is not None:
+        answers = [answers[i] for i in keep]
+    if metadata:
+        # metadata multi-nilai: gabungan nilai semua anggota cluster
+        metadata = {
+            f: [merge_values(col[i] for i in members) for members in clusters]
+            for f, col in metadata.items()
+        }
+    print(
+        f"[OK] Near-duplicate: {report['docs_before']:,} -> "
+        f"{report['docs_after']:,} dokumen "
+        f"(-{report['reduction']:.1%}, "
+        f"{report['clusters_merged']:,} cluster digabung, "
+        f"{report['answer_conflicts']:,} dipecah karena jawaban berbeda)"
+    )
+    return questions, indexed, answers, metadata, report
 
-    return questions
+
+def _save_extra_indexes(save_path, texts, metadata, rerank: bool, cache) -> dict:
+    """
+    Index pendamping opsional: bitmap metadata filter dan char n-gram rerank.
+    """
+    report = {}
+    if metadata:
+        filter_index = build_filter_index(metadata, len(texts))
+        joblib.dump(filter_index, save_path / FILTERS_FILENAME)
+        report["filters_bytes"] = filter_index_nbytes(filter_index)
+        print(
+            f"[OK] Metadata filter index saved ({', '.join(metadata)}; "
+            f"{report['filters_bytes']:,} bytes)"
+        )
+    if rerank:
+        char_index = build_char_index(texts, cache)
+        joblib.dump(char_index, save_path / RERANK_FILENAME)
+        report["rerank_bytes"] = matrix_nbytes(char_index["matrix"])
+        print(
+            f"[OK] Char n-gram rerank index saved "
+            f"({report['rerank_bytes']:,} bytes)"
+        )
+    return report
 
 
-def build_tfidf_index(questions: list[str], save_dir: str):
+def build_tfidf_index(
+    questions: list[str],
+    save_dir: str,
+    answers: Optional[list[str]] = None,
+    compact: bool = False,
+    dtype: str = "float32",
+    prune_min_weight: Optional[float] = None,
+    prune_top_n: Optional[int] = None,
+    eval_k: int = 10,
+    eval_queries: int = 500,
+    rerank: bool = False,
+    dedup_threshold: Optional[float] = None,
+    metadata: Optional[dict] = None,
+    cache: Optional[BuildCache] = None,
+):
     """
     Membangun TF-IDF index dan menyimpannya ke folder save_dir.
+    Jika `answers` diberikan, answers & questions ikut disimpan sehingga folder
+    tersebut bisa langsung diload sebagai collection oleh rag.py.
+
+    Dengan `compact=True` matrix disimpan dalam mode hemat memori
+    (lihat `compact_matrix`, `dtype` "float32" atau "float16"); ukuran index
+    sebelum/sesudah dan recall@k terhadap index full precision dilaporkan.
+
+    Dengan `rerank=True` vektor char n-gram per dokumen ikut disimpan
+    (lihat `build_char_index`) sehingga rag.py bisa melakukan rerank.
+
+    `cache` (lihat build_cache.py) membuat term count per shard dataset
+    dipakai ulang antar build.
+
+    Dengan `dedup_threshold` pertanyaan near-duplicate (MinHash LSH, lihat
+    dedup.py) dengan jawaban yang sama digabung menjadi satu dokumen kanonik
+    sebelum index dibangun; teks pertanyaan yang digabung ikut diindex di
+    dokumen kanonik (TF-IDF & rerank) dan tetap masuk index suggest.
+
+    `metadata` ({field: [nilai per pertanyaan]}, lihat filters.load_metadata)
+    disimpan sebagai index bitmap untuk filter saat query.
     """
     if not questions:
         raise ValueError("Dataset pertanyaan kosong.")
 
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform(tqdm(questions))
+    all_questions = questions
+    # teks yang diindex per dokumen (dedup: pertanyaan kanonik + alias)
+    texts = questions
+    dedup_report = None
+    if dedup_threshold:
+        questions, texts, answers, metadata, dedup_report = _collapse_dataset(
+            questions, answers, metadata, dedup_threshold
+        )
+
+    if cache is None:
+        vectorizer = TfidfVectorizer()
+        tfidf_matrix = vectorizer.fit_transform(tqdm(texts))
+    else:
+        vectorizer, tfidf_matrix = fit_tfidf(TfidfVectorizer(), texts, cache)
 
     save_path = Path(save_dir)
     save_path.mkdir(parents=True, exist_ok=True)
 
-    joblib.dump(vectorizer, save_path / "tfidf_vectorizer.joblib")
-    joblib.dump(tfidf_matrix, save_path / "tfidf_matrix.joblib")
+    report = {"full_bytes": matrix_nbytes(tfidf_matrix)}
+    if dedup_report is not None:
+        report["dedup"] = dedup_report
+    if compact:
+        full_matrix = tfidf_matrix
+        tfidf_matrix = compact_matrix(full_matrix, prune_min_weight, prune_top_n)
+        # query juga divectorize sebagai float32
+        vectorizer.dtype = np.float32
+
+        rng = np.random.default_rng(0)
+        n_eval = min(eval_queries, len(questions))
+        sample = rng.choice(len(questions), size=n_eval, replace=False)
+        queries = vectorizer.transform([questions[i] for i in sample])
+        recall = recall_at_k(full_matrix, tfidf_matrix, queries, eval_k)
 
+        nnz_compact = int(tfidf_matrix.nnz)
+        if dtype == "float16":
+            tfidf_matrix = pack_matrix_f16(tfidf_matrix)
+        report.update(
+            {
+                "compact_bytes": matrix_nbytes(tfidf_matrix),
+                "dtype": dtype,
+                "nnz_full": int(full_matrix.nnz),
+                "nnz_compact": nnz_compact,
+                f"recall@{eval_k}": recall,
+                f"recall@{eval_k}_delta": recall - 1.0,
+            }
+        )
+        print(
+            f"[OK] Compact index: {report['full_bytes']:,} -> "
+            f"{report['compact_bytes']:,} bytes, "
+            f"recall@{eval_k}={recall:.4f} (delta {recall - 1.0:+.4f})"
+        )
+
+    joblib.dump(vectorizer, save_path / VECTORIZER_FILENAME)
+    joblib.dump(tfidf_matrix, save_path / MATRIX_FILENAME)
+    if answers is not None:
+        joblib.dump(list(answers), save_path / ANSWERS_FILENAME)
+        joblib.dump(list(questions), save_path / QUESTIONS_FILENAME)
     print(f"[OK] TF-IDF index saved to: {save_path}")
 
+    report.update(_save_extra_indexes(save_path, texts, metadata, rerank, cache))
+
+    # typeahead tetap memakai semua pertanyaan (termasuk yang digabung dedup)
+    suggest_index = build_suggest_index(all_questions)
+    joblib.dump(suggest_index, save_path / SUGGEST_FILENAME)
+    print(f"[OK] Suggest index saved ({len(suggest_index['keys'])} keys)")
+    return report
+
+
+def build_index_cached(
+    questions: list[str],
+    save_dir: str,
+    answers: Optional[list[str]] = None,
+    cache_dir: Optional[str] = None,
+    metadata: Optional[dict] = None,
+    no_cache: bool = False,
+    **options,
+) -> dict:
+    """
+    `build_tfidf_index` dengan cache content-addressed (lihat build_cache.py):
+    1. manifest di save_dir cocok dengan hash input -> tidak ada yang dibuild;
+    2. build dengan hash yang sama ada di store cache -> artifact disalin;
+    3. selain itu build ulang, term count shard yang tidak berubah dipakai
+       ulang, lalu hasilnya disimpan ke store.
+    `no_cache=True` melewati semua cache (selalu build dari awal); manifest
+    tetap ditulis. Parameter `options` diteruskan ke `build_tfidf_index`.
+    """
+    if no_cache:
+        cache_dir = None
+    started = time.perf_counter()
+    rerank = options.get("rerank", False)
+    params = {
+        "tfidf": vectorizer_params(TfidfVectorizer()),
+        "rerank": vectorizer_params(_char_vectorizer()) if rerank else None,
+        "with_answers": answers is not None,
+        **{k: v for k, v in sorted(options.items()) if k != "rerank"},
+    }
+    dataset_sha = dataset_digest(questions, answers, metadata)
+    key = build_key(dataset_sha, params)
+
+    manifest = None if no_cache else manifest_matches(save_dir, key)
+    source = "output"
+    if manifest is None and cache_dir:
+        cache = BuildCache(cache_dir)
+        manifest = manifest_matches(cache.build_dir(key), key)
+        source = "store"
+        if manifest is not None:
+            copy_artifacts(cache.build_dir(key), save_dir, manifest)
+
+    if manifest is not None:
+        elapsed = time.perf_counter() - started
+        saved = max(0.0, manifest["build_time_s"] - elapsed)
+        print(
+            f"[CACHE] hit ({source}) key={key[:12]}: build dilewati, "
+            f"hemat ~{saved:.2f}s"
+        )
+        return {
+            **manifest.get("report", {}),
+            "cache": {"hit": True, "source": source, "key": key, "saved_s": saved},
+        }
+
+    cache = BuildCache(cache_dir) if cache_dir else None
+    report = build_tfidf_index(
+        questions, save_dir, answers=answers, metadata=metadata, cache=cache, **options
+    )
+    build_time = time.perf_counter() - started
+
+    files = [VECTORIZER_FILENAME, MATRIX_FILENAME, SUGGEST_FILENAME]
+    if answers is not None:
+        files += [ANSWERS_FILENAME, QUESTIONS_FILENAME]
+    if rerank:
+        files.append(RERANK_FILENAME)
+    if metadata:
+        files.append(FILTERS_FILENAME)
+    manifest = new_manifest(key, dataset_sha, params, files, build_time, report)
+    write_manifest(save_dir, manifest)
+    if cache is not None:
+        cache.store(save_dir, manifest)
+
+    shard_stats = cache.stats() if cache is not None else {}
+    print(
+        f"[CACHE] miss key={key[:12]}: build {build_time:.2f}s "
+        f"(shard dipakai ulang: {shard_stats.get('shards_reused', 0)}, "
+        f"dibuild: {shard_stats.get('shards_built', 0)})"
+    )
+    report["cache"] = {
+        "hit": False,
+        "key": key,
+        "build_time_s": build_time,
+        **shard_stats,
+    }
+    return report
+
+
+def suggest_block_max(scores: np.ndarray, block_size: int) -> np.ndarray:
+    """
+    Max skor per blok `block_size` entri (blok terakhir boleh tidak penuh).
+    """
+    n_blocks = -(-len(scores) // block_size)
+    padded = np.full(n_blocks * block_size, -np.inf, dtype=np.float32)
+    padded[: len(scores)] = scores
+    return padded.reshape(n_blocks, block_size).max(axis=1)
+
+
+def build_suggest_index(questions: list[str]) -> dict:
+    """
+    Membangun index prefix untuk typeahead: array pertanyaan ternormalisasi yang
+    terurut (dicari dengan binary search) + skor statis per entri.
+
+    Skor = jumlah kemunculan pertanyaan (ternormalisasi) di dataset; popularitas
+    dari query_history ditambahkan saat index diload (suggest.apply_popularity).
+    Artifact berupa dict berisi list/numpy array saja supaya bisa diload tanpa
+    class khusus.
+    """
+    counts = Counter()
+    display = {}
+    for q in questions:
+        key = normalize_question(q)
+        if not key:
+            continue
+        counts[key] += 1
+        display.setdefault(key, q.strip())
+
+    keys = sorted(counts)
+    scores = np.array([counts[k] for k in keys], dtype=np.float32)
+    return {
+        "keys": keys,
+        "texts": [display[k] for k in keys],
+        "scores": scores,
+        "block_size": SUGGEST_BLOCK_SIZE,
+        "block_max": suggest_block_max(scores, SUGGEST_BLOCK_SIZE),
+    }
+
 
 if __name__ == "__main__":
-    dataset_path = "data/raw_dataset.json"
-    output_dir = "backend/models"
+    parser = argparse.ArgumentParser(description="Build TF-IDF index AutoMIND")
+    parser.add_argument("--dataset", default="data/raw_dataset.json")
+    parser.add_argument("--output", default="backend/models")
+    parser.add_argument(
+        "--collection",
+        default=None,
+        help="nama collection; index ditulis ke <output>/collections/<nama>",
+    )
+    parser.add_argument(
+        "--compact", action="store_true", help="float32/int32 + pruning opsional"
+    )
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--prune-min-weight", type=float, default=None)
+    parser.add_argument("--prune-top-n", type=int, default=None)
+    parser.add_argument("--eval-k", type=int, default=10)
+    parser.add_argument(
+        "--rerank", action="store_true", help="simpan vektor char n-gram untuk rerank"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="gabungkan pertanyaan near-duplicate (MinHash LSH)",
+    )
+    parser.add_argument("--dedup-threshold", type=float, default=0.8)
+    parser.add_argument(
+        "--metadata-fields",
+        default=None,
+        help="field metadata untuk filter, pisahkan koma (default: semua field "
+        "selain question/answer; kosong = tanpa filter)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="folder cache build (default <output>/.build_cache)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="selalu build ulang dari awal"
+    )
+    args = parser.parse_args()
+    if args.collection is not None and not COLLECTION_NAME_RE.match(args.collection):
+        parser.error("--collection hanya boleh huruf, angka, '_' atau '-' (maks 64)")
 
-    questions = load_dataset(dataset_path)
-    build_tfidf_index(questions, output_dir)
+    items = load_qa_pairs(args.dataset)
+    questions = [item["question"] for item in items]
+    answers = [str(item.get("answer", "")) for item in items]
+    metadata_fields = None
+    if args.metadata_fields is not None:
+        metadata_fields = [
+            f.strip() for f in args.metadata_fields.split(",") if f.strip()
+        ]
+    metadata = load_metadata(items, metadata_fields)
+    output_dir = args.output
+    if args.collection:
+        output_dir = os.path.join(output_dir, "collections", args.collection)
+    build_index_cached(
+        questions,
+        output_dir,
+        answers=answers,
+        metadata=metadata,
+        cache_dir=args.cache_dir or os.path.join(args.output, ".build_cache"),
+        no_cache=args.no_cache,
+        compact=args.compact,
+        dtype=args.dtype,
+        prune_min_weight=args.prune_min_weight,
+        prune_top_n=args.prune_top_n,
+        eval_k=args.eval_k,
+        rerank=args.rerank,
+        dedup_threshold=args.dedup_threshold if args.dedup else None,
+    )
@@ -36,6 +36,26 @@ def _getint(key, default):
         return default
 
 
+def _getfloat(key, default):
+    try:
+        val = os.getenv(key)
+        return float(val) if val is not None else default
+    except Exception:
+        return default
+
+
+def _getbool(key, default):
+    val = os.getenv(key)
+    if val is None:
+        return default
+    return val.lower() in ("1", "true", "yes")
+
+
+def _getlist(key, default=""):
+    val = _getenv(key, default)
+    return [v.strip() for v in val.split(",") if v.strip()]
+
+
 # ---------------------------------------------------------------------
 # 3) JWT / Token settings
 # ---------------------------------------------------------------------
@@ -46,6 +66,10 @@ ACCESS_TOKEN_EXPIRE_MINUTES = _getint(
 )  # Default 7 hari
 
 
+# username yang boleh memanggil endpoint admin (pisahkan dengan koma)
+ADMIN_USERNAMES = _getlist("ADMIN_USERNAMES")
+
+
 # ---------------------------------------------------------------------
 # 4) DATABASE CONFIGURATION (Postgres via Docker atau fallback SQLite)
 # ---------------------------------------------------------------------
@@ -69,7 +93,87 @@ DEBUG = _getenv("DEBUG", "false").lower() in ("1", "true", "yes")
 
 
 # ---------------------------------------------------------------------
-# 6) Print config sekali saat startup (opsional)
+# 6) Retrieval index, cache & warm-up
+# ---------------------------------------------------------------------
+RESULT_CACHE_SIZE = _getint("RESULT_CACHE_SIZE", 4096)
+
+# micro-batching scoring: kumpulkan request konkuren maksimal N query atau
+# BATCH_MAX_WAIT_MS sejak query pertama, lalu score dalam satu pass
+BATCH_ENABLED = _getbool("BATCH_ENABLED", True)
+BATCH_MAX_SIZE = _getint("BATCH_MAX_SIZE", 32)
+BATCH_MAX_WAIT_MS = _getfloat("BATCH_MAX_WAIT_MS", 2.0)
+BATCH_WORKERS = _getint("BATCH_WORKERS", 1)
+
+# rerank tahap kedua dengan char n-gram (aktif jika artifact rerank tersedia):
+# kandidat dari index kata, dibatasi budget latency per request
+RERANK_ENABLED = _getbool("RERANK_ENABLED", True)
+RERANK_CANDIDATES = _getint("RERANK_CANDIDATES", 200)
+RERANK_BUDGET_MS = _getfloat("RERANK_BUDGET_MS", 15.0)
+RERANK_WEIGHT = _getfloat("RERANK_WEIGHT", 0.5)  # bobot skor char n-gram
+
+# top-k exact dengan pruning MaxScore di atas posting impact-ordered
+# (impact.py); hanya untuk collection dengan minimal PRUNING_MIN_DOCS dokumen,
+# di bawah itu scoring penuh sudah cukup murah
+PRUNING_ENABLED = _getbool("PRUNING_ENABLED", True)
+PRUNING_MIN_DOCS = _getint("PRUNING_MIN_DOCS", 5000)
+
+# typeahead: popularitas query (jumlah di query_history N hari terakhir)
+# ditambahkan ke skor suggest saat index diload; 0 = hanya frekuensi dataset
+SUGGEST_POPULARITY_DAYS = _getint("SUGGEST_POPULARITY_DAYS", 30)
+
+# collection index tambahan (satu folder per collection, hasil build_index)
+COLLECTIONS_DIR = _getenv("COLLECTIONS_DIR", str(HERE / "models" / "collections"))
+# batas memori total collection yang terload (MB); 0 = tanpa batas
+INDEX_MEMORY_BUDGET_MB = _getint("INDEX_MEMORY_BUDGET_MB", 0)
+
+# warm-up cache dari query_history saat startup dan setelah index reload
+WARMUP_ENABLED = _getbool("WARMUP_ENABLED", True)
+WARMUP_WINDOW_HOURS = _getint("WARMUP_WINDOW_HOURS", 24 * 7)
+WARMUP_TOP_N = _getint("WARMUP_TOP_N", 500)
+# top_k untuk history lama yang dicatat tanpa parameter retrieval
+WARMUP_TOP_K = _getint("WARMUP_TOP_K", 3)
+WARMUP_QPS = _getfloat("WARMUP_QPS", 20.0)  # batas laju komputasi warm-up
+
+
+# ---------------------------------------------------------------------
+# 7) Profiling request
+# ---------------------------------------------------------------------
+# header `X-Profile: <PROFILE_TOKEN>` memaksa profiling; kosong = nonaktif
+PROFILE_TOKEN = _getenv("PROFILE_TOKEN", "")
+# porsi request yang diprofile otomatis; disimpan hanya jika >= PROFILE_SLOW_MS
+PROFILE_SAMPLE_RATE = _getfloat("PROFILE_SAMPLE_RATE", 0.01)
+PROFILE_SLOW_MS = _getfloat("PROFILE_SLOW_MS", 500.0)
+PROFILE_DIR = _getenv("PROFILE_DIR", str(HERE / "profiles"))
+PROFILE_MAX_FILES = _getint("PROFILE_MAX_FILES", 50)
+
+
+# ---------------------------------------------------------------------
+# 8) Retensi query_history
+# ---------------------------------------------------------------------
+# umur maksimal history (hari); 0 = retensi nonaktif
+HISTORY_RETENTION_DAYS = _getint("HISTORY_RETENTION_DAYS", 0)
+RETENTION_BATCH_SIZE = _getint("RETENTION_BATCH_SIZE", 1000)
+RETENTION_PAUSE_MS = _getint("RETENTION_PAUSE_MS", 50)  # jeda antar batch delete
+RETENTION_INTERVAL_HOURS = _getfloat("RETENTION_INTERVAL_HOURS", 24.0)
+
+
+# ---------------------------------------------------------------------
+# 9) Backup database (SQLite online backup API)
+# ---------------------------------------------------------------------
+BACKUP_DIR = _getenv("BACKUP_DIR", str(HERE / "backups"))
+# halaman yang disalin per langkah backup dan jeda antar langkah, supaya
+# writer lain tidak terblokir selama backup berjalan
+BACKUP_PAGES_PER_STEP = _getint("BACKUP_PAGES_PER_STEP", 256)
+BACKUP_STEP_SLEEP_MS = _getfloat("BACKUP_STEP_SLEEP_MS", 5.0)
+# incremental: snapshot disimpan sebagai chunk content-addressed, hanya chunk
+# yang berubah sejak snapshot sebelumnya yang ditulis
+BACKUP_INCREMENTAL = _getbool("BACKUP_INCREMENTAL", True)
+BACKUP_COMPRESS = _getbool("BACKUP_COMPRESS", True)
+BACKUP_KEEP = _getint("BACKUP_KEEP", 14)  # jumlah snapshot yang disimpan
+
+
+# ---------------------------------------------------------------------
+# 10) Print config sekali saat startup (opsional)
 # ---------------------------------------------------------------------
 print(">> CONFIG LOADED")
 print(f">> Using DB: {SQLALCHEMY_DATABASE_URL}")
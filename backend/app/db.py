@@ -5,9 +5,10 @@ from typing import Generator
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
-# lokasi file sqlite (relatif ke project)
+# lokasi file sqlite (relatif ke project); env SQLITE_PATH untuk DB lain,
+# mis. database sementara load test (tools/loadtest.py)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # app/
-SQLITE_PATH = os.path.join(BASE_DIR, "db.sqlite")
+SQLITE_PATH = os.getenv("SQLITE_PATH") or os.path.join(BASE_DIR, "db.sqlite")
 DATABASE_URL = f"sqlite:///{SQLITE_PATH}"
 
 # engine (sqlite + multithreading)
@@ -59,6 +60,12 @@ def create_db_and_tables():
     except Exception:
         pass
 
+    # DB baru: auto_vacuum harus di-set sebelum tabel pertama dibuat supaya
+    # retensi bisa mengembalikan ruang lewat incremental_vacuum (no-op di DB
+    # yang sudah berisi tabel)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+
     # Buat file DB dan tabel
     Base.metadata.create_all(bind=engine)
     return SQLITE_PATH
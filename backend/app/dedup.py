@@ -0,0 +1,213 @@
+# backend/app/dedup.py
+"""
+Deteksi pertanyaan near-duplicate saat build dengan MinHash + LSH.
+
+- Setiap pertanyaan (ternormalisasi) dipecah menjadi shingle char n-gram,
+  lalu diringkas menjadi signature MinHash berukuran tetap.
+- LSH banding: signature dibagi menjadi `bands` potongan; pertanyaan yang
+  satu potongannya sama masuk bucket yang sama dan menjadi kandidat. Hanya
+  kandidat yang dibandingkan (estimasi Jaccard dari signature), sehingga
+  waktunya kira-kira linear, bukan perbandingan semua pasangan.
+- Setiap pasangan kandidat dalam bucket dengan kemiripan >= threshold
+  digabung (union-find) menjadi satu cluster; cluster diwakili satu dokumen
+  kanonik (kemunculan pertama). Teks anggota lain (alias) ikut diindex di
+  dokumen kanonik (`fold_aliases`) supaya query yang hanya cocok dengan
+  alias tetap menemukan jawabannya.
+- Pertanyaan yang mirip tetapi jawabannya berbeda tidak digabung: cluster
+  dipecah per jawaban supaya tidak ada jawaban yang hilang dari index.
+"""
+
+import time
+import zlib
+from typing import Optional
+
+import numpy as np
+
+from .build_index import normalize_question
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+def _shingles(text: str) -> np.ndarray:
+    text = normalize_question(text)
+    if len(text) <= SHINGLE_SIZE:
+        grams = {text}
+    else:
+        grams = {
+            text[i : i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)
+        }
+    return np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams),
+        dtype=np.uint64,
+        count=len(grams),
+    )
+
+
+def _lsh_params(threshold: float, num_perm: int) -> tuple:
+    """
+    (bands, rows) dengan bands * rows = num_perm yang titik belok kurva LSH
+    (1/bands)^(1/rows) paling dekat dengan threshold.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        err = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or err < best[0]:
+            best = (err, bands, rows)
+    return best[1], best[2]
+
+
+def minhash_signatures(texts: list[str], num_perm: int = NUM_PERM, seed: int = 1):
+    """
+    Matrix signature (n_texts x num_perm, uint64).
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    sigs = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        sh = _shingles(text)
+        # (a*x + b) mod p untuk semua permutasi sekaligus; perkalian uint64
+        # sengaja overflow (wrap mod 2^64) seperti implementasi MinHash umum
+        sigs[i] = ((np.outer(sh, a) + b) % _MERSENNE_PRIME).min(axis=0)
+    return sigs
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> None:
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            # akar = indeks terkecil, supaya dokumen kanonik = kemunculan pertama
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+
+def _merge_bucket(uf: _UnionFind, sigs, ids: list, members: list, threshold) -> None:
+    """
+    Bandingkan semua pasangan dalam satu bucket (estimasi Jaccard): dua
+    anggota bisa mirip satu sama lain walau tidak mirip anggota pertama.
+    """
+    for k, head in enumerate(members[:-1]):
+        sims = (sigs[members[k + 1 :]] == sigs[head]).mean(axis=1)
+        for j in np.flatnonzero(sims >= threshold):
+            uf.union(ids[k], ids[k + 1 + j])
+
+
+def find_clusters(
+    texts: list[str], threshold: float = 0.8, num_perm: int = NUM_PERM
+) -> list[list[int]]:
+    """
+    Cluster near-duplicate (list indeks, terurut; anggota pertama = kanonik).
+    Teks yang tidak punya duplikat membentuk cluster berukuran 1.
+    """
+    n = len(texts)
+    uf = _UnionFind(n)
+
+    # duplikat persis (setelah normalisasi) digabung tanpa MinHash
+    first_seen = {}
+    unique = []
+    for i, text in enumerate(texts):
+        key = normalize_question(text)
+        j = first_seen.setdefault(key, i)
+        if j != i:
+            uf.union(i, j)
+        else:
+            unique.append(i)
+
+    sigs = minhash_signatures([texts[i] for i in unique], num_perm)
+    bands, rows = _lsh_params(threshold, num_perm)
+    for band in range(bands):
+        buckets = {}
+        chunk = np.ascontiguousarray(sigs[:, band * rows : (band + 1) * rows])
+        for pos in range(len(unique)):
+            buckets.setdefault(chunk[pos].tobytes(), []).append(pos)
+        for members in buckets.values():
+            if len(members) > 1:
+                _merge_bucket(
+                    uf, sigs, [unique[p] for p in members], members, threshold
+                )
+
+    clusters = {}
+    for i in range(n):
+        clusters.setdefault(uf.find(i), []).append(i)
+    return [clusters[root] for root in sorted(clusters)]
+
+
+def split_by_answer(clusters: list[list[int]], answers: list[str]):
+    """
+    Pecah cluster yang anggotanya punya jawaban berbeda: satu cluster per
+    jawaban (urutan anggota tetap). Mengembalikan (clusters, jumlah cluster
+    yang dipecah); hasil terurut berdasarkan anggota pertama.
+    """
+    out = []
+    conflicts = 0
+    for members in clusters:
+        by_answer = {}
+        for i in members:
+            by_answer.setdefault(answers[i], []).append(i)
+        if len(by_answer) > 1:
+            conflicts += 1
+        out.extend(by_answer.values())
+    out.sort(key=lambda m: m[0])
+    return out, conflicts
+
+
+def fold_aliases(texts: list[str], clusters: list[list[int]]) -> list[str]:
+    """
+    Teks yang diindex per cluster: teks kanonik diikuti alias (teks anggota
+    lain yang berbeda setelah normalisasi), dipisah baris baru.
+    """
+    out = []
+    for members in clusters:
+        seen = set()
+        parts = []
+        for i in members:
+            key = normalize_question(texts[i])
+            if key not in seen:
+                seen.add(key)
+                parts.append(texts[i])
+        out.append("\n".join(parts))
+    return out
+
+
+def collapse_near_duplicates(
+    questions: list[str],
+    answers: Optional[list[str]] = None,
+    threshold: float = 0.8,
+    num_perm: int = NUM_PERM,
+):
+    """
+    Kelompokkan pertanyaan near-duplicate dengan jawaban yang sama.
+    Mengembalikan (clusters, report): clusters = list indeks anggota (urut
+    naik berdasarkan anggota pertama = dokumen kanonik).
+    """
+    started = time.perf_counter()
+    clusters = find_clusters(questions, threshold, num_perm)
+    conflicts = 0
+    if answers is not None:
+        clusters, conflicts = split_by_answer(clusters, answers)
+    keep = [members[0] for members in clusters]
+
+    report = {
+        "docs_before": len(questions),
+        "docs_after": len(keep),
+        "reduction": 1.0 - len(keep) / len(questions) if questions else 0.0,
+        "clusters_merged": sum(1 for m in clusters if len(m) > 1),
+        "largest_cluster": max((len(m) for m in clusters), default=0),
+        "answer_conflicts": conflicts,
+        "threshold": threshold,
+        "duration_s": round(time.perf_counter() - started, 3),
+    }
+    return clusters, report
@@ -0,0 +1,169 @@
+# backend/app/filters.py
+"""
+Index bitmap untuk filter metadata (kategori, produk, bahasa, ...).
+
+Saat build, setiap pasangan (field, nilai) disimpan sebagai himpunan dokumen:
+- bitmap (np.packbits, n_docs/8 byte) untuk nilai yang umum;
+- array id terurut (uint32) untuk nilai yang jarang, karena lebih kecil
+  daripada bitmap.
+Saat query, ekspresi filter dievaluasi menjadi mask boolean per dokumen
+sebelum scoring, sehingga dokumen yang tidak lolos filter tidak pernah
+discore (lihat rag._score_batch).
+
+Format ekspresi filter (JSON):
+    {"category": "sensor"}                    field == nilai
+    {"language": ["id", "en"]}                salah satu nilai
+    {"category": "plc", "language": "id"}     semua syarat (AND)
+    {"$and": [...]}, {"$or": [...]}, {"$not": {...}}
+"""
+
+import json
+from typing import Any, Optional
+
+import numpy as np
+
+# field dataset yang bukan metadata
+RESERVED_FIELDS = ("question", "answer")
+
+
+class FilterError(ValueError):
+    pass
+
+
+def _values(raw) -> list[str]:
+    """
+    Nilai metadata sebagai list string (field multi-nilai berupa list).
+    """
+    if raw is None:
+        return []
+    if isinstance(raw, (list, tuple, set)):
+        return [str(v) for v in raw if v is not None]
+    return [str(raw)]
+
+
+def merge_values(raws) -> Any:
+    """
+    Gabungan nilai metadata beberapa dokumen (mis. satu cluster dedup):
+    None jika kosong, skalar jika hanya satu nilai, selain itu list (urutan
+    kemunculan pertama).
+    """
+    merged = list(dict.fromkeys(v for raw in raws for v in _values(raw)))
+    if not merged:
+        return None
+    return merged[0] if len(merged) == 1 else merged
+
+
+def load_metadata(items: list[dict], fields: Optional[list[str]] = None) -> dict:
+    """
+    Ambil metadata dari item dataset (lihat build_index.load_qa_pairs):
+    {field: [nilai item 0, nilai item 1, ...]}. Jika `fields` None, semua
+    field selain question/answer yang bernilai skalar atau list dipakai.
+    """
+    if fields is None:
+        found = {}
+        for item in items:
+            for key, value in item.items():
+                if key in RESERVED_FIELDS or isinstance(value, dict):
+                    continue
+                found.setdefault(key, None)
+        fields = list(found)
+    return {field: [item.get(field) for item in items] for field in fields}
+
+
+def build_filter_index(metadata: dict, n_docs: int) -> dict:
+    """
+    Index bitmap per (field, nilai). Artifact berupa dict/numpy saja.
+    """
+    fields = {}
+    for field, column in metadata.items():
+        if len(column) != n_docs:
+            raise ValueError(f"Metadata '{field}' tidak sejajar dengan dokumen")
+        postings: dict = {}
+        for doc, raw in enumerate(column):
+            for value in _values(raw):
+                postings.setdefault(value, []).append(doc)
+
+        encoded = {}
+        for value, docs in postings.items():
+            ids = np.asarray(docs, dtype=np.uint32)
+            # id list 4 byte/dokumen vs bitmap n_docs/8 byte
+            if ids.nbytes < (n_docs + 7) // 8:
+                encoded[value] = ("ids", ids)
+            else:
+                mask = np.zeros(n_docs, dtype=bool)
+                mask[ids] = True
+                encoded[value] = ("bits", np.packbits(mask))
+        fields[field] = encoded
+    return {"n_docs": n_docs, "fields": fields}
+
+
+def filter_index_nbytes(index: Optional[dict]) -> int:
+    if not index:
+        return 0
+    return sum(
+        arr.nbytes for values in index["fields"].values() for _, arr in values.values()
+    )
+
+
+def _value_mask(index: dict, field: str, value) -> np.ndarray:
+    n_docs = index["n_docs"]
+    values = index["fields"].get(field)
+    if values is None:
+        raise FilterError(f"Field filter tidak dikenal: {field}")
+    items = value if isinstance(value, (list, tuple)) else [value]
+    if any(isinstance(v, (dict, list, tuple)) for v in items):
+        raise FilterError(
+            f"Nilai filter '{field}' harus skalar atau list skalar "
+            "(operator hanya $and / $or / $not)"
+        )
+    mask = np.zeros(n_docs, dtype=bool)
+    for v in _values(value):
+        entry = values.get(v)
+        if entry is None:
+            continue
+        kind, arr = entry
+        if kind == "ids":
+            mask[arr] = True
+        else:
+            mask |= np.unpackbits(arr, count=n_docs).astype(bool)
+    return mask
+
+
+def _eval(index: dict, expr: Any) -> np.ndarray:
+    if not isinstance(expr, dict) or not expr:
+        raise FilterError("Ekspresi filter harus berupa object tidak kosong")
+    mask = np.ones(index["n_docs"], dtype=bool)
+    for key, value in expr.items():
+        if key == "$and" or key == "$or":
+            if not isinstance(value, list) or not value:
+                raise FilterError(f"{key} membutuhkan list ekspresi")
+            parts = [_eval(index, sub) for sub in value]
+            combined = parts[0]
+            for part in parts[1:]:
+                combined = combined & part if key == "$and" else combined | part
+            mask &= combined
+        elif key == "$not":
+            mask &= ~_eval(index, value)
+        elif key.startswith("$"):
+            raise FilterError(f"Operator filter tidak dikenal: {key}")
+        else:
+            mask &= _value_mask(index, key, value)
+    return mask
+
+
+def select(index: Optional[dict], expr: dict) -> np.ndarray:
+    """
+    Id dokumen (terurut naik, int64) yang lolos ekspresi filter.
+    """
+    if index is None:
+        raise FilterError("Collection ini tidak memiliki index metadata")
+    return np.flatnonzero(_eval(index, expr))
+
+
+def filter_key(expr: Optional[dict]) -> Optional[str]:
+    """
+    Representasi kanonik ekspresi filter (untuk key cache/coalescing).
+    """
+    if not expr:
+        return None
+    return json.dumps(expr, sort_keys=True, ensure_ascii=False)
@@ -0,0 +1,289 @@
+# backend/app/history_search.py
+"""
+Full-text search atas history query milik user.
+
+- SQLite: virtual table FTS5 `query_history_fts` (external content ke
+  query_history, jadi teks tidak disimpan dua kali) yang disinkronkan trigger
+  AFTER INSERT/UPDATE/DELETE. Ranking memakai bm25().
+  Tabel `query_history_fts_state` mencatat watermark backfill: baris lama
+  (id <= max_id) yang belum di-backfill tidak ada di index, jadi trigger
+  DELETE/UPDATE tidak boleh mengirim 'delete' FTS untuknya (external content
+  FTS5 akan rusak); baris tersebut nanti diindex backfill dengan isi
+  terbarunya.
+- Postgres: kolom `query_tsv` (tsvector, config 'simple' karena Postgres
+  tidak punya config bahasa Indonesia) + GIN index, diisi trigger BEFORE
+  INSERT/UPDATE. Ranking memakai ts_rank_cd().
+
+Schema dibuat oleh migration Alembic (c5d9e1f3a7b2) dan juga dipastikan saat
+startup (`ensure_search_index`) untuk database yang dibuat lewat create_all.
+Baris lama diisi secara batch (`backfill_search_index`) dan dilanjutkan saat
+startup berikutnya jika terputus.
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "query_history_fts"
+FTS_STATE_TABLE = "query_history_fts_state"
+BACKFILL_BATCH_SIZE = 1000
+
+# baris `old.id` sudah ada di index FTS: ditambahkan trigger insert (id di
+# atas max_id saat index dibuat) atau sudah di-backfill
+_SQLITE_INDEXED = (
+    f"old.id > (SELECT max_id FROM {FTS_STATE_TABLE}) "
+    f"OR old.id <= (SELECT backfilled FROM {FTS_STATE_TABLE})"
+)
+
+_SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "query, content='query_history', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TABLE IF NOT EXISTS {FTS_STATE_TABLE} ("
+    "id INTEGER PRIMARY KEY CHECK (id = 1), "
+    "max_id INTEGER NOT NULL, backfilled INTEGER NOT NULL)",
+    f"INSERT OR IGNORE INTO {FTS_STATE_TABLE} (id, max_id, backfilled) "
+    "SELECT 1, COALESCE(MAX(id), 0), 0 FROM query_history",
+    f"CREATE TRIGGER IF NOT EXISTS query_history_fts_ai AFTER INSERT ON query_history "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, query) VALUES (new.id, new.query); END",
+    f"CREATE TRIGGER IF NOT EXISTS query_history_fts_ad AFTER DELETE ON query_history "
+    f"WHEN {_SQLITE_INDEXED} "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, query) "
+    "VALUES ('delete', old.id, old.query); END",
+    f"CREATE TRIGGER IF NOT EXISTS query_history_fts_au "
+    "AFTER UPDATE OF query ON query_history "
+    f"WHEN {_SQLITE_INDEXED} "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, query) "
+    "VALUES ('delete', old.id, old.query); "
+    f"INSERT INTO {FTS_TABLE}(rowid, query) VALUES (new.id, new.query); END",
+]
+
+_POSTGRES_DDL = [
+    "ALTER TABLE query_history ADD COLUMN IF NOT EXISTS query_tsv tsvector",
+    "CREATE INDEX IF NOT EXISTS ix_query_history_query_tsv "
+    "ON query_history USING GIN (query_tsv)",
+    "CREATE OR REPLACE FUNCTION query_history_tsv_update() RETURNS trigger AS $$ "
+    "BEGIN NEW.query_tsv := to_tsvector('simple', NEW.query); RETURN NEW; END "
+    "$$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS query_history_tsv_trigger ON query_history",
+    "CREATE TRIGGER query_history_tsv_trigger "
+    "BEFORE INSERT OR UPDATE OF query ON query_history "
+    "FOR EACH ROW EXECUTE FUNCTION query_history_tsv_update()",
+]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _index_exists(conn: Connection) -> bool:
+    if conn.dialect.name == "sqlite":
+        sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :t"
+        params = {"t": FTS_TABLE}
+    else:
+        sql = (
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'query_history' AND column_name = :c"
+        )
+        params = {"c": "query_tsv"}
+    return bool(conn.execute(text(sql), params).scalar())
+
+
+def backfill_state(conn: Connection) -> Optional[tuple[int, int]]:
+    """
+    SQLite: (max_id, backfilled) dari tabel state; None untuk Postgres atau
+    index lama tanpa tabel state.
+    """
+    if conn.dialect.name != "sqlite":
+        return None
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :t"),
+        {"t": FTS_STATE_TABLE},
+    ).scalar()
+    if not exists:
+        return None
+    row = conn.execute(
+        text(f"SELECT max_id, backfilled FROM {FTS_STATE_TABLE}")
+    ).first()
+    return (row[0], row[1]) if row else None
+
+
+def create_search_index(conn: Connection) -> Optional[int]:
+    """
+    Buat index FTS + trigger sinkronisasi (idempotent). Mengembalikan id
+    maksimum yang perlu di-backfill jika index baru dibuat, selain itu None.
+    Baris dengan id lebih besar sudah ditangani trigger.
+    """
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        ddls = _SQLITE_DDL
+    elif dialect == "postgresql":
+        ddls = _POSTGRES_DDL
+    else:
+        raise RuntimeError(f"Full-text search tidak didukung untuk {dialect}")
+    if _index_exists(conn):
+        return None
+    for ddl in ddls:
+        conn.execute(text(ddl))
+    return conn.execute(text("SELECT MAX(id) FROM query_history")).scalar() or 0
+
+
+def drop_search_index(conn: Connection) -> None:
+    if conn.dialect.name == "sqlite":
+        for trigger in ("ai", "ad", "au"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS query_history_fts_{trigger}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {FTS_STATE_TABLE}"))
+    elif conn.dialect.name == "postgresql":
+        conn.execute(
+            text("DROP TRIGGER IF EXISTS query_history_tsv_trigger ON query_history")
+        )
+        conn.execute(text("DROP FUNCTION IF EXISTS query_history_tsv_update()"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_query_history_query_tsv"))
+        conn.execute(text("ALTER TABLE query_history DROP COLUMN IF EXISTS query_tsv"))
+
+
+def backfill_batch(conn: Connection, after_id: int, max_id: int, n: int) -> int:
+    """
+    Index satu batch baris lama (after_id < id <= max_id, maksimal n baris).
+    Mengembalikan id terakhir yang diproses (after_id jika sudah selesai).
+    """
+    last = conn.execute(
+        text(
+            "SELECT MAX(id) FROM (SELECT id FROM query_history "
+            "WHERE id > :a AND id <= :m ORDER BY id LIMIT :n) AS batch"
+        ),
+        {"a": after_id, "m": max_id, "n": n},
+    ).scalar()
+    if last is None:
+        return after_id
+    if conn.dialect.name == "sqlite":
+        conn.execute(
+            text(
+                f"INSERT INTO {FTS_TABLE}(rowid, query) SELECT id, query "
+                "FROM query_history WHERE id > :a AND id <= :b"
+            ),
+            {"a": after_id, "b": last},
+        )
+        # watermark naik dalam transaksi yang sama dengan batch-nya
+        conn.execute(text(f"UPDATE {FTS_STATE_TABLE} SET backfilled = :b"), {"b": last})
+    else:
+        conn.execute(
+            text(
+                "UPDATE query_history SET query_tsv = to_tsvector('simple', query) "
+                "WHERE id > :a AND id <= :b"
+            ),
+            {"a": after_id, "b": last},
+        )
+    return last
+
+
+def backfill_search_index(
+    engine: Engine,
+    max_id: int,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    pause_s: float = 0.01,
+    after_id: int = 0,
+) -> int:
+    """
+    Isi index untuk baris after_id < id <= max_id dalam batch kecil (satu
+    transaksi per batch) supaya write lock tidak dipegang lama. Mengembalikan
+    jumlah batch.
+    """
+    after, batches = after_id, 0
+    while True:
+        with engine.begin() as conn:
+            last = backfill_batch(conn, after, max_id, batch_size)
+        if last == after:
+            return batches
+        after, batches = last, batches + 1
+        if pause_s > 0:
+            time.sleep(pause_s)
+
+
+def ensure_search_index(engine: Engine, background: bool = True) -> None:
+    """
+    Pastikan index FTS ada (dipanggil saat startup). Jika baru dibuat,
+    baris lama di-backfill (default di thread background).
+    """
+    after_id = 0
+    try:
+        with engine.begin() as conn:
+            max_id = create_search_index(conn)
+            state = backfill_state(conn)
+    except Exception:
+        logger.exception("gagal membuat index full-text history")
+        return
+    if state is not None:
+        # SQLite: lanjutkan backfill yang belum selesai (mis. proses restart)
+        max_id, after_id = state
+    if not max_id or after_id >= max_id:
+        return
+    kwargs = {"after_id": after_id}
+    if background:
+        threading.Thread(
+            target=backfill_search_index,
+            args=(engine, max_id),
+            kwargs=kwargs,
+            daemon=True,
+        ).start()
+    else:
+        backfill_search_index(engine, max_id, **kwargs)
+
+
+# ---------------- pencarian ----------------
+def search_terms(q: str) -> list[str]:
+    return _TOKEN_RE.findall(q.lower())
+
+
+def _fts5_query(terms: list[str]) -> str:
+    # setiap term di-quote (aman dari sintaks FTS5); term terakhir sebagai
+    # prefix supaya pencarian sambil mengetik tetap menemukan hasil
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_history(conn: Connection, user_id: int, q: str, limit: int, offset: int):
+    """
+    History milik user yang cocok dengan semua term di `q`, diurutkan
+    relevansi (lalu terbaru). Mengembalikan (rows, total); setiap row berisi
+    id, user_id, query, results, created_at, score.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return [], 0
+    params = {"uid": user_id, "limit": limit, "offset": offset}
+
+    if conn.dialect.name == "sqlite":
+        params["q"] = _fts5_query(terms)
+        base = (
+            f"FROM {FTS_TABLE} JOIN query_history h ON h.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :q AND h.user_id = :uid"
+        )
+        # bm25() bernilai negatif: makin kecil makin relevan
+        select = (
+            "SELECT h.id, h.user_id, h.query, h.results, h.created_at, "
+            f"-bm25({FTS_TABLE}) AS score {base} "
+            f"ORDER BY bm25({FTS_TABLE}), h.id DESC LIMIT :limit OFFSET :offset"
+        )
+    else:
+        params["q"] = " & ".join(terms[:-1] + [terms[-1] + ":*"])
+        base = (
+            "FROM query_history h, to_tsquery('simple', :q) tsq "
+            "WHERE h.query_tsv @@ tsq AND h.user_id = :uid"
+        )
+        select = (
+            "SELECT h.id, h.user_id, h.query, h.results, h.created_at, "
+            f"ts_rank_cd(h.query_tsv, tsq) AS score {base} "
+            "ORDER BY score DESC, h.id DESC LIMIT :limit OFFSET :offset"
+        )
+
+    total = conn.execute(text(f"SELECT COUNT(*) {base}"), params).scalar()
+    rows = conn.execute(text(select), params).mappings().all()
+    return rows, int(total or 0)
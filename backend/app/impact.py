@@ -0,0 +1,256 @@
+# backend/app/impact.py
+"""
+Top-k exact dengan dynamic pruning (MaxScore) di atas posting yang diurutkan
+berdasarkan impact.
+
+- Saat collection diload, matrix dokumen (CSR, baris ter-normalisasi L2)
+  diubah menjadi posting per term yang diurutkan berdasarkan bobot (impact)
+  menurun; bobot posting pertama = skor maksimum term tersebut.
+- Saat query, batas atas kontribusi sisa posting sebuah term adalah
+  bobot query x impact posting berikutnya yang belum dibaca. Posting dibaca
+  per blok (ukuran blok berlipat ganda) dan dijumlahkan menjadi skor parsial
+  (batas bawah); k dokumen teratas diberi skor exact lewat barisnya di
+  matrix dokumen sehingga theta (skor ke-k) cepat naik.
+- MaxScore: term diurutkan berdasarkan batas atasnya; kumpulan term dengan
+  total batas atas di bawah theta menjadi non-essential dan postingnya tidak
+  dibaca lagi, karena dokumen yang hanya muncul di sisa posting term tersebut
+  tidak mungkin masuk top-k. Selesai jika tidak ada term essential yang
+  masih punya posting; hanya dokumen yang batas atasnya >= theta yang
+  dihitung exact.
+- Jika terlalu banyak dokumen yang harus dihitung (top_k besar dengan query
+  yang tidak selektif), query dikembalikan untuk di-score penuh.
+
+Dokumen yang tidak pernah dihitung skornya < theta, jadi ranking akhir
+(termasuk pemutusan seri, lihat rag._top_k) identik dengan scoring penuh.
+Term umum seperti "yang", "dan", "adalah" (vectorizer tanpa stopword)
+ber-IDF kecil sehingga cepat menjadi non-essential.
+"""
+
+import threading
+from collections import deque
+
+import numpy as np
+
+# ukuran blok pertama yang dibaca per term; blok berikutnya berlipat ganda
+BLOCK_SIZE = 128
+# jika dokumen yang terlihat melebihi fraksi ini, pruning tidak lagi lebih
+# murah daripada scoring penuh (sparse product di C) -> query di-score penuh
+MAX_SEEN_FRACTION = 0.1
+# query dengan term lebih banyak memakai batas atas kasar per dokumen
+MAX_MASK_TERMS = 64
+# toleransi pembulatan float saat membandingkan batas atas dengan theta
+_SLACK = 1e-6
+# jumlah counter per query terakhir yang ditampilkan di /stats
+RECENT_QUERIES = 50
+
+
+class ImpactIndex:
+    def __init__(self, matrix):
+        """
+        matrix: CSR dokumen x term dengan baris ter-normalisasi L2 (dipakai
+        juga untuk skor exact kandidat).
+        """
+        self.matrix = matrix
+        self.n_docs = matrix.shape[0]
+        csc = matrix.tocsc()
+        # bobot 0 (mis. underflow float16) tidak berkontribusi ke skor
+        csc.eliminate_zeros()
+        counts = np.diff(csc.indptr)
+        term = np.repeat(np.arange(csc.shape[1], dtype=np.int32), counts)
+        # per term: impact menurun, seri diurutkan id dokumen
+        order = np.lexsort((csc.indices, -csc.data, term))
+        self.indptr = csc.indptr.astype(np.int64)
+        self.docs = csc.indices[order].astype(np.int32)
+        self.impacts = csc.data[order].astype(np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.docs.nbytes + self.impacts.nbytes
+
+    def _bounds(self, weights, pos, ends) -> np.ndarray:
+        """
+        Batas atas kontribusi sisa posting tiap term (0 jika sudah habis).
+        """
+        remaining = pos < ends
+        nxt = self.impacts[np.where(remaining, pos, 0)]
+        return np.where(remaining, weights * nxt, 0.0)
+
+    def _exact_scores(self, docs: np.ndarray, q_dense: np.ndarray) -> np.ndarray:
+        """
+        Skor exact dokumen `docs` lewat baris matrix dokumen (random access).
+        """
+        m = self.matrix
+        starts = m.indptr[docs]
+        lens = m.indptr[docs + 1] - starts
+        offsets = np.cumsum(lens) - lens
+        idx = np.arange(lens.sum()) + np.repeat(starts - offsets, lens)
+        return np.add.reduceat(m.data[idx] * q_dense[m.indices[idx]], offsets)
+
+    def top_k(self, q_vec, k: int):
+        """
+        Kandidat top-k exact untuk satu query (q_vec: 1 x n_term).
+        Mengembalikan (doc ids, skor, counters); setiap dokumen yang bisa
+        masuk top-k ada di dalamnya dengan skor exact. Jika pruning tidak
+        efektif (lihat MAX_SEEN_FRACTION) doc ids dan skor bernilai None dan
+        query perlu di-score penuh oleh pemanggil.
+        """
+        q = _Query(self, q_vec)
+        while True:
+            bounds = self._bounds(q.weights, q.pos, q.ends)
+            # MaxScore: term dengan batas atas terkecil yang totalnya < theta
+            # tidak perlu dibaca lagi (non-essential)
+            order = np.argsort(bounds, kind="stable")
+            essential = np.zeros(len(bounds), dtype=bool)
+            essential[order[np.cumsum(bounds[order]) + _SLACK >= q.theta]] = True
+            active = np.flatnonzero(essential & (q.pos < q.ends))
+            if not len(active):
+                break
+            q.read_blocks(active)
+            if q.n_seen > self.n_docs * MAX_SEEN_FRACTION:
+                return None, None, q.counters(self.n_docs, exhaustive=True)
+            q.refresh_theta(k)
+
+        candidates = q.candidates(self._bounds(q.weights, q.pos, q.ends))
+        n_scored = len(candidates)
+        if n_scored > k > 0:
+            approx = q.lower[candidates]
+            pending = ~q.done[candidates]
+            approx[pending] = self._exact_scores(candidates[pending], q.q_dense)
+            kth = np.partition(approx, n_scored - k)[n_scored - k]
+            candidates = candidates[approx + _SLACK >= kth]
+        # skor akhir dihitung sama persis seperti scoring penuh (identik)
+        if len(candidates):
+            scores = (self.matrix[candidates] @ q_vec.T).toarray().ravel()
+        else:
+            scores = np.empty(0)
+        return candidates, scores, q.counters(n_scored)
+
+
+class _Query:
+    """
+    State satu query selama pruning.
+    """
+
+    def __init__(self, index: ImpactIndex, q_vec):
+        self.index = index
+        self.terms = q_vec.indices
+        self.weights = q_vec.data.astype(np.float64)
+        self.starts = index.indptr[self.terms]
+        self.ends = index.indptr[self.terms + 1]
+        self.pos = self.starts.copy()
+        n_docs = index.n_docs
+        # batas bawah skor: jumlah kontribusi yang sudah dibaca, atau skor
+        # exact jika dokumen sudah dihitung (`done`)
+        self.lower = np.zeros(n_docs, dtype=np.float64)
+        self.done = np.zeros(n_docs, dtype=bool)
+        # bit i = posting term i untuk dokumen ini sudah dibaca
+        self.read = (
+            np.zeros(n_docs, dtype=np.uint64)
+            if len(self.terms) <= MAX_MASK_TERMS
+            else None
+        )
+        self.seen = []
+        self.n_seen = 0
+        self.theta = 0.0
+        self.rounds = 0
+        self.q_dense = np.zeros(q_vec.shape[1], dtype=np.float64)
+        self.q_dense[self.terms] = self.weights
+
+    def read_blocks(self, active: np.ndarray) -> None:
+        ix = self.index
+        self.rounds += 1
+        for i in active:
+            start = self.pos[i]
+            end = min(self.ends[i], start + max(BLOCK_SIZE, start - self.starts[i]))
+            block = ix.docs[start:end]
+            new = block[self.lower[block] == 0.0]
+            self.seen.append(new)
+            self.n_seen += len(new)
+            contrib = self.weights[i] * ix.impacts[start:end]
+            self.lower[block] += np.where(self.done[block], 0.0, contrib)
+            if self.read is not None:
+                self.read[block] |= np.uint64(1) << np.uint64(i)
+            self.pos[i] = end
+
+    def refresh_theta(self, k: int) -> None:
+        """
+        theta = skor ke-k dari batas bawah; k dokumen teratas diberi skor
+        exact dulu supaya theta naik lebih cepat.
+        """
+        if k <= 0 or self.n_seen < k:
+            return
+        seen = np.concatenate(self.seen)
+        self.seen = [seen]
+        cut = self.n_seen - k
+        top = seen[np.argpartition(self.lower[seen], cut)[cut:]]
+        todo = top[~self.done[top]]
+        if len(todo):
+            self.lower[todo] = self.index._exact_scores(todo, self.q_dense)
+            self.done[todo] = True
+        self.theta = float(np.partition(self.lower[seen], cut)[cut])
+
+    def candidates(self, bounds: np.ndarray) -> np.ndarray:
+        """
+        Dokumen terlihat yang batas atasnya masih bisa mencapai theta.
+        """
+        if not self.seen:
+            return np.empty(0, dtype=np.int32)
+        seen = np.concatenate(self.seen)
+        upper = self.lower[seen].copy()
+        pending = ~self.done[seen]
+        for i in np.flatnonzero(bounds > 0):
+            if self.read is None:
+                unread = pending
+            else:
+                bit = (self.read[seen] >> np.uint64(i)) & np.uint64(1)
+                unread = pending & (bit == 0)
+            upper[unread] += bounds[i]
+        return seen[upper + _SLACK >= self.theta]
+
+    def counters(self, n_scored: int, exhaustive: bool = False) -> dict:
+        return {
+            "terms": int(len(self.terms)),
+            "postings_total": int((self.ends - self.starts).sum()),
+            "postings_evaluated": int((self.pos - self.starts).sum()),
+            "docs_seen": self.n_seen,
+            "docs_scored": n_scored,
+            "terms_pruned": int((self.pos < self.ends).sum()),
+            "rounds": self.rounds,
+            "exhaustive": exhaustive,
+        }
+
+
+class PruningStats:
+    """
+    Akumulasi counter pruning (total + per query terakhir) untuk /stats.
+    """
+
+    def __init__(self, recent: int = RECENT_QUERIES):
+        self._lock = threading.Lock()
+        self._totals = {
+            "queries": 0,
+            "exhaustive": 0,
+            "postings_total": 0,
+            "postings_evaluated": 0,
+            "docs_scored": 0,
+        }
+        self._recent = deque(maxlen=recent)
+
+    def record(self, top_k: int, counters: dict) -> None:
+        with self._lock:
+            self._totals["queries"] += 1
+            self._totals["exhaustive"] += int(counters["exhaustive"])
+            for key in ("postings_total", "postings_evaluated", "docs_scored"):
+                self._totals[key] += counters[key]
+            self._recent.append({"top_k": top_k, **counters})
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._totals["postings_total"]
+            return {
+                **self._totals,
+                "evaluated_ratio": (
+                    self._totals["postings_evaluated"] / total if total else None
+                ),
+                "recent": list(self._recent),
+            }
@@ -0,0 +1,222 @@
+# backend/app/index_store.py
+"""
+Penyimpanan index retrieval per collection (multi-corpus).
+
+- Collection diload saat pertama kali dipakai (lazy); load konkuren untuk
+  collection yang sama digabung (single-flight).
+- Jika total memori collection yang terload melebihi budget, collection yang
+  paling lama tidak dipakai (LRU) di-evict.
+- Statistik per collection: waktu load, ukuran, QPS (window 60 detik),
+  jumlah query dan jumlah eviction.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict
+
+from .build_index import matrix_nbytes
+from .filters import filter_index_nbytes
+from .singleflight import SingleFlight
+
+QPS_WINDOW_S = 60.0
+
+
+def estimate_nbytes(
+    vectorizer, matrix, answers, questions, rerank=None, filters=None, impact=None
+) -> int:
+    """
+    Perkiraan kasar memori satu collection (matrix + teks + vocabulary,
+    ditambah matrix char n-gram, bitmap metadata dan posting impact-ordered
+    jika ada).
+    """
+    total = matrix_nbytes(matrix) + filter_index_nbytes(filters)
+    if rerank is not None:
+        total += matrix_nbytes(rerank["matrix"])
+    if impact is not None:
+        total += impact.nbytes
+    total += sum(sys.getsizeof(a) for a in answers)
+    total += sum(sys.getsizeof(q) for q in questions)
+    vocab = getattr(vectorizer, "vocabulary_", None) or {}
+    total += sys.getsizeof(vocab) + sum(sys.getsizeof(t) for t in vocab)
+    return total
+
+
+class LoadedIndex:
+    """
+    Artifact index satu collection yang sudah diload ke memori.
+    """
+
+    def __init__(
+        self,
+        name,
+        generation,
+        vectorizer,
+        matrix,
+        answers,
+        questions,
+        rerank,
+        filters,
+        impact,
+        load_time_s,
+    ):
+        self.name = name
+        self.generation = generation
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.answers = answers
+        self.questions = questions
+        self.rerank = rerank  # index char n-gram (dict) atau None
+        self.filters = filters  # index bitmap metadata (dict) atau None
+        self.impact = impact  # posting impact-ordered (ImpactIndex) atau None
+        self.load_time_s = load_time_s
+        self.nbytes = estimate_nbytes(
+            vectorizer, matrix, answers, questions, rerank, filters, impact
+        )
+
+
+class _CollectionStats:
+    def __init__(self):
+        self.loads = 0
+        self.evictions = 0
+        self.queries = 0
+        self.last_load_time_s = None
+        self.recent = deque()
+
+    def hit(self, now: float) -> None:
+        self.queries += 1
+        self.recent.append(now)
+        while self.recent and now - self.recent[0] > QPS_WINDOW_S:
+            self.recent.popleft()
+
+    def qps(self, now: float) -> float:
+        while self.recent and now - self.recent[0] > QPS_WINDOW_S:
+            self.recent.popleft()
+        return len(self.recent) / QPS_WINDOW_S
+
+
+class IndexStore:
+    def __init__(
+        self,
+        loader: Callable[[str], tuple],
+        memory_budget_bytes: int = 0,
+    ):
+        """
+        loader(name) -> (vectorizer, matrix, answers, questions, rerank, filters,
+        impact) dengan rerank / filters / impact = index char n-gram / bitmap
+        metadata / posting impact-ordered atau None.
+        memory_budget_bytes <= 0 berarti tanpa batas.
+        """
+        self._loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self._lock = threading.Lock()
+        self._loaded: "OrderedDict[str, LoadedIndex]" = OrderedDict()
+        self._stats: Dict[str, _CollectionStats] = {}
+        self._loads = SingleFlight()
+        self._generation = 0
+
+    def get(self, name: str, count: bool = True) -> LoadedIndex:
+        """
+        Ambil collection yang sudah terload (dan tandai baru dipakai), atau
+        load dari disk jika belum ada. `count=False` untuk pemakaian internal
+        (mis. warm-up) yang tidak dihitung sebagai query di statistik.
+        """
+        now = time.monotonic()
+        with self._lock:
+            index = self._loaded.get(name)
+            if index is not None:
+                self._loaded.move_to_end(name)
+                if count:
+                    self._stats[name].hit(now)
+                return index
+        index = self._loads.do(name, lambda: self._load_missing(name))
+        if count:
+            with self._lock:
+                self._stats[name].hit(now)
+        return index
+
+    def peek(self, name: str):
+        """
+        Collection yang sedang terload tanpa memicu load / mengubah urutan LRU.
+        """
+        with self._lock:
+            return self._loaded.get(name)
+
+    def reload(self, name: str) -> LoadedIndex:
+        """
+        Load ulang collection dari disk (index swap); request yang sedang
+        berjalan tetap memakai objek lama sampai selesai.
+        """
+        return self._load(name)
+
+    def _load_missing(self, name: str) -> LoadedIndex:
+        # cek ulang di dalam single-flight: thread yang miss tepat setelah load
+        # lain selesai tidak boleh load (dan menaikkan generasi) lagi
+        with self._lock:
+            index = self._loaded.get(name)
+        return index if index is not None else self._load(name)
+
+    def _load(self, name: str) -> LoadedIndex:
+        t0 = time.perf_counter()
+        artifacts = self._loader(name)
+        load_time = time.perf_counter() - t0
+        with self._lock:
+            self._generation += 1
+            index = LoadedIndex(name, self._generation, *artifacts, load_time)
+            self._loaded[name] = index
+            self._loaded.move_to_end(name)
+            stats = self._stats.setdefault(name, _CollectionStats())
+            stats.loads += 1
+            stats.last_load_time_s = load_time
+            self._evict_locked(keep=name)
+        return index
+
+    def _evict_locked(self, keep: str) -> None:
+        if self.memory_budget_bytes <= 0:
+            return
+        total = sum(ix.nbytes for ix in self._loaded.values())
+        for name in list(self._loaded):
+            if total <= self.memory_budget_bytes:
+                break
+            if name == keep:
+                continue
+            total -= self._loaded.pop(name).nbytes
+            self._stats[name].evictions += 1
+
+    def evict(self, name: str) -> bool:
+        with self._lock:
+            index = self._loaded.pop(name, None)
+            if index is not None:
+                self._stats[name].evictions += 1
+            return index is not None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            collections = {}
+            for name, st in self._stats.items():
+                index = self._loaded.get(name)
+                collections[name] = {
+                    "loaded": index is not None,
+                    "generation": index.generation if index else None,
+                    "nbytes": index.nbytes if index else 0,
+                    "docs": len(index.answers) if index else 0,
+                    "rerank": bool(index and index.rerank is not None),
+                    "pruning": bool(index and index.impact is not None),
+                    "filter_fields": (
+                        sorted(index.filters["fields"])
+                        if index and index.filters
+                        else []
+                    ),
+                    "load_time_s": st.last_load_time_s,
+                    "loads": st.loads,
+                    "evictions": st.evictions,
+                    "queries": st.queries,
+                    "qps": round(st.qps(now), 3),
+                }
+            return {
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "loaded_bytes": sum(ix.nbytes for ix in self._loaded.values()),
+                "collections": collections,
+            }
@@ -3,13 +3,18 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 
+from .admin import router as admin_router
 from .auth import router as auth_router
 from .create_tables import create_db_and_tables
+from .db import engine
+from .history_search import ensure_search_index
+from .profiling import ProfilingMiddleware
+from .retention import retention_job
 
 # rag router: kalau Anda punya app/rag.py yang mendefinisikan `router = APIRouter(prefix="/rag", ...)`
 # maka kita sertakan. Jika belum ada, baris include_router(rag_router) tidak boleh dieksekusi.
 try:
-    from .rag import router as rag_router
+    from .rag import router as rag_router, start_warmup
 
     HAS_RAG = True
 except Exception:
@@ -28,6 +33,9 @@ origins = [
     "http://127.0.0.1:5173",
 ]
 
+# profiling on-demand (header X-Profile) + sampling request lambat
+app.add_middleware(ProfilingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -38,13 +46,29 @@ app.add_middleware(
 
 # create DB & tables on startup (safe to run multiple times)
 create_db_and_tables()
+# index full-text history (FTS5 / tsvector) + trigger sinkronisasi
+ensure_search_index(engine)
 
 # include routers (router sendiri sudah punya prefix masing-masing)
 app.include_router(auth_router)
+app.include_router(admin_router)
 if HAS_RAG:
     app.include_router(rag_router)
 
 
+@app.on_event("startup")
+def warm_result_cache():
+    # warm-up cache retrieval dari query_history di background (non-blocking)
+    if HAS_RAG:
+        start_warmup()
+
+
+@app.on_event("startup")
+def start_retention():
+    # purge history kedaluwarsa secara berkala (jika HISTORY_RETENTION_DAYS > 0)
+    retention_job.start()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
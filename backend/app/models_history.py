@@ -1,7 +1,7 @@
 # app/models_history.py
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 
 from .db import Base
 
@@ -14,3 +14,15 @@ class QueryHistory(Base):
     query = Column(Text, nullable=False)
     results = Column(Text, nullable=False)  # JSON disimpan sebagai string
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # parameter retrieval (key result cache, dipakai warm-up);
+    # NULL untuk history yang dicatat sebelum kolom ini ada
+    top_k = Column(Integer, nullable=True)
+    collection = Column(String(64), nullable=True)
+    filters = Column(Text, nullable=True)  # filters.filter_key (JSON kanonik)
+
+    __table_args__ = (
+        # keyset scan history per user (export NDJSON: user_id = ? AND id > ?)
+        Index("ix_query_history_user_id_id", "user_id", "id"),
+        # purge retensi & warm-up memfilter berdasarkan created_at
+        Index("ix_query_history_created_at", "created_at"),
+    )
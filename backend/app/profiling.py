@@ -0,0 +1,230 @@
+# backend/app/profiling.py
+"""
+Profiling on-demand per request.
+
+- Caller yang memiliki PROFILE_TOKEN bisa memaksa profiling dengan header
+  `X-Profile: <token>`; response akan membawa header `X-Profile-Id`.
+- Selain itu sebagian kecil request (PROFILE_SAMPLE_RATE) diprofile otomatis
+  dan profil hanya disimpan jika latency >= PROFILE_SLOW_MS.
+- Profil (format pstats) disimpan di PROFILE_DIR sebagai ring berukuran
+  PROFILE_MAX_FILES, dan bisa dilist / diunduh lewat /admin/profiles
+  (lihat admin.py).
+
+Endpoint sync dijalankan FastAPI di threadpool, sedangkan cProfile hanya
+memprofile thread yang mengaktifkannya. Karena itu middleware hanya menandai
+request lewat ContextVar (ikut tercopy ke thread worker), lalu decorator
+`profiled` mengaktifkan cProfile di dalam thread endpoint. Pekerjaan yang
+diteruskan ke thread lain (scoring micro-batch di executor `rag-batch`)
+diprofile di thread tersebut lewat `profile_call` dan digabung ke profil
+request saat disimpan. Request yang tidak diprofile hanya membayar satu
+pemanggilan random() dan satu ContextVar.get().
+"""
+
+import cProfile
+import functools
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import (
+    PROFILE_DIR,
+    PROFILE_MAX_FILES,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_SLOW_MS,
+    PROFILE_TOKEN,
+)
+
+_PROFILE_ID_RE = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+
+class _ProfileRequest:
+    __slots__ = ("id", "forced", "profiler", "workers")
+
+    def __init__(self, forced: bool):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.forced = forced
+        self.profiler: Optional[cProfile.Profile] = None
+        # profil dari thread lain yang mengerjakan bagian request ini
+        self.workers: list[cProfile.Profile] = []
+
+
+_current: ContextVar[Optional[_ProfileRequest]] = ContextVar(
+    "automind_profile_request", default=None
+)
+
+
+def profiled(func):
+    """
+    Decorator untuk endpoint sync: jika request saat ini ditandai untuk
+    profiling, jalankan endpoint di bawah cProfile.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        req = _current.get()
+        if req is None or req.profiler is not None:
+            return func(*args, **kwargs)
+        profiler = cProfile.Profile()
+        req.profiler = profiler
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+
+    return wrapper
+
+
+def current_request() -> Optional[_ProfileRequest]:
+    """
+    Request profiling aktif di context ini (None jika tidak diprofile), untuk
+    diteruskan ke thread lain bersama pekerjaannya.
+    """
+    return _current.get()
+
+
+def profile_call(requests: list, func, *args):
+    """
+    Jalankan `func(*args)` di thread saat ini; jika ada request profiling di
+    `requests`, jalankan di bawah cProfile dan tambahkan profilnya ke setiap
+    request tersebut (satu batch dipakai bersama, jadi profilnya juga).
+    """
+    requests = [r for r in requests if r is not None]
+    if not requests:
+        return func(*args)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return func(*args)
+    finally:
+        profiler.disable()
+        for req in requests:
+            req.workers.append(profiler)
+
+
+def _header_authorized(scope) -> bool:
+    if not PROFILE_TOKEN:
+        return False
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile":
+            return hmac.compare_digest(value, PROFILE_TOKEN.encode())
+    return False
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware (tanpa BaseHTTPMiddleware supaya overhead minimal).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        forced = _header_authorized(scope)
+        if not forced and not (
+            PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+        ):
+            return await self.app(scope, receive, send)
+
+        req = _ProfileRequest(forced)
+        status = {"code": None}
+
+        async def send_tracking(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message.get("status")
+                if forced:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", req.id.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(req)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_tracking)
+        finally:
+            _current.reset(token)
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            if req.profiler is not None and (forced or elapsed_ms >= PROFILE_SLOW_MS):
+                meta = {
+                    "id": req.id,
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "status": status["code"],
+                    "elapsed_ms": round(elapsed_ms, 2),
+                    "trigger": "header" if forced else "slow-sample",
+                    "created_at": datetime.utcnow().isoformat(),
+                }
+                await run_in_threadpool(save_profile, req.profiler, meta, req.workers)
+
+
+# ---------------- ring penyimpanan profil ----------------
+def save_profile(
+    profiler: cProfile.Profile, meta: dict, workers: Optional[list] = None
+) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stats = pstats.Stats(profiler)
+    for worker in workers or ():
+        stats.add(worker)
+    stats.dump_stats(os.path.join(PROFILE_DIR, f"{meta['id']}.prof"))
+    with open(os.path.join(PROFILE_DIR, f"{meta['id']}.json"), "w") as f:
+        json.dump(meta, f)
+    _trim_ring()
+
+
+def _list_ids() -> list[str]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    ids = [f[:-5] for f in os.listdir(PROFILE_DIR) if f.endswith(".prof")]
+    return sorted(i for i in ids if _PROFILE_ID_RE.match(i))
+
+
+def _trim_ring() -> None:
+    ids = _list_ids()
+    for old in ids[: max(0, len(ids) - PROFILE_MAX_FILES)]:
+        for ext in (".prof", ".json"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, old + ext))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> list[dict]:
+    items = []
+    for pid in reversed(_list_ids()):
+        try:
+            with open(os.path.join(PROFILE_DIR, f"{pid}.json")) as f:
+                items.append(json.load(f))
+        except Exception:
+            items.append({"id": pid})
+    return items
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """
+    Path file .prof untuk id yang valid dan ada; None jika tidak ditemukan.
+    """
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+    if not _PROFILE_ID_RE.match(profile_id) or not os.path.exists(path):
+        return None
+    return path
+
+
+def profile_text(path: str, limit: int = 50) -> str:
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
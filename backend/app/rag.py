@@ -1,70 +1,468 @@
 # app/rag.py
 import json
 import os
-from typing import List, Optional
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 
 import joblib
 import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-from sklearn.metrics.pairwise import cosine_similarity
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sklearn.preprocessing import normalize
 from sqlalchemy.orm import Session
 
-from .auth import get_current_user
-from .db import get_db
+from .auth import get_current_admin, get_current_user
+from .batching import MicroBatcher
+from .build_index import (
+    ANSWERS_FILENAME,
+    COLLECTION_NAME_RE,
+    FILTERS_FILENAME,
+    MATRIX_FILENAME,
+    QUESTIONS_FILENAME,
+    RERANK_FILENAME,
+    SUGGEST_FILENAME,
+    VECTORIZER_FILENAME,
+    normalize_question,
+    unpack_matrix,
+)
+from .config import (
+    BATCH_ENABLED,
+    BATCH_MAX_SIZE,
+    BATCH_MAX_WAIT_MS,
+    BATCH_WORKERS,
+    COLLECTIONS_DIR,
+    INDEX_MEMORY_BUDGET_MB,
+    PRUNING_ENABLED,
+    PRUNING_MIN_DOCS,
+    RERANK_BUDGET_MS,
+    RERANK_CANDIDATES,
+    RERANK_ENABLED,
+    RERANK_WEIGHT,
+    RESULT_CACHE_SIZE,
+    SUGGEST_POPULARITY_DAYS,
+    WARMUP_ENABLED,
+)
+from .db import SessionLocal, get_db
+from .filters import FilterError, filter_key, select
+from .history_search import search_history
+from .impact import ImpactIndex, PruningStats
+from .index_store import IndexStore, LoadedIndex
 from .models_auth import User
 from .models_history import QueryHistory
+from .profiling import profiled
+from .rerank import CharReranker
+from .result_cache import ResultCache
+from .singleflight import SingleFlight
+from .suggest import apply_popularity, suggest
+from .warmup import CacheWarmer, top_queries
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODELS_DIR = os.path.join(ROOT, "models")
 
-ANSWERS_FILE = os.path.join(MODELS_DIR, "ANSWERS_FILE")
-VECTORIZER_FILE = os.path.join(MODELS_DIR, "VECTORIZER_FILE")
-MATRIX_FILE = os.path.join(MODELS_DIR, "MATRIX_FILE")
-QUESTIONS_FILE = os.path.join(MODELS_DIR, "QUESTIONS_FILE")
-
-_vectorizer = None
-_matrix = None
-_answers = None
-_questions = None
-_load_error = None
-
-
-def ensure_models_loaded():
-    global _vectorizer, _matrix, _answers, _questions, _load_error
-    if _load_error:
-        raise RuntimeError("Model loading failed: " + _load_error)
-    if _vectorizer is None:
-        try:
-            _vectorizer = joblib.load(VECTORIZER_FILE)
-            _matrix = joblib.load(MATRIX_FILE)
-            _answers = joblib.load(ANSWERS_FILE)
-            _questions = joblib.load(QUESTIONS_FILE)
-        except Exception as e:
-            _load_error = str(e)
-            raise
-
-
-def retrieve(query: str, top_k: int = 3):
-    ensure_models_loaded()
-    q_vec = _vectorizer.transform([query])
-    sims = cosine_similarity(q_vec, _matrix).flatten()
-    idxs = np.argsort(-sims)[:top_k]
-
-    results = []
-    for i in idxs:
-        results.append(
-            {"id": int(i), "score": float(sims[i]), "text": str(_answers[i])}
+# nama file sama dengan yang ditulis build_index (folder output default)
+ANSWERS_FILE = os.path.join(MODELS_DIR, ANSWERS_FILENAME)
+VECTORIZER_FILE = os.path.join(MODELS_DIR, VECTORIZER_FILENAME)
+MATRIX_FILE = os.path.join(MODELS_DIR, MATRIX_FILENAME)
+QUESTIONS_FILE = os.path.join(MODELS_DIR, QUESTIONS_FILENAME)
+SUGGEST_FILE = os.path.join(MODELS_DIR, SUGGEST_FILENAME)
+RERANK_FILE = os.path.join(MODELS_DIR, RERANK_FILENAME)
+FILTERS_FILE = os.path.join(MODELS_DIR, FILTERS_FILENAME)
+
+# index typeahead per collection (dibuang saat collection di-reload)
+_suggest_indexes: Dict[str, dict] = {}
+
+DEFAULT_COLLECTION = "default"
+# batas top_k per request retrieval
+MAX_TOP_K = 100
+
+# request retrieval identik yang sedang berjalan digabung menjadi satu komputasi
+_singleflight = SingleFlight()
+_result_cache = ResultCache(RESULT_CACHE_SIZE)
+_reranker = CharReranker(RERANK_CANDIDATES, RERANK_BUDGET_MS, RERANK_WEIGHT)
+_pruning = PruningStats()
+
+
+def _collection_files(name: str):
+    """
+    Path artifact (vectorizer, matrix, answers, questions) sebuah collection.
+    Collection "default" memakai file lama di MODELS_DIR; collection lain
+    adalah folder hasil `build_index --collection <nama>` di COLLECTIONS_DIR.
+    """
+    if name == DEFAULT_COLLECTION:
+        return VECTORIZER_FILE, MATRIX_FILE, ANSWERS_FILE, QUESTIONS_FILE
+    base = os.path.join(COLLECTIONS_DIR, name)
+    return tuple(
+        os.path.join(base, f)
+        for f in (
+            VECTORIZER_FILENAME,
+            MATRIX_FILENAME,
+            ANSWERS_FILENAME,
+            QUESTIONS_FILENAME,
+        )
+    )
+
+
+def collection_exists(name: str) -> bool:
+    if name == DEFAULT_COLLECTION:
+        return True
+    if not COLLECTION_NAME_RE.match(name):
+        return False
+    return os.path.isdir(os.path.join(COLLECTIONS_DIR, name))
+
+
+def _prepare_matrix(matrix):
+    """
+    Unpack matrix compact (float16) dan pastikan tiap baris ber-norm L2 = 1,
+    sehingga cosine similarity cukup dihitung sebagai sparse dot product
+    (tanpa menormalisasi ulang seluruh matrix di setiap query).
+    """
+    return normalize(unpack_matrix(matrix), norm="l2", copy=False).tocsr()
+
+
+def _load_optional(name: str, default_file: str, filename: str):
+    """
+    Artifact opsional sebuah collection; None jika file tidak ada.
+    """
+    if name == DEFAULT_COLLECTION:
+        path = default_file
+    else:
+        path = os.path.join(COLLECTIONS_DIR, name, filename)
+    return joblib.load(path) if os.path.exists(path) else None
+
+
+def _load_collection(name: str):
+    vectorizer_file, matrix_file, answers_file, questions_file = _collection_files(name)
+    matrix = _prepare_matrix(joblib.load(matrix_file))
+    return (
+        joblib.load(vectorizer_file),
+        matrix,
+        joblib.load(answers_file),
+        joblib.load(questions_file),
+        # index rerank char n-gram (build_index --rerank)
+        (
+            _load_optional(name, RERANK_FILE, RERANK_FILENAME)
+            if RERANK_ENABLED
+            else None
+        ),
+        # index bitmap metadata untuk filter
+        _load_optional(name, FILTERS_FILE, FILTERS_FILENAME),
+        # posting impact-ordered untuk top-k dengan pruning (impact.py)
+        (
+            ImpactIndex(matrix)
+            if PRUNING_ENABLED and matrix.shape[0] >= PRUNING_MIN_DOCS
+            else None
+        ),
+    )
+
+
+# semua collection yang terload; LRU eviction jika melewati memory budget
+_store = IndexStore(_load_collection, INDEX_MEMORY_BUDGET_MB * 1024 * 1024)
+
+
+def get_index(collection: Optional[str] = None) -> LoadedIndex:
+    return _store.get(collection or DEFAULT_COLLECTION)
+
+
+def ensure_models_loaded() -> LoadedIndex:
+    return get_index(DEFAULT_COLLECTION)
+
+
+def reload_models(collection: Optional[str] = None) -> int:
+    """
+    Index swap: load ulang artifact collection dari disk tanpa menghentikan
+    service, lalu jalankan warm-up (collection default). Entri cache generasi
+    lama tidak akan terpakai lagi dan tersingkir oleh LRU.
+    Mengembalikan nomor generasi baru.
+    """
+    name = collection or DEFAULT_COLLECTION
+    index = _store.reload(name)
+    _suggest_indexes.pop(name, None)
+    if name == DEFAULT_COLLECTION:
+        start_warmup()
+    return index.generation
+
+
+def _history_popularity() -> dict:
+    """
+    Jumlah query (ternormalisasi) di query_history selama
+    SUGGEST_POPULARITY_DAYS terakhir; kosong jika nonaktif atau DB gagal.
+    """
+    if SUGGEST_POPULARITY_DAYS <= 0:
+        return {}
+    since = datetime.utcnow() - timedelta(days=SUGGEST_POPULARITY_DAYS)
+    db = SessionLocal()
+    try:
+        counts, _ = top_queries(db, since, None)
+        return dict(counts)
+    except Exception:
+        return {}
+    finally:
+        db.close()
+
+
+def ensure_suggest_loaded(collection: Optional[str] = None):
+    """
+    Load index prefix untuk typeahead sebuah collection (terpisah dari model
+    TF-IDF, opsional). Skor ditambah popularitas query dari history; dihitung
+    ulang saat collection di-reload.
+    """
+    name = collection or DEFAULT_COLLECTION
+    index = _suggest_indexes.get(name)
+    if index is None:
+        if name == DEFAULT_COLLECTION:
+            path = SUGGEST_FILE
+        else:
+            path = os.path.join(COLLECTIONS_DIR, name, SUGGEST_FILENAME)
+        index = joblib.load(path)
+        popularity = _history_popularity()
+        if popularity:
+            index = apply_popularity(index, popularity)
+        _suggest_indexes[name] = index
+    return index
+
+
+def _top_k(rows: np.ndarray, vals: np.ndarray, n_docs: int, top_k: int):
+    """
+    Top-k (doc_id, score) dari skor sparse satu query. Jika dokumen bernilai
+    > 0 kurang dari top_k, sisanya diisi dokumen berskor 0 (id terkecil),
+    sama seperti ranking dense sebelumnya.
+    """
+    if top_k <= 0:
+        return []
+    if len(vals) > top_k:
+        # ambil semua yang skornya >= skor ke-k supaya seri di batas top-k
+        # diputus dengan id terkecil (deterministik)
+        kth = np.partition(vals, len(vals) - top_k)[len(vals) - top_k]
+        sel = vals >= kth
+        rows, vals = rows[sel], vals[sel]
+    order = np.lexsort((rows, -vals))[:top_k]
+    pairs = list(zip(rows[order].tolist(), vals[order].tolist()))
+    if len(pairs) < top_k:
+        taken = set(rows.tolist())
+        doc = 0
+        while len(pairs) < min(top_k, n_docs):
+            if doc not in taken:
+                pairs.append((doc, 0.0))
+            doc += 1
+    return pairs
+
+
+def _filtered_scores(matrix, q_vec, ids: np.ndarray):
+    """
+    Skor cosine hanya untuk dokumen `ids` (hasil filter metadata, terurut):
+    hanya baris matrix yang lolos filter yang dikalikan. Mengembalikan
+    (posisi di dalam ids, skor) untuk skor > 0.
+    """
+    sims = (matrix[ids] @ q_vec.T).tocsc()
+    return sims.indices, sims.data
+
+
+def _first_stage(index: LoadedIndex, q_mat, payloads: list, ks: list) -> list:
+    """
+    Skor sparse tahap pertama per query: list (rows, vals, n_rows).
+    - query dengan filter metadata (`ids`): hanya dokumen yang lolos filter;
+    - collection dengan index impact: kandidat top-k exact lewat pruning
+      MaxScore (impact.py), counter posting dicatat per query;
+    - sisanya (termasuk query yang pruning-nya tidak efektif) di-score penuh
+      dalam satu sparse matrix-matrix product.
+    """
+    n_docs = index.matrix.shape[0]
+    out = [None] * len(payloads)
+    full = []
+    for i, (_, _, ids, _) in enumerate(payloads):
+        if ids is not None:
+            rows, vals = _filtered_scores(index.matrix, q_mat[i], ids)
+            out[i] = (rows, vals, len(ids))
+            continue
+        if index.impact is not None:
+            rows, vals, counters = index.impact.top_k(q_mat[i], ks[i])
+            _pruning.record(ks[i], counters)
+            if rows is not None:
+                out[i] = (rows, vals, n_docs)
+                continue
+        full.append(i)
+
+    if full:
+        # baris matrix & q_mat sudah ter-normalisasi L2 -> dot product = cosine
+        sims = (index.matrix @ q_mat[full].T).tocsc()
+        for col, i in enumerate(full):
+            start, end = sims.indptr[col], sims.indptr[col + 1]
+            out[i] = (sims.indices[start:end], sims.data[start:end], n_docs)
+    return out
+
+
+def _score_batch(index: LoadedIndex, payloads: list):
+    """
+    Scoring beberapa query (list (query, top_k, ids, started)) sekaligus:
+    satu transform untuk semua query, lalu skor tahap pertama (lihat
+    `_first_stage`). Query dengan filter metadata (`ids` = dokumen yang
+    lolos) hanya menscore dokumen tersebut.
+    Jika collection punya index rerank, kandidat tahap pertama direrank
+    dengan char n-gram dalam budget latency per request (lihat rerank.py),
+    dihitung dari `started` request tersebut (waktu tunggu antrian batch
+    ikut terhitung).
+    """
+    queries = [p[0] for p in payloads]
+    q_mat = index.vectorizer.transform(queries)
+    answers = index.answers
+
+    rerank = index.rerank
+    if rerank is not None:
+        q_char = rerank["vectorizer"].transform(queries)
+    ks = [
+        top_k if rerank is None else _reranker.candidate_count(top_k)
+        for _, top_k, _, _ in payloads
+    ]
+
+    out = []
+    stage = _first_stage(index, q_mat, payloads, ks)
+    for i, (_, top_k, ids, started) in enumerate(payloads):
+        rows, vals, n_rows = stage[i]
+        pairs = _top_k(rows, vals, n_rows, ks[i])
+        if ids is not None:
+            pairs = [(int(ids[r]), s) for r, s in pairs]
+        if rerank is not None:
+            deadline = started + _reranker.budget_s if _reranker.budget_s > 0 else None
+            pairs = _reranker.rerank(rerank, q_char[i], pairs, top_k, deadline, ids)
+        out.append(
+            [
+                {"id": int(d), "score": float(s), "text": str(answers[d])}
+                for d, s in pairs
+            ]
         )
+    return out
+
+
+def _score(index: LoadedIndex, query: str, top_k: int, ids=None):
+    return _score_batch(index, [(query, top_k, ids, time.perf_counter())])[0]
+
+
+# request konkuren (cache miss) digabung menjadi satu batch scoring
+_batcher = (
+    MicroBatcher(
+        _score_batch,
+        max_batch=BATCH_MAX_SIZE,
+        max_wait_s=BATCH_MAX_WAIT_MS / 1000.0,
+        workers=BATCH_WORKERS,
+    )
+    if BATCH_ENABLED
+    else None
+)
+
+
+def retrieve(
+    query: str,
+    top_k: int = 3,
+    collection: Optional[str] = None,
+    filters: Optional[dict] = None,
+):
+    index = get_index(collection)
+    ids = select(index.filters, filters) if filters else None
+    return _score(index, query, top_k, ids)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalisasi query untuk key coalescing/cache: lowercase + rapikan whitespace.
+    TfidfVectorizer sudah lowercase & tokenisasi per kata, jadi hasil retrieval
+    untuk query yang ternormalisasi sama persis dengan query aslinya.
+    """
+    return normalize_question(query)
+
+
+def retrieve_shared(
+    query: str,
+    top_k: int = 3,
+    collection: Optional[str] = None,
+    filters: Optional[dict] = None,
+):
+    """
+    Seperti `retrieve`, tetapi hasil di-cache per generasi index, dan request
+    konkuren dengan collection, query ternormalisasi, top_k, filter dan
+    generasi yang sama hanya dihitung sekali.
+    Raise FilterError jika ekspresi filter tidak valid.
+    """
+    index = get_index(collection)
+    norm = normalize_query(query)
+    key = (index.name, norm, top_k, index.generation, filter_key(filters))
+    results = _result_cache.get(key)
+    if results is None:
+        results = _singleflight.do(key, lambda: _compute_and_cache(index, key, filters))
+    # salinan per pemanggil supaya hasil bersama tidak termutasi
+    return [dict(r) for r in results]
+
+
+def _compute_and_cache(index: LoadedIndex, key, filters: Optional[dict] = None):
+    _, norm, top_k, _, _ = key
+    # filter metadata -> daftar dokumen kandidat sebelum scoring
+    ids = select(index.filters, filters) if filters else None
+    if _batcher is not None:
+        results = _batcher.submit(index, (norm, top_k, ids, time.perf_counter()))
+    else:
+        results = _score(index, norm, top_k, ids)
+    _result_cache.put(key, results)
     return results
 
 
+def _warm_index(name: str = DEFAULT_COLLECTION) -> Optional[LoadedIndex]:
+    # warm-up tidak dihitung sebagai query di statistik collection, dan tidak
+    # me-load collection selain default hanya untuk warm-up
+    if name == DEFAULT_COLLECTION:
+        return _store.get(name, count=False)
+    return _store.peek(name)
+
+
+def _warm_compute(key: tuple):
+    """
+    Hitung hasil satu key warm-up (query, top_k, collection, filters);
+    None jika collection-nya tidak sedang terload.
+    """
+    query, top_k, collection, filters = key
+    # index (dan generasinya) diambil sebelum menghitung: jika index di-reload
+    # di tengah jalan, hasil tetap disimpan di bawah generasi yang dipakai
+    index = _warm_index(collection or DEFAULT_COLLECTION)
+    if index is None:
+        return None
+    ids = select(index.filters, json.loads(filters)) if filters else None
+    return index, _score(index, query, top_k, ids)
+
+
+def _warm_store(key: tuple, computed) -> None:
+    index, results = computed
+    query, top_k, _, filters = key
+    # filters sudah berupa filter_key (JSON kanonik) seperti key retrieve_shared
+    _result_cache.put((index.name, query, top_k, index.generation, filters), results)
+
+
+_warmer = CacheWarmer(
+    compute=_warm_compute,
+    store=_warm_store,
+    is_busy=lambda: _singleflight.in_flight() > 0,
+    prepare=_warm_index,
+)
+
+
+def start_warmup() -> None:
+    """
+    Jalankan warm-up result cache dari query_history di background.
+    """
+    if WARMUP_ENABLED:
+        index = _store.peek(DEFAULT_COLLECTION)
+        _warmer.start(index.generation if index else 0)
+
+
 router = APIRouter(prefix="/rag/rag", tags=["rag"])
 
 
 class RagQueryRequest(BaseModel):
     query: str
-    top_k: int = 3
+    top_k: int = Field(3, ge=1, le=MAX_TOP_K)
+    collection: Optional[str] = None  # None = collection default
+    # filter metadata, mis. {"category": "sensor", "language": ["id", "en"]};
+    # lihat filters.py untuk operator $and / $or / $not
+    filters: Optional[Dict[str, Any]] = None
 
 
 class RagDoc(BaseModel):
@@ -78,6 +476,16 @@ class RagQueryResponse(BaseModel):
     results: List[RagDoc]
 
 
+class SuggestItem(BaseModel):
+    text: str
+    score: float
+
+
+class SuggestResponse(BaseModel):
+    prefix: str
+    suggestions: List[SuggestItem]
+
+
 class HistoryItem(BaseModel):
     id: int
     user_id: Optional[int]
@@ -91,7 +499,18 @@ class HistoryList(BaseModel):
     total: int
 
 
+class HistorySearchItem(HistoryItem):
+    score: float
+
+
+class HistorySearchResponse(BaseModel):
+    q: str
+    items: List[HistorySearchItem]
+    total: int
+
+
 @router.post("/query", response_model=RagQueryResponse)
+@profiled
 def rag_query(
     req: RagQueryRequest,
     db: Session = Depends(get_db),
@@ -101,8 +520,15 @@ def rag_query(
     Retrieval API + menyimpan history ke database.
     Hanya bisa diakses jika user login (Bearer token).
     """
+    if req.collection and not collection_exists(req.collection):
+        raise HTTPException(
+            status_code=404, detail=f"Collection tidak ditemukan: {req.collection}"
+        )
+
     try:
-        results = retrieve(req.query, req.top_k)
+        results = retrieve_shared(req.query, req.top_k, req.collection, req.filters)
+    except FilterError as e:
+        raise HTTPException(status_code=400, detail=f"Filter tidak valid: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Retrieval failed: {e}")
 
@@ -112,6 +538,9 @@ def rag_query(
             user_id=current_user.id,
             query=req.query,
             results=json.dumps(results, ensure_ascii=False),
+            top_k=req.top_k,
+            collection=req.collection,
+            filters=filter_key(req.filters),
         )
         db.add(history)
         db.commit()
@@ -121,7 +550,59 @@ def rag_query(
     return {"query": req.query, "results": results}
 
 
+@router.get("/suggest", response_model=SuggestResponse)
+@profiled
+def rag_suggest(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    collection: Optional[str] = Query(None, max_length=64),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Typeahead: completion pertanyaan untuk prefix `q`, diurutkan skor statis.
+    Tidak menjalankan retrieval dan tidak menyimpan history.
+    """
+    if collection and not collection_exists(collection):
+        raise HTTPException(
+            status_code=404, detail=f"Collection tidak ditemukan: {collection}"
+        )
+    try:
+        index = ensure_suggest_loaded(collection)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Suggest index unavailable: {e}")
+    return {"prefix": q, "suggestions": suggest(index, q, limit)}
+
+
+def _history_item(row_id, user_id, query, results, created_at) -> dict:
+    try:
+        parsed_results = json.loads(results)
+    except Exception:
+        parsed_results = []
+    # convert parsed_results items into RagDoc-like dicts
+    docs = []
+    for it in parsed_results:
+        docs.append(
+            {
+                "id": int(it.get("id", -1)),
+                "score": float(it.get("score", 0.0)),
+                "text": str(it.get("text", "")),
+            }
+        )
+    return {
+        "id": row_id,
+        "user_id": user_id,
+        "query": query,
+        "results": docs,
+        "created_at": (
+            created_at.isoformat()
+            if hasattr(created_at, "isoformat")
+            else str(created_at)
+        ),
+    }
+
+
 @router.get("/history", response_model=HistoryList)
+@profiled
 def get_history(
     limit: int = Query(20, ge=1, le=200),
     offset: int = Query(0, ge=0),
@@ -142,34 +623,164 @@ def get_history(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB error: {e}")
 
+    items = [
+        _history_item(r.id, r.user_id, r.query, r.results, r.created_at) for r in rows
+    ]
+    return {"items": items, "total": total}
+
+
+@router.get("/history/search", response_model=HistorySearchResponse)
+@profiled
+def search_history_endpoint(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Full-text search atas history query milik user (index FTS5 / tsvector),
+    diurutkan relevansi. Semua kata di `q` harus cocok; kata terakhir
+    dicocokkan sebagai prefix.
+    - Query params: q, limit, offset
+    """
+    try:
+        rows, total = search_history(db.connection(), current_user.id, q, limit, offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search error: {e}")
+
     items = []
     for r in rows:
-        try:
-            parsed_results = json.loads(r.results)
-        except Exception:
-            parsed_results = []
-        # convert parsed_results items into RagDoc-like dicts
-        docs = []
-        for it in parsed_results:
-            docs.append(
-                {
-                    "id": int(it.get("id", -1)),
-                    "score": float(it.get("score", 0.0)),
-                    "text": str(it.get("text", "")),
-                }
-            )
-        items.append(
-            {
-                "id": r.id,
-                "user_id": r.user_id,
-                "query": r.query,
-                "results": docs,
-                "created_at": (
-                    r.created_at.isoformat()
-                    if hasattr(r.created_at, "isoformat")
-                    else str(r.created_at)
-                ),
-            }
+        item = _history_item(
+            r["id"], r["user_id"], r["query"], r["results"], r["created_at"]
         )
+        item["score"] = float(r["score"] or 0.0)
+        items.append(item)
+    return {"q": q, "items": items, "total": total}
 
-    return {"items": items, "total": total}
+
+EXPORT_FETCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _iter_history_ndjson(
+    user_id: int,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    cursor: Optional[int],
+):
+    """
+    Generator NDJSON (bytes) history satu user, urut id naik.
+    Memakai session sendiri dan server-side cursor (yield_per) sehingga memori
+    tidak bergantung pada jumlah history. Kolom results sudah berisi JSON
+    (ditulis oleh rag_query via json.dumps), jadi disisipkan apa adanya
+    tanpa parse ulang.
+    """
+    db = SessionLocal()
+    try:
+        q = db.query(
+            QueryHistory.id,
+            QueryHistory.user_id,
+            QueryHistory.query,
+            QueryHistory.results,
+            QueryHistory.created_at,
+        ).filter(QueryHistory.user_id == user_id)
+        if cursor is not None:
+            q = q.filter(QueryHistory.id > cursor)
+        if since is not None:
+            q = q.filter(QueryHistory.created_at >= since)
+        if until is not None:
+            q = q.filter(QueryHistory.created_at < until)
+        q = q.order_by(QueryHistory.id.asc()).yield_per(EXPORT_FETCH_SIZE)
+
+        buf = []
+        size = 0
+        for row_id, row_user_id, query, results, created_at in q:
+            results = results if results and results.startswith("[") else "[]"
+            line = (
+                '{"id": %d, "user_id": %s, "query": %s, "results": %s, '
+                '"created_at": %s}\n'
+                % (
+                    row_id,
+                    json.dumps(row_user_id),
+                    json.dumps(query, ensure_ascii=False),
+                    results,
+                    json.dumps(
+                        created_at.isoformat()
+                        if hasattr(created_at, "isoformat")
+                        else str(created_at)
+                    ),
+                )
+            ).encode("utf-8")
+            buf.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_BYTES:
+                yield b"".join(buf)
+                buf, size = [], 0
+        if buf:
+            yield b"".join(buf)
+    finally:
+        db.close()
+
+
+@router.get("/history/export")
+def export_history(
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    cursor: Optional[int] = Query(None, ge=0),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Export seluruh history user dalam format NDJSON (satu item per baris,
+    urut id naik), di-stream dengan memori konstan.
+    - Query params: since / until (ISO datetime, opsional), cursor (lanjutkan
+      export setelah id history tersebut, mis. id baris terakhir yang diterima)
+    """
+    return StreamingResponse(
+        _iter_history_ndjson(current_user.id, since, until, cursor),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="history_{current_user.id}.ndjson"'
+            )
+        },
+    )
+
+
+@router.get("/stats")
+def rag_stats(current_user: User = Depends(get_current_user)):
+    """
+    Statistik runtime retrieval (collection, coalescing, cache, warm-up,
+    counter posting per query dari pruning top-k).
+    """
+    default_index = _store.peek(DEFAULT_COLLECTION)
+    return {
+        "generation": default_index.generation if default_index else 0,
+        "index": _store.stats(),
+        "singleflight": _singleflight.stats(),
+        "batching": _batcher.stats() if _batcher is not None else None,
+        "rerank": _reranker.stats(),
+        "pruning": _pruning.stats(),
+        "result_cache": _result_cache.stats(),
+        "warmup": _warmer.status(),
+    }
+
+
+@router.post("/reload")
+def rag_reload(
+    collection: Optional[str] = Query(None),
+    current_admin: User = Depends(get_current_admin),
+):
+    """
+    Load ulang index sebuah collection dari disk (setelah build_index) lalu
+    warm-up cache. Hanya untuk admin.
+    """
+    if collection and not collection_exists(collection):
+        raise HTTPException(
+            status_code=404, detail=f"Collection tidak ditemukan: {collection}"
+        )
+    try:
+        generation = reload_models(collection)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed: {e}")
+    return {"generation": generation, "warmup": _warmer.status()}
@@ -0,0 +1,175 @@
+# backend/app/rerank.py
+"""
+Tahap kedua retrieval: rerank kandidat dengan TF-IDF char n-gram.
+
+Tahap pertama (TF-IDF per kata di rag.py) menghasilkan beberapa ratus
+kandidat; hanya kandidat tersebut yang diberi skor char n-gram memakai
+vektor per dokumen yang sudah dihitung saat build (lihat
+`build_index.build_char_index`). Char n-gram lebih toleran terhadap typo dan
+variasi imbuhan bahasa Indonesia (mem-/di-/-kan/-nya) dibanding token kata.
+
+Setiap request punya budget latency: biaya rerank per kandidat dicatat
+(EWMA), dan jika sisa budget tidak cukup jumlah kandidat dikurangi; jika
+budget sudah habis, urutan tahap pertama dipakai apa adanya.
+
+Jika tahap pertama menemukan kurang dari top_k dokumen yang cocok (mis. query
+typo "sensr" tidak punya token yang dikenal), kandidat tambahan diambil dari
+matrix char n-gram seluruh collection (atau dokumen hasil filter).
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# bobot EWMA untuk estimasi biaya rerank per kandidat
+_COST_ALPHA = 0.2
+# run dengan kandidat lebih sedikit didominasi overhead tetap (slicing,
+# sort) sehingga tidak dipakai untuk estimasi biaya per kandidat
+_COST_MIN_CANDIDATES = 32
+
+
+class CharReranker:
+    def __init__(
+        self,
+        max_candidates: int = 200,
+        budget_ms: float = 15.0,
+        weight: float = 0.5,
+    ):
+        """
+        max_candidates: jumlah kandidat maksimal dari tahap pertama.
+        budget_ms: budget latency per request (tahap pertama + rerank);
+                   <= 0 berarti tanpa batas.
+        weight: bobot skor char n-gram pada skor akhir
+                (skor = (1 - weight) * skor_kata + weight * skor_char).
+        """
+        self.max_candidates = max(1, max_candidates)
+        self.budget_s = max(0.0, budget_ms) / 1000.0
+        self.weight = min(1.0, max(0.0, weight))
+        self._cost_per_candidate = 0.0
+        self._lock = threading.Lock()
+        self._counts = {"reranked": 0, "shrunk": 0, "skipped": 0, "char_fallback": 0}
+        self._candidates_total = 0
+
+    def candidate_count(self, top_k: int) -> int:
+        return max(top_k, self.max_candidates)
+
+    def _affordable(self, remaining_s: float, wanted: int, top_k: int) -> int:
+        """
+        Jumlah kandidat yang masih muat dalam sisa budget (minimal top_k).
+        """
+        if self.budget_s <= 0 or self._cost_per_candidate <= 0:
+            return wanted
+        fit = int(remaining_s / self._cost_per_candidate)
+        return min(wanted, max(top_k, fit))
+
+    def _observe(self, n: int, elapsed_s: float) -> None:
+        if n < _COST_MIN_CANDIDATES and self._cost_per_candidate > 0:
+            return
+        cost = elapsed_s / n
+        with self._lock:
+            if self._cost_per_candidate <= 0:
+                self._cost_per_candidate = cost
+            else:
+                self._cost_per_candidate += _COST_ALPHA * (
+                    cost - self._cost_per_candidate
+                )
+
+    def _count(self, key: str, n: int = 0) -> None:
+        with self._lock:
+            self._counts[key] += 1
+            self._candidates_total += n
+
+    @staticmethod
+    def _char_candidates(char_index: dict, q_vec, exclude: set, k: int, allowed):
+        """
+        k dokumen dengan skor char n-gram > 0 tertinggi di luar `exclude`,
+        dibatasi ke `allowed` (doc id hasil filter) jika tidak None.
+        Dikembalikan sebagai [(doc_id, 0.0)] (skor kata 0).
+        """
+        matrix = char_index["matrix"]
+        if allowed is not None:
+            matrix = matrix[allowed]
+        scores = (matrix @ q_vec.T).tocoo()
+        docs = scores.row if allowed is None else np.asarray(allowed)[scores.row]
+        keep = scores.data > 0
+        if exclude:
+            keep &= ~np.isin(docs, np.fromiter(exclude, dtype=np.int64))
+        docs, vals = docs[keep], scores.data[keep]
+        order = np.lexsort((docs, -vals))[:k]
+        return [(int(docs[i]), 0.0) for i in order]
+
+    def _fill_from_chars(self, char_index, q_vec, pairs, n_match, top_k, allowed):
+        """
+        Tambahkan kandidat char n-gram jika tahap pertama menemukan kurang
+        dari top_k dokumen yang cocok. Mengembalikan (pairs, n_match) baru.
+        """
+        matched = pairs[:n_match]
+        extra = self._char_candidates(
+            char_index, q_vec, {d for d, _ in matched}, top_k, allowed
+        )
+        if not extra:
+            return pairs, n_match
+        self._count("char_fallback")
+        taken = {d for d, _ in extra}
+        rest = [p for p in pairs[n_match:] if p[0] not in taken]
+        return matched + extra + rest, n_match + len(extra)
+
+    def rerank(
+        self,
+        char_index: dict,
+        q_vec,
+        pairs: list,
+        top_k: int,
+        deadline,
+        allowed=None,
+    ):
+        """
+        pairs: kandidat tahap pertama [(doc_id, skor)] terurut skor menurun.
+        q_vec: vektor char n-gram query (1 x n_features, ter-normalisasi L2).
+        deadline: time.perf_counter() batas akhir request (None = tanpa batas).
+        allowed: doc id yang lolos filter metadata (None = semua dokumen).
+        Mengembalikan top_k [(doc_id, skor)] setelah rerank.
+        """
+        # hanya dokumen yang cocok (tahap pertama atau char n-gram) yang
+        # direrank; dokumen pengisi berskor 0 tetap di belakang
+        n_match = sum(1 for _, s in pairs if s > 0)
+        if n_match < top_k and (deadline is None or time.perf_counter() < deadline):
+            pairs, n_match = self._fill_from_chars(
+                char_index, q_vec, pairs, n_match, top_k, allowed
+            )
+        if n_match == 0:
+            return pairs[:top_k]
+
+        n = n_match
+        if deadline is not None and self.budget_s > 0:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                self._count("skipped")
+                return pairs[:top_k]
+            n = self._affordable(remaining, n_match, top_k)
+        n = min(n, n_match)
+
+        started = time.perf_counter()
+        ids = np.fromiter((d for d, _ in pairs[:n]), dtype=np.int64, count=n)
+        word = np.fromiter((s for _, s in pairs[:n]), dtype=np.float64, count=n)
+        char = (char_index["matrix"][ids] @ q_vec.T).toarray().ravel()
+        final = (1.0 - self.weight) * word + self.weight * char
+        order = np.lexsort((ids, -final))
+        ranked = [(int(ids[i]), float(final[i])) for i in order]
+        self._observe(n, time.perf_counter() - started)
+        self._count("shrunk" if n < n_match else "reranked", n)
+
+        return (ranked + pairs[n:])[:top_k]
+
+    def stats(self) -> dict:
+        with self._lock:
+            runs = self._counts["reranked"] + self._counts["shrunk"]
+            return {
+                "max_candidates": self.max_candidates,
+                "budget_ms": self.budget_s * 1000.0,
+                "weight": self.weight,
+                "cost_per_candidate_us": round(self._cost_per_candidate * 1e6, 3),
+                "mean_candidates": (self._candidates_total / runs if runs else 0.0),
+                **self._counts,
+            }
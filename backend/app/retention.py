@@ -0,0 +1,522 @@
+# backend/app/retention.py
+"""
+Retensi query_history.
+
+- Purge: hapus baris yang lebih tua dari HISTORY_RETENTION_DAYS dalam batch
+  kecil (RETENTION_BATCH_SIZE), commit per batch dan jeda di antaranya,
+  sehingga lock tulis hanya dipegang sebentar (penting untuk SQLite).
+- Postgres: tabel bisa diubah menjadi partisi bulanan (RANGE created_at);
+  partisi yang seluruhnya kedaluwarsa langsung di-DROP (instan), sisa baris
+  di partisi yang masih aktif dihapus dengan purge batch biasa.
+- SQLite: setelah purge yang menghapus baris, halaman bebas dikembalikan
+  ke filesystem dengan PRAGMA incremental_vacuum (lihat reclaim_space).
+- Setiap run melaporkan jumlah baris terhapus, durasi dan ukuran tabel.
+
+CLI (dari folder backend):
+    python -m app.retention purge
+    python -m app.retention partition   # Postgres: konversi ke partisi bulanan
+    python -m app.retention report
+    python -m app.retention vacuum      # SQLite: aktifkan incremental vacuum
+"""
+
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .config import (
+    HISTORY_RETENTION_DAYS,
+    RETENTION_BATCH_SIZE,
+    RETENTION_INTERVAL_HOURS,
+    RETENTION_PAUSE_MS,
+)
+from .db import engine as default_engine
+from .history_search import ensure_search_index
+
+logger = logging.getLogger(__name__)
+
+TABLE = "query_history"
+# kolom yang disalin saat konversi; kolom yang belum ada di tabel lama
+# (migration belum dijalankan) dilewati dan bernilai NULL
+_COLUMNS = (
+    "id",
+    "user_id",
+    "query",
+    "results",
+    "created_at",
+    "top_k",
+    "collection",
+    "filters",
+)
+_PARTITION_RE = re.compile(r"^query_history_p(\d{4})(\d{2})$")
+
+
+# ---------------- ukuran tabel ----------------
+def table_size(engine: Engine) -> dict:
+    """
+    Jumlah baris dan ukuran (byte) tabel query_history.
+    SQLite: pakai dbstat jika tersedia, selain itu ukuran seluruh file DB.
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT COUNT(*) FROM {TABLE}")).scalar()
+        if engine.dialect.name == "postgresql":
+            size = conn.execute(
+                text(f"SELECT pg_total_relation_size('{TABLE}')")
+            ).scalar()
+            return {"rows": rows, "bytes": int(size or 0), "scope": "table"}
+        try:
+            size = conn.execute(
+                text("SELECT SUM(pgsize) FROM dbstat WHERE name = :t"), {"t": TABLE}
+            ).scalar()
+            return {"rows": rows, "bytes": int(size or 0), "scope": "table"}
+        except Exception:
+            page_count = conn.execute(text("PRAGMA page_count")).scalar()
+            page_size = conn.execute(text("PRAGMA page_size")).scalar()
+            return {"rows": rows, "bytes": page_count * page_size, "scope": "database"}
+
+
+# ---------------- purge batch ----------------
+def purge_expired(
+    engine: Engine,
+    cutoff: datetime,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    pause_s: float = RETENTION_PAUSE_MS / 1000.0,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """
+    Hapus baris dengan created_at < cutoff, per batch `batch_size` baris.
+    Setiap batch adalah transaksi sendiri. Mengembalikan jumlah baris terhapus.
+    """
+    stmt = text(
+        f"DELETE FROM {TABLE} WHERE id IN ("
+        f"SELECT id FROM {TABLE} WHERE created_at < :cutoff "
+        f"ORDER BY created_at LIMIT :n)"
+    )
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            deleted = conn.execute(stmt, {"cutoff": cutoff, "n": batch_size}).rowcount
+        total += deleted
+        if deleted < batch_size or (stop is not None and stop.is_set()):
+            return total
+        if pause_s > 0:
+            time.sleep(pause_s)
+
+
+# ---------------- reclaim ruang (SQLite) ----------------
+def reclaim_space(engine: Engine) -> Optional[dict]:
+    """
+    SQLite: DELETE hanya memindahkan halaman ke freelist, file DB tidak
+    mengecil. Dengan auto_vacuum=INCREMENTAL (default untuk DB baru, lihat
+    db.create_db_and_tables) halaman bebas dikembalikan ke filesystem lewat
+    PRAGMA incremental_vacuum. DB lama (auto_vacuum=NONE) perlu sekali
+    `python -m app.retention vacuum`; sampai saat itu hanya dilaporkan.
+    Postgres ditangani autovacuum -> None.
+    """
+    if engine.dialect.name != "sqlite":
+        return None
+    with engine.connect() as conn:
+        mode = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+        before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    if mode == 2 and before:
+        # execute() pysqlite hanya menjalankan satu step (= satu halaman);
+        # executescript menjalankan pragma sampai selesai
+        raw = engine.raw_connection()
+        try:
+            raw.executescript("PRAGMA incremental_vacuum")
+        finally:
+            raw.close()
+    with engine.connect() as conn:
+        after = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    if mode != 2 and before:
+        logger.warning(
+            "retention: %d halaman bebas tidak dikembalikan (auto_vacuum=NONE); "
+            "jalankan `python -m app.retention vacuum` sekali",
+            before,
+        )
+    return {
+        "incremental": mode == 2,
+        "pages_freed": before - after,
+        "free_pages": after,
+    }
+
+
+def vacuum(engine: Engine) -> dict:
+    """
+    SQLite: aktifkan auto_vacuum=INCREMENTAL lalu VACUUM penuh (menulis ulang
+    seluruh file dan memegang lock eksklusif; jalankan saat traffic rendah).
+    """
+    if engine.dialect.name != "sqlite":
+        raise RuntimeError("vacuum hanya untuk SQLite; Postgres memakai autovacuum")
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    return {"size": table_size(engine)}
+
+
+# ---------------- partisi bulanan (Postgres) ----------------
+def _month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def _next_month(dt: datetime) -> datetime:
+    return datetime(dt.year + (dt.month == 12), dt.month % 12 + 1, 1)
+
+
+def _partition_name(month: datetime) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned(engine: Engine) -> bool:
+    if engine.dialect.name != "postgresql":
+        return False
+    with engine.connect() as conn:
+        return bool(
+            conn.execute(
+                text(
+                    "SELECT 1 FROM pg_partitioned_table pt "
+                    "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :t"
+                ),
+                {"t": TABLE},
+            ).scalar()
+        )
+
+
+def _partition_bounds(month: datetime) -> str:
+    return f"FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+
+
+def _create_partition(conn, month: datetime) -> bool:
+    """
+    Buat partisi bulanan jika belum ada. Baris di partisi DEFAULT yang masuk
+    rentang bulan tersebut dipindahkan dulu (Postgres menolak membuat
+    partisi yang rentangnya masih berisi baris di DEFAULT).
+    """
+    name = _partition_name(month)
+    if conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar():
+        return False
+    default = f"{TABLE}_default"
+    lo, hi = month, _next_month(month)
+    has_default = conn.execute(text("SELECT to_regclass(:n)"), {"n": default}).scalar()
+    in_default = (
+        has_default
+        and conn.execute(
+            text(
+                f"SELECT 1 FROM {default} WHERE created_at >= :lo AND created_at < :hi "
+                "LIMIT 1"
+            ),
+            {"lo": lo, "hi": hi},
+        ).scalar()
+    )
+    if not in_default:
+        conn.execute(
+            text(
+                f"CREATE TABLE {name} PARTITION OF {TABLE} "
+                f"FOR VALUES {_partition_bounds(month)}"
+            )
+        )
+        return True
+
+    conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {default}"))
+    conn.execute(
+        text(
+            f"CREATE TABLE {name} PARTITION OF {TABLE} "
+            f"FOR VALUES {_partition_bounds(month)}"
+        )
+    )
+    conn.execute(
+        text(
+            f"INSERT INTO {name} SELECT * FROM {default} "
+            "WHERE created_at >= :lo AND created_at < :hi"
+        ),
+        {"lo": lo, "hi": hi},
+    )
+    conn.execute(
+        text(f"DELETE FROM {default} WHERE created_at >= :lo AND created_at < :hi"),
+        {"lo": lo, "hi": hi},
+    )
+    conn.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {default} DEFAULT"))
+    return True
+
+
+def ensure_partitions(engine: Engine, months_ahead: int = 3) -> list[str]:
+    """
+    Pastikan partisi bulan ini s/d `months_ahead` bulan ke depan tersedia.
+    """
+    created = []
+    month = _month_start(datetime.utcnow())
+    with engine.begin() as conn:
+        for _ in range(months_ahead + 1):
+            _create_partition(conn, month)
+            created.append(_partition_name(month))
+            month = _next_month(month)
+    return created
+
+
+def expired_partitions(names: Iterable[str], cutoff: datetime) -> list[str]:
+    """
+    Pilih partisi bulanan (query_history_pYYYYMM) yang batas atasnya
+    <= cutoff, terurut. Partisi DEFAULT dan nama lain diabaikan.
+    """
+    expired = []
+    for name in sorted(names):
+        m = _PARTITION_RE.match(name)
+        if not m:
+            continue
+        upper = _next_month(datetime(int(m.group(1)), int(m.group(2)), 1))
+        if upper <= cutoff:
+            expired.append(name)
+    return expired
+
+
+def _drop_partition_sql(name: str) -> list[str]:
+    return [
+        f"ALTER TABLE {TABLE} DETACH PARTITION {name}",
+        f"DROP TABLE {name}",
+    ]
+
+
+def drop_expired_partitions(engine: Engine, cutoff: datetime) -> dict:
+    """
+    DROP partisi bulanan yang batas atasnya <= cutoff (seluruh isinya
+    kedaluwarsa). Mengembalikan {nama_partisi: jumlah_baris}.
+    """
+    dropped = {}
+    with engine.connect() as conn:
+        names = conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :t"
+            ),
+            {"t": TABLE},
+        ).scalars()
+        names = list(names)
+    for name in expired_partitions(names, cutoff):
+        with engine.begin() as conn:
+            rows = conn.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar()
+            for stmt in _drop_partition_sql(name):
+                conn.execute(text(stmt))
+        dropped[name] = int(rows or 0)
+    return dropped
+
+
+def convert_to_partitioned(engine: Engine, months_ahead: int = 3) -> dict:
+    """
+    Postgres: ubah query_history menjadi tabel partisi bulanan (RANGE
+    created_at) dalam satu transaksi. Primary key menjadi (id, created_at)
+    karena Postgres mewajibkan partition key ada di PK; sequence id dipakai
+    ulang. Jalankan saat traffic rendah (copy data memegang lock tabel).
+    """
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError("Partisi bulanan hanya didukung di Postgres")
+    if is_partitioned(engine):
+        return {"converted": False, "partitions": ensure_partitions(engine)}
+
+    with engine.begin() as conn:
+        oldest, newest = conn.execute(
+            text(f"SELECT MIN(created_at), MAX(created_at) FROM {TABLE}")
+        ).one()
+        conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_old"))
+        # semua index tabel lama (termasuk PK, created_at dan GIN full-text)
+        # diganti nama supaya nama index tabel baru tidak bentrok
+        old_indexes = conn.execute(
+            text(
+                "SELECT indexname FROM pg_indexes "
+                "WHERE schemaname = current_schema() AND tablename = :t"
+            ),
+            {"t": f"{TABLE}_old"},
+        ).scalars()
+        for idx in list(old_indexes):
+            conn.execute(text(f'ALTER INDEX "{idx}" RENAME TO "{idx}_old"'))
+        conn.execute(
+            text(
+                f"CREATE TABLE {TABLE} ("
+                f"id INTEGER NOT NULL DEFAULT nextval('{TABLE}_id_seq'), "
+                "user_id INTEGER REFERENCES users(id), "
+                "query TEXT NOT NULL, "
+                "results TEXT NOT NULL, "
+                "created_at TIMESTAMP NOT NULL, "
+                "top_k INTEGER, "
+                "collection VARCHAR(64), "
+                "filters TEXT, "
+                "PRIMARY KEY (id, created_at)"
+                ") PARTITION BY RANGE (created_at)"
+            )
+        )
+        conn.execute(text(f"CREATE INDEX ix_query_history_id ON {TABLE} (id)"))
+        conn.execute(
+            text(f"CREATE INDEX ix_query_history_user_id_id ON {TABLE} (user_id, id)")
+        )
+        conn.execute(
+            text(f"CREATE INDEX ix_query_history_created_at ON {TABLE} (created_at)")
+        )
+
+        # partisi bulanan mencakup semua baris yang disalin, sehingga
+        # partisi DEFAULT kosong dan ensure_partitions tidak bentrok
+        now = datetime.utcnow()
+        month = _month_start(min(oldest or now, now))
+        end = _month_start(max(newest or now, now))
+        for _ in range(months_ahead):
+            end = _next_month(end)
+        while month <= end:
+            _create_partition(conn, month)
+            month = _next_month(month)
+        conn.execute(text(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT"))
+
+        existing = set(
+            conn.execute(
+                text(
+                    "SELECT column_name FROM information_schema.columns "
+                    "WHERE table_schema = current_schema() AND table_name = :t"
+                ),
+                {"t": f"{TABLE}_old"},
+            ).scalars()
+        )
+        columns = ", ".join(c for c in _COLUMNS if c in existing)
+        copied = conn.execute(
+            text(f"INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {TABLE}_old")
+        ).rowcount
+        conn.execute(text(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id"))
+        conn.execute(text(f"DROP TABLE {TABLE}_old"))
+    # kolom tsvector + trigger full-text ikut dibuat ulang di tabel partisi
+    ensure_search_index(engine, background=False)
+    return {"converted": True, "rows_copied": copied}
+
+
+# ---------------- satu run retensi ----------------
+def run_retention(
+    engine: Engine = default_engine,
+    retention_days: int = HISTORY_RETENTION_DAYS,
+    stop: Optional[threading.Event] = None,
+) -> dict:
+    """
+    Jalankan retensi sekali dan kembalikan laporan.
+    """
+    started = time.perf_counter()
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    report = {
+        "cutoff": cutoff.isoformat(),
+        "retention_days": retention_days,
+        "size_before": table_size(engine),
+        "partitions_dropped": {},
+    }
+    if is_partitioned(engine):
+        ensure_partitions(engine)
+        report["partitions_dropped"] = drop_expired_partitions(engine, cutoff)
+    deleted = purge_expired(engine, cutoff, stop=stop)
+    if deleted:
+        report["space"] = reclaim_space(engine)
+
+    report["rows_purged"] = deleted + sum(report["partitions_dropped"].values())
+    report["rows_deleted_in_batches"] = deleted
+    report["duration_s"] = round(time.perf_counter() - started, 3)
+    report["size_after"] = table_size(engine)
+    report["finished_at"] = datetime.utcnow().isoformat()
+    logger.info(
+        "retention: %d baris dihapus dalam %.2fs",
+        report["rows_purged"],
+        report["duration_s"],
+    )
+    return report
+
+
+class RetentionJob:
+    """
+    Menjalankan retensi berkala di thread background (setiap
+    RETENTION_INTERVAL_HOURS) dan menyimpan laporan terakhir.
+    """
+
+    def __init__(self, engine: Engine = default_engine):
+        self._engine = engine
+        self._lock = threading.Lock()
+        self._running = False
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self.last_report: Optional[dict] = None
+        self.last_error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Optional[dict]:
+        with self._lock:
+            if self._running:
+                return None
+            self._running = True
+        try:
+            report = run_retention(self._engine, stop=self._stop)
+            self.last_report, self.last_error = report, None
+            return report
+        except Exception as e:
+            logger.exception("retention gagal")
+            self.last_error = str(e)
+            return None
+        finally:
+            with self._lock:
+                self._running = False
+
+    def trigger(self) -> None:
+        """
+        Minta run segera (non-blocking); jika scheduler belum jalan,
+        run dilakukan di thread tersendiri.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._wake.set()
+        else:
+            threading.Thread(target=self.run_once, daemon=True).start()
+
+    def start(self) -> None:
+        if HISTORY_RETENTION_DAYS <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self) -> None:
+        interval = max(60.0, RETENTION_INTERVAL_HOURS * 3600.0)
+        while not self._stop.is_set():
+            self.run_once()
+            self._wake.wait(interval)
+            self._wake.clear()
+
+    def status(self) -> dict:
+        with self._lock:
+            running = self._running
+        return {
+            "enabled": HISTORY_RETENTION_DAYS > 0,
+            "retention_days": HISTORY_RETENTION_DAYS,
+            "running": running,
+            "last_report": self.last_report,
+            "last_error": self.last_error,
+        }
+
+
+retention_job = RetentionJob()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retensi query_history")
+    parser.add_argument("command", choices=["purge", "partition", "report", "vacuum"])
+    parser.add_argument("--days", type=int, default=HISTORY_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    if args.command == "purge":
+        if args.days <= 0:
+            raise SystemExit("Set HISTORY_RETENTION_DAYS atau --days > 0")
+        result = run_retention(default_engine, args.days)
+    elif args.command == "partition":
+        result = convert_to_partitioned(default_engine)
+    elif args.command == "vacuum":
+        result = vacuum(default_engine)
+    else:
+        result = {
+            "size": table_size(default_engine),
+            "partitioned": is_partitioned(default_engine),
+        }
+    print(json.dumps(result, indent=2, default=str))
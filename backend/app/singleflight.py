@@ -0,0 +1,76 @@
+# backend/app/singleflight.py
+"""
+Single-flight: menggabungkan (coalesce) pemanggilan identik yang sedang berjalan.
+
+Jika beberapa thread memanggil `do()` dengan key yang sama pada saat bersamaan,
+hanya satu thread (leader) yang benar-benar menjalankan fungsi; thread lain
+menunggu dan menerima hasil (atau exception) yang sama.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Jalankan `fn` untuk `key`, atau tunggu hasil pemanggilan yang sedang
+        berjalan dengan key yang sama. Exception dari leader diteruskan ke
+        semua thread yang menunggu.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # lepas key dulu supaya request berikutnya menghitung ulang,
+            # baru bangunkan thread yang menunggu
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
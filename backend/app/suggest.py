@@ -0,0 +1,171 @@
+# backend/app/suggest.py
+"""
+Query typeahead di atas index prefix yang dibangun oleh
+`build_index.build_suggest_index`.
+
+Pencarian: binary search untuk range [lo, hi) key yang diawali prefix, lalu
+ambil top-N berdasarkan skor statis. Untuk range besar hanya blok dengan
+max skor tertinggi yang di-scan (top-N item pasti berada di blok yang max
+skornya >= max skor blok ke-N).
+
+Skor statis = frekuensi pertanyaan di dataset + popularitas (jumlah query
+di query_history) yang ditambahkan saat index diload (`apply_popularity`).
+
+Benchmark:
+    python -m app.suggest --n 1000000
+"""
+
+import argparse
+import random
+import time
+from bisect import bisect_left
+from typing import Mapping
+
+import numpy as np
+
+from .build_index import build_suggest_index, normalize_question, suggest_block_max
+
+_MAX_CHAR = "\U0010ffff"
+_END_PUNCT = "?!. "
+
+
+def normalize_prefix(prefix: str) -> str:
+    """
+    Normalisasi prefix seperti `normalize_question`, tetapi mempertahankan satu
+    spasi di akhir ("apa " tidak boleh cocok dengan "apakah").
+    """
+    norm = normalize_question(prefix)
+    if norm and prefix[-1:].isspace():
+        norm += " "
+    return norm
+
+
+def apply_popularity(index: dict, popularity: Mapping[str, float]) -> dict:
+    """
+    Index baru dengan skor + popularity[key] (key = pertanyaan ternormalisasi,
+    mis. jumlah query di history) dan max skor per blok yang dihitung ulang.
+    Query history biasanya diketik tanpa tanda baca akhir, jadi key tanpa
+    "?"/"." di akhir ikut dihitung.
+    """
+    keys = index["keys"]
+    boost = np.array(
+        [
+            popularity.get(k, 0.0)
+            + (
+                popularity.get(k.rstrip(_END_PUNCT), 0.0)
+                if k[-1] in _END_PUNCT
+                else 0.0
+            )
+            for k in keys
+        ],
+        dtype=np.float32,
+    )
+    scores = index["scores"] + boost
+    return {
+        **index,
+        "scores": scores,
+        "block_max": suggest_block_max(scores, index["block_size"]),
+    }
+
+
+def _kth_largest(values: np.ndarray, k: int) -> float:
+    return values[np.argpartition(-values, k - 1)[k - 1]]
+
+
+def suggest(index: dict, prefix: str, limit: int = 10) -> list[dict]:
+    """
+    Kembalikan maksimal `limit` completion untuk `prefix`, diurutkan
+    berdasarkan skor (desc) lalu urutan alfabet.
+    """
+    norm = normalize_prefix(prefix)
+    if not norm or limit <= 0:
+        return []
+
+    keys = index["keys"]
+    scores = index["scores"]
+    block = index["block_size"]
+
+    lo = bisect_left(keys, norm)
+    hi = bisect_left(keys, norm + _MAX_CHAR, lo)
+    if lo >= hi:
+        return []
+
+    first_full = -(-lo // block)
+    end_full = hi // block
+    if end_full - first_full <= limit:
+        cand = np.arange(lo, hi)
+    else:
+        # blok dengan max skor >= max blok ke-`limit` (termasuk yang seri)
+        block_max = index["block_max"][first_full:end_full]
+        top_blocks = first_full + np.flatnonzero(
+            block_max >= _kth_largest(block_max, limit)
+        )
+        parts = [
+            np.arange(lo, first_full * block),
+            np.arange(end_full * block, hi),
+        ]
+        parts.extend(np.arange(b * block, (b + 1) * block) for b in top_blocks)
+        cand = np.concatenate(parts)
+
+    cand_scores = scores[cand]
+    if len(cand) > limit:
+        # skor yang seri dengan skor ke-`limit` ikut, lalu diurutkan per id
+        keep = cand_scores >= _kth_largest(cand_scores, limit)
+        cand, cand_scores = cand[keep], cand_scores[keep]
+    order = np.lexsort((cand, -cand_scores))[:limit]
+
+    texts = index["texts"]
+    return [{"text": texts[i], "score": float(scores[i])} for i in cand[order].tolist()]
+
+
+def _benchmark(n: int, queries: int, limit: int):
+    rng = random.Random(0)
+    words = [
+        "apa",
+        "itu",
+        "bagaimana",
+        "cara",
+        "kerja",
+        "sensor",
+        "plc",
+        "scada",
+        "robot",
+        "industri",
+        "kontrol",
+        "otomasi",
+        "mesin",
+        "sistem",
+        "data",
+        "jaringan",
+    ]
+    questions = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(3, 8))) + f" {i}"
+        for i in range(n)
+    ]
+    popularity = {normalize_question(q): rng.random() * 100 for q in questions}
+
+    t0 = time.perf_counter()
+    index = apply_popularity(build_suggest_index(questions), popularity)
+    print(f"build: {len(index['keys'])} keys in {time.perf_counter() - t0:.2f}s")
+
+    prefixes = [q[: rng.randint(1, 20)] for q in rng.sample(questions, queries)]
+    lat = []
+    for p in prefixes:
+        t = time.perf_counter()
+        suggest(index, p, limit)
+        lat.append(time.perf_counter() - t)
+    lat_us = np.array(lat) * 1e6
+    print(
+        f"suggest x{queries}: p50={np.percentile(lat_us, 50):.0f}us "
+        f"p95={np.percentile(lat_us, 95):.0f}us "
+        f"p99={np.percentile(lat_us, 99):.0f}us"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark index suggest")
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    _benchmark(args.n, args.queries, args.limit)
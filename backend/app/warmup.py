@@ -0,0 +1,220 @@
+# backend/app/warmup.py
+"""
+Warm-up cache retrieval dari query_history.
+
+Setelah startup atau index reload, query yang paling sering ditanyakan dalam
+window tertentu dihitung ulang di background (dibatasi laju, dan mengalah
+jika ada request live yang sedang berjalan) lalu dimasukkan ke result cache.
+
+Query dikelompokkan per key cache seperti yang dicatat di history
+(query ternormalisasi, top_k, collection, filter). Coverage = porsi traffic
+window yang key-nya persis sudah di-prewarm; history lama tanpa parameter
+retrieval tetap di-warm dengan WARMUP_TOP_K tetapi tidak dihitung sebagai
+coverage. Progress & coverage bisa dilihat via `CacheWarmer.status()`.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from sqlalchemy import func
+
+from .build_index import normalize_question
+from .config import WARMUP_QPS, WARMUP_TOP_K, WARMUP_TOP_N, WARMUP_WINDOW_HOURS
+from .db import SessionLocal
+from .models_history import QueryHistory
+
+logger = logging.getLogger(__name__)
+
+
+def top_queries(
+    db, since: datetime, limit: Optional[int]
+) -> tuple[list[tuple[str, int]], int]:
+    """
+    Agregasi query ternormalisasi paling sering sejak `since` (limit None =
+    semua).
+    Mengembalikan (list (query, count) terurut desc, total query dalam window).
+    """
+    rows = (
+        db.query(func.lower(QueryHistory.query), func.count(QueryHistory.id))
+        .filter(QueryHistory.created_at >= since)
+        .group_by(func.lower(QueryHistory.query))
+        .all()
+    )
+    # lower() di SQL mengurangi jumlah baris; whitespace dirapikan di Python
+    counts = Counter()
+    for q, n in rows:
+        norm = normalize_question(q or "")
+        if norm:
+            counts[norm] += n
+    total = sum(counts.values())
+    return counts.most_common(limit), total
+
+
+def top_query_keys(db, since: datetime, limit: int) -> tuple[list, int]:
+    """
+    Agregasi key (query ternormalisasi, top_k, collection, filters) paling
+    sering sejak `since`. Mengembalikan (list (key, count) terurut desc,
+    total query dalam window).
+    """
+    columns = (
+        func.lower(QueryHistory.query),
+        QueryHistory.top_k,
+        QueryHistory.collection,
+        QueryHistory.filters,
+    )
+    rows = (
+        db.query(*columns, func.count(QueryHistory.id))
+        .filter(QueryHistory.created_at >= since)
+        .group_by(*columns)
+        .all()
+    )
+    counts = Counter()
+    for q, top_k, collection, filters, n in rows:
+        norm = normalize_question(q or "")
+        if norm:
+            counts[(norm, top_k, collection, filters)] += n
+    total = sum(counts.values())
+    return counts.most_common(limit), total
+
+
+class CacheWarmer:
+    def __init__(
+        self,
+        compute: Callable[[tuple], Any],
+        store: Callable[[tuple, Any], None],
+        is_busy: Optional[Callable[[], bool]] = None,
+        prepare: Optional[Callable[[], None]] = None,
+    ):
+        """
+        compute(key) -> hasil (termasuk identitas index/generasi yang dipakai
+        saat menghitung) atau None jika key dilewati; store(key, hasil)
+        menyimpannya ke cache di bawah generasi tersebut.
+        key = (query, top_k, collection, filters).
+        """
+        self._compute = compute
+        self._prepare = prepare
+        self._store = store
+        self._is_busy = is_busy or (lambda: False)
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._status: dict = {"state": "idle"}
+
+    def start(self, generation: int) -> None:
+        """
+        Mulai warm-up di thread background; warm-up sebelumnya dibatalkan.
+        """
+        with self._lock:
+            self._cancel.set()
+            self._cancel = threading.Event()
+            cancel = self._cancel
+            # dict status per run: thread lama yang dibatalkan tidak
+            # menimpa status run yang baru
+            status = {"state": "pending", "generation": generation}
+            self._status = status
+        threading.Thread(
+            target=self._run, args=(cancel, status, generation), daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        self._cancel.set()
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    def _update(self, status: dict, **kwargs) -> None:
+        with self._lock:
+            status.update(kwargs)
+
+    def _warm_one(self, key: tuple, cancel: threading.Event) -> Optional[str]:
+        """
+        Hitung & simpan satu key; "done" / "skipped" / "failed", atau None
+        jika dibatalkan di tengah komputasi.
+        """
+        query, top_k, collection, filters = key
+        key = (query, top_k or WARMUP_TOP_K, collection, filters)
+        try:
+            computed = self._compute(key)
+            if cancel.is_set():
+                return None
+            if computed is None:
+                return "skipped"
+            self._store(key, computed)
+            return "done"
+        except Exception as e:
+            logger.warning("warm-up: key %r gagal: %s", key, e)
+            return "failed"
+
+    def _run(self, cancel: threading.Event, status: dict, generation: int) -> None:
+        started = time.perf_counter()
+        since = datetime.utcnow() - timedelta(hours=WARMUP_WINDOW_HOURS)
+        try:
+            if self._prepare is not None:
+                self._prepare()
+            db = SessionLocal()
+            try:
+                top, window_total = top_query_keys(db, since, WARMUP_TOP_N)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.exception("warm-up: gagal menyiapkan model / query_history")
+            self._update(status, state="failed", error=str(e))
+            return
+
+        self._update(
+            status,
+            state="running",
+            started_at=datetime.utcnow().isoformat(),
+            window_hours=WARMUP_WINDOW_HOURS,
+            window_queries=window_total,
+            total=len(top),
+            done=0,
+            failed=0,
+            skipped=0,
+            coverage=0.0,
+        )
+
+        interval = 1.0 / WARMUP_QPS if WARMUP_QPS > 0 else 0.0
+        counters = {"done": 0, "failed": 0, "skipped": 0}
+        covered = 0
+        for key, count in top:
+            # mengalah ke traffic live
+            while self._is_busy():
+                if cancel.wait(max(interval, 0.005)):
+                    break
+            if cancel.is_set():
+                self._update(status, state="cancelled")
+                return
+            outcome = self._warm_one(key, cancel)
+            if outcome is None:
+                self._update(status, state="cancelled")
+                return
+            counters[outcome] += 1
+            # history lama (top_k NULL): key cache sebenarnya tidak diketahui
+            if outcome == "done" and key[1] is not None:
+                covered += count
+            self._update(
+                status,
+                **counters,
+                coverage=covered / window_total if window_total else 0.0,
+            )
+            if interval and cancel.wait(interval):
+                self._update(status, state="cancelled")
+                return
+
+        self._update(
+            status,
+            state="done",
+            duration_s=round(time.perf_counter() - started, 3),
+            finished_at=datetime.utcnow().isoformat(),
+        )
+        logger.info(
+            "warm-up generation %s selesai: %d query, coverage %.1f%%",
+            generation,
+            counters["done"],
+            100.0 * covered / window_total if window_total else 0.0,
+        )
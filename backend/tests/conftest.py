@@ -1,10 +1,14 @@
 # backend/tests/_conftest.py
 import os
 import time
+import uuid
+from pathlib import Path
 
 import pytest
 import requests
 
+DATASET = Path(__file__).resolve().parents[2] / "data" / "raw_dataset.json"
+
 
 @pytest.fixture(scope="session")
 def base_url():
@@ -28,3 +32,34 @@ def base_url():
     pytest.exit(
         f"Server tidak merespon {health} setelah 15 detik. Pastikan backend berjalan dan BASE benar."
     )
+
+
+@pytest.fixture(scope="session")
+def qa_pairs():
+    """
+    Dataset contoh (list dict question/answer) dari data/raw_dataset.json.
+    """
+    from app.build_index import load_qa_pairs
+
+    return load_qa_pairs(str(DATASET))
+
+
+@pytest.fixture
+def make_collection(tmp_path, monkeypatch):
+    """
+    Factory: build index kecil sebagai collection sementara (COLLECTIONS_DIR
+    diarahkan ke tmp_path) dan kembalikan namanya untuk rag.get_index().
+    """
+    from app import rag
+    from app.build_index import build_tfidf_index
+
+    monkeypatch.setattr(rag, "COLLECTIONS_DIR", str(tmp_path))
+
+    def make(questions, answers=None, **options):
+        name = "t" + uuid.uuid4().hex[:12]
+        build_tfidf_index(
+            questions, str(tmp_path / name), answers=answers or questions, **options
+        )
+        return name
+
+    return make
@@ -0,0 +1,16 @@
+import requests
+
+
+def test_admin_profiles_requires_auth(base_url):
+    r = requests.get(f"{base_url}/admin/profiles", timeout=5)
+    assert r.status_code in (401, 403)
+
+
+def test_retention_requires_auth(base_url):
+    r = requests.get(f"{base_url}/admin/retention", timeout=5)
+    assert r.status_code in (401, 403)
+
+
+def test_backup_requires_auth(base_url):
+    r = requests.post(f"{base_url}/admin/backups", timeout=5)
+    assert r.status_code in (401, 403)
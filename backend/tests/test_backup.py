@@ -0,0 +1,91 @@
+# backend/tests/test_backup.py
+import sqlite3
+
+import pytest
+
+from app import backup
+
+
+@pytest.fixture
+def source_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(backup, "BACKUP_DIR", str(tmp_path / "backups"))
+    path = tmp_path / "src.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    conn.executemany("INSERT INTO t (v) VALUES (?)", [("x" * 200,)] * 5000)
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT id, v FROM t ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("incremental", [True, False])
+@pytest.mark.parametrize("compress", [True, False])
+def test_snapshot_restore_round_trip(source_db, tmp_path, incremental, compress):
+    report = backup.create_snapshot(
+        source_db, incremental=incremental, compress=compress, keep=5
+    )
+    restored = str(tmp_path / "restored.sqlite")
+
+    backup.restore_snapshot(report["id"], restored)
+
+    assert _rows(restored) == _rows(source_db)
+    assert backup.verify_snapshot(report["id"])["integrity"] == "ok"
+
+
+def test_incremental_snapshot_reuses_unchanged_chunks(source_db, tmp_path):
+    first = backup.create_snapshot(source_db, incremental=True, keep=5)
+    conn = sqlite3.connect(source_db)
+    conn.execute("UPDATE t SET v = 'baru' WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    second = backup.create_snapshot(source_db, incremental=True, keep=5)
+
+    assert 0 < second["chunks_new"] < first["chunks_new"]
+    restored = str(tmp_path / "restored.sqlite")
+    backup.restore_snapshot(second["id"], restored)
+    assert _rows(restored)[0] == (1, "baru")
+    assert {s["id"] for s in backup.list_snapshots()} == {first["id"], second["id"]}
+
+
+def _existing_dest(tmp_path):
+    dest = tmp_path / "dest.sqlite"
+    dest.write_bytes(b"isi lama")
+    return dest
+
+
+def test_failed_integrity_check_keeps_destination(source_db, tmp_path, monkeypatch):
+    report = backup.create_snapshot(source_db, incremental=True, keep=5)
+    dest = _existing_dest(tmp_path)
+    monkeypatch.setattr(backup, "integrity_check", lambda path: "page 3 rusak")
+
+    with pytest.raises(backup.BackupError, match="integrity_check"):
+        backup.restore_snapshot(report["id"], str(dest))
+
+    assert dest.read_bytes() == b"isi lama"
+    assert not (tmp_path / "dest.sqlite.restore-tmp").exists()
+
+
+@pytest.mark.parametrize("damage", ["missing", "corrupt"])
+def test_broken_chunk_leaves_no_temp_file(source_db, tmp_path, damage):
+    report = backup.create_snapshot(source_db, incremental=True, compress=True, keep=5)
+    chunk = sorted((tmp_path / "backups").rglob("*.gz"))[-1]
+    if damage == "missing":
+        chunk.unlink()
+    else:
+        chunk.write_bytes(b"bukan gzip")
+    dest = _existing_dest(tmp_path)
+
+    with pytest.raises(Exception):
+        backup.restore_snapshot(report["id"], str(dest))
+
+    assert dest.read_bytes() == b"isi lama"
+    assert not (tmp_path / "dest.sqlite.restore-tmp").exists()
@@ -0,0 +1,129 @@
+# backend/tests/test_batching.py
+import threading
+import time
+
+from app import rag
+from app.batching import MicroBatcher
+
+
+def _ids(results):
+    return [(r["id"], round(r["score"], 12)) for r in results]
+
+
+def test_score_batch_matches_single_queries(qa_pairs, make_collection):
+    questions = [p["question"] for p in qa_pairs]
+    index = rag.get_index(make_collection(questions))
+    queries = ["apa itu sensor", "cara kerja plc", "sensor", "xyzzy tidak ada"]
+    now = time.perf_counter()
+
+    batched = rag._score_batch(index, [(q, 5, None, now) for q in queries])
+
+    for q, res in zip(queries, batched):
+        assert _ids(res) == _ids(rag._score(index, q, 5))
+
+
+def test_micro_batcher_concurrent_results(qa_pairs, make_collection):
+    questions = [p["question"] for p in qa_pairs]
+    index = rag.get_index(make_collection(questions))
+    batcher = MicroBatcher(rag._score_batch, max_batch=16, max_wait_s=0.02)
+    queries = [questions[i] for i in range(0, 160, 10)]
+    out = {}
+
+    def worker(q):
+        out[q] = batcher.submit(index, (q, 3, None, time.perf_counter()))
+
+    threads = [threading.Thread(target=worker, args=(q,)) for q in queries]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for q in queries:
+        assert _ids(out[q]) == _ids(rag._score(index, q, 3))
+    sizes = batcher.stats()["batch_size"]
+    assert sizes["count"] < len(queries)
+
+
+def test_micro_batcher_propagates_errors():
+    def boom(group, payloads):
+        raise ValueError("gagal")
+
+    batcher = MicroBatcher(boom, max_wait_s=0)
+    try:
+        batcher.submit("g", 1)
+    except ValueError as e:
+        assert str(e) == "gagal"
+    else:
+        raise AssertionError("exception tidak diteruskan")
+
+
+def test_rerank_deadline_counts_queue_wait(qa_pairs, make_collection, monkeypatch):
+    questions = [p["question"] for p in qa_pairs]
+    monkeypatch.setattr(rag, "RERANK_ENABLED", True)
+    index = rag.get_index(make_collection(questions, rerank=True))
+    assert index.rerank is not None
+    before = rag._reranker.stats()["skipped"]
+    now = time.perf_counter()
+    # request pertama sudah menunggu lebih lama dari budget rerank
+    stale = now - rag._reranker.budget_s - 1.0
+
+    rag._score_batch(
+        index, [("apa itu sensor", 3, None, stale), ("apa itu sensor", 3, None, now)]
+    )
+
+    assert rag._reranker.stats()["skipped"] == before + 1
+
+
+def _submit_all(batcher, payloads):
+    out = {}
+
+    def worker(p):
+        try:
+            out[p] = batcher.submit("g", p)
+        except Exception as e:
+            out[p] = e
+
+    threads = [
+        threading.Thread(target=worker, args=(p,), daemon=True) for p in payloads
+    ]
+    for t in threads:
+        t.start()
+    return threads, out
+
+
+def _join(threads):
+    for t in threads:
+        t.join(5)
+    assert not any(t.is_alive() for t in threads), "future tidak pernah selesai"
+
+
+def test_short_result_list_fails_every_future():
+    batcher = MicroBatcher(lambda g, payloads: payloads[:-1], max_wait_s=0.02)
+
+    threads, out = _submit_all(batcher, range(5))
+    _join(threads)
+
+    assert all(isinstance(r, RuntimeError) for r in out.values())
+
+
+def test_batches_grow_while_workers_are_busy():
+    release = threading.Event()
+    sizes = []
+
+    def slow(group, payloads):
+        sizes.append(len(payloads))
+        release.wait(5)
+        return [p * 2 for p in payloads]
+
+    batcher = MicroBatcher(slow, max_batch=64, max_wait_s=0, workers=1)
+    first, out = _submit_all(batcher, [0])
+    while not sizes:
+        time.sleep(0.001)
+    # satu-satunya worker sibuk: request berikutnya dikumpulkan jadi satu batch
+    threads, more = _submit_all(batcher, range(1, 21))
+    time.sleep(0.1)
+    release.set()
+    _join(first + threads)
+
+    assert sizes == [1, 20]
+    assert {**out, **more} == {p: p * 2 for p in range(21)}
@@ -0,0 +1,64 @@
+# backend/tests/test_build_cache.py
+import os
+
+from app.build_index import MATRIX_FILENAME, build_index_cached
+
+QUESTIONS = [
+    "Bagaimana cara mengganti oli mesin?",
+    "Kenapa lampu check engine menyala?",
+    "Berapa tekanan angin ban yang ideal?",
+    "Apa fungsi sensor oksigen?",
+]
+ANSWERS = ["Ganti tiap 5000 km", "Cek sensor", "32 psi", "Mengukur kadar oksigen"]
+
+
+def _build(save_dir, cache_dir, **kwargs):
+    return build_index_cached(
+        QUESTIONS,
+        str(save_dir),
+        answers=ANSWERS,
+        cache_dir=str(cache_dir),
+        **kwargs,
+    )
+
+
+def test_second_build_is_cache_hit(tmp_path):
+    first = _build(tmp_path / "out", tmp_path / "cache")
+    second = _build(tmp_path / "out", tmp_path / "cache")
+
+    assert first["cache"]["hit"] is False
+    assert second["cache"]["hit"] is True
+    assert second["cache"]["source"] == "output"
+    assert second["cache"]["key"] == first["cache"]["key"]
+
+
+def test_cache_hit_from_store_copies_artifacts(tmp_path):
+    _build(tmp_path / "a", tmp_path / "cache")
+    report = _build(tmp_path / "b", tmp_path / "cache")
+
+    assert report["cache"]["hit"] is True
+    assert report["cache"]["source"] == "store"
+    assert os.path.exists(tmp_path / "b" / MATRIX_FILENAME)
+
+
+def test_no_cache_always_rebuilds(tmp_path):
+    _build(tmp_path / "out", tmp_path / "cache")
+    matrix = tmp_path / "out" / MATRIX_FILENAME
+    before = os.stat(matrix).st_mtime_ns
+
+    report = _build(tmp_path / "out", tmp_path / "cache", no_cache=True)
+
+    assert report["cache"]["hit"] is False
+    assert os.stat(matrix).st_mtime_ns != before
+
+
+def test_changed_dataset_misses(tmp_path):
+    _build(tmp_path / "out", tmp_path / "cache")
+    report = build_index_cached(
+        QUESTIONS + ["Apa itu ECU?"],
+        str(tmp_path / "out"),
+        answers=ANSWERS + ["Komputer mesin"],
+        cache_dir=str(tmp_path / "cache"),
+    )
+
+    assert report["cache"]["hit"] is False
@@ -0,0 +1,22 @@
+# backend/tests/test_collections.py
+import os
+
+from app import build_index, rag
+
+
+def test_default_collection_uses_build_output_names():
+    files = rag._collection_files(rag.DEFAULT_COLLECTION)
+
+    assert [os.path.basename(f) for f in files] == [
+        build_index.VECTORIZER_FILENAME,
+        build_index.MATRIX_FILENAME,
+        build_index.ANSWERS_FILENAME,
+        build_index.QUESTIONS_FILENAME,
+    ]
+    assert all(os.path.dirname(f) == rag.MODELS_DIR for f in files)
+
+
+def test_collection_name_validation():
+    assert build_index.COLLECTION_NAME_RE.match("otomotif_v2")
+    assert not build_index.COLLECTION_NAME_RE.match("../models")
+    assert not rag.collection_exists("../models")
@@ -0,0 +1,92 @@
+# backend/tests/test_compact.py
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app import rag
+from app.build_index import (
+    _top_k_ids,
+    compact_matrix,
+    pack_matrix_f16,
+    recall_at_k,
+    unpack_matrix,
+)
+
+
+@pytest.fixture(scope="module")
+def tfidf(qa_pairs):
+    questions = [p["question"] for p in qa_pairs]
+    vectorizer = TfidfVectorizer()
+    matrix = vectorizer.fit_transform(questions)
+    queries = vectorizer.transform(questions[::7] + ["xyzzy tidak ada"])
+    return matrix, queries
+
+
+def _row_norms(m):
+    return np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+
+
+def test_unpruned_compact_has_full_recall(tfidf):
+    matrix, queries = tfidf
+
+    compact = compact_matrix(matrix)
+
+    assert compact.dtype == np.float32
+    assert compact.indices.dtype == np.int32
+    assert compact.nnz == matrix.nnz
+    assert recall_at_k(matrix, compact, queries, 10) == 1.0
+
+
+def test_top_k_ids_skip_zero_scores_and_break_ties_by_id():
+    # dokumen 1-3 seri, dokumen 0 dan 4 tidak cocok (skor 0)
+    matrix = sparse.csr_matrix(np.array([[1.0, 0], [0, 1], [0, 1], [0, 1], [1, 0]]))
+    query = sparse.csr_matrix(np.array([[0, 1.0]]))
+
+    assert _top_k_ids(matrix, query, 2)[0].tolist() == [1, 2]
+    assert _top_k_ids(matrix, query, 10)[0].tolist() == [1, 2, 3]
+    # query tanpa dokumen cocok tidak menurunkan recall
+    empty = sparse.csr_matrix((1, 2))
+    assert recall_at_k(matrix, matrix, empty, 2) == 1.0
+
+
+def test_pruning_limits_postings_and_renormalizes(tfidf):
+    matrix, queries = tfidf
+
+    by_weight = compact_matrix(matrix, prune_min_weight=0.2)
+    by_count = compact_matrix(matrix, prune_top_n=5)
+
+    assert by_weight.nnz < matrix.nnz
+    assert np.diff(by_count.tocsc().indptr).max() <= 5
+    for m in (by_weight, by_count):
+        norms = _row_norms(m)
+        np.testing.assert_allclose(norms[norms > 0], 1.0, rtol=1e-5)
+        assert 0.0 < recall_at_k(matrix, m, queries, 10) <= 1.0
+
+
+def test_float16_round_trip(tfidf):
+    matrix, _ = tfidf
+    compact = compact_matrix(matrix)
+
+    packed = pack_matrix_f16(compact)
+    restored = unpack_matrix(packed)
+
+    assert packed["data"].dtype == np.float16
+    assert restored.dtype == np.float32
+    assert restored.shape == compact.shape
+    np.testing.assert_array_equal(restored.indices, compact.indices)
+    np.testing.assert_allclose(restored.data, compact.data, atol=1e-3)
+    assert unpack_matrix(compact) is compact
+
+
+def test_float16_collection_matches_full_ranking(qa_pairs, make_collection):
+    questions = [p["question"] for p in qa_pairs]
+    full = rag.get_index(make_collection(questions))
+    f16 = rag.get_index(make_collection(questions, compact=True, dtype="float16"))
+
+    assert f16.matrix.dtype == np.float32
+    for query in questions[::40]:
+        expected = rag._score(full, query, 1)
+        got = rag._score(f16, query, 1)
+        assert got[0]["id"] == expected[0]["id"]
+        assert got[0]["score"] == pytest.approx(expected[0]["score"], abs=1e-3)
@@ -0,0 +1,68 @@
+# backend/tests/test_dedup.py
+import numpy as np
+
+from app import dedup, rag
+from app.dedup import collapse_near_duplicates, find_clusters
+
+QUESTIONS = [
+    "Apa itu sensor suhu dan bagaimana cara kerjanya?",
+    "Apa itu sensor suhu dan bagaimana cara kerjanya ?",
+    "apa itu sensor suhu dan bagaimana cara kerja nya?",
+    "Bagaimana cara mengkalibrasi flow meter?",
+]
+
+
+def test_near_duplicates_are_clustered():
+    clusters = find_clusters(QUESTIONS, threshold=0.7)
+
+    assert [0, 1, 2] in clusters
+    assert [3] in clusters
+
+
+def test_same_answer_collapses():
+    answers = ["A", "A", "A", "B"]
+
+    clusters, report = collapse_near_duplicates(QUESTIONS, answers, threshold=0.7)
+
+    assert [m[0] for m in clusters] == [0, 3]
+    assert report["docs_after"] == 2
+    assert report["answer_conflicts"] == 0
+
+
+def test_conflicting_answers_are_kept():
+    answers = ["A", "B", "A", "C"]
+
+    clusters, report = collapse_near_duplicates(QUESTIONS, answers, threshold=0.7)
+
+    assert clusters == [[0, 2], [1], [3]]
+    assert report["docs_after"] == 3
+    assert report["answer_conflicts"] == 1
+
+
+def test_pairs_within_bucket_are_compared(monkeypatch):
+    # satu bucket [0, 1, 2]: 1 dan 2 mirip (0.75) tetapi tidak mirip 0 (0.5)
+    sigs = np.array([[1, 1, 5, 6], [1, 1, 2, 3], [1, 1, 2, 4]], dtype=np.uint64)
+    monkeypatch.setattr(dedup, "minhash_signatures", lambda texts, num_perm: sigs)
+
+    clusters = find_clusters(["a", "b", "c"], threshold=0.6, num_perm=4)
+
+    assert clusters == [[0], [1, 2]]
+
+
+def test_query_matching_only_alias_finds_canonical(make_collection):
+    questions = QUESTIONS[:1] + [
+        "Apa itu sensor suhu dan bagaimana cara kerjanya termokopel?",
+        "Bagaimana cara mengkalibrasi flow meter?",
+    ]
+    answers = [
+        "Sensor suhu mengukur temperatur",
+        "Sensor suhu mengukur temperatur",
+        "B",
+    ]
+    index = rag.get_index(make_collection(questions, answers, dedup_threshold=0.7))
+    assert list(index.questions) == [questions[0], questions[2]]
+
+    results = rag._score(index, "termokopel", 1)
+
+    assert results[0]["id"] == 0
+    assert results[0]["score"] > 0
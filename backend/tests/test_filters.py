@@ -0,0 +1,85 @@
+# backend/tests/test_filters.py
+import numpy as np
+import pytest
+
+from app import rag
+from app.build_index import _collapse_dataset
+from app.filters import FilterError, build_filter_index, merge_values, select
+
+METADATA = {
+    "category": ["sensor", "plc", "sensor", "scada", None, "plc"],
+    "language": ["id", "en", ["id", "en"], "id", "en", "id"],
+}
+
+
+@pytest.fixture
+def index():
+    return build_filter_index(METADATA, 6)
+
+
+@pytest.mark.parametrize(
+    "expr, expected",
+    [
+        ({"category": "sensor"}, [0, 2]),
+        ({"category": ["plc", "scada"]}, [1, 3, 5]),
+        ({"category": "plc", "language": "id"}, [5]),
+        ({"language": "en"}, [1, 2, 4]),
+        ({"$or": [{"category": "scada"}, {"language": "en"}]}, [1, 2, 3, 4]),
+        ({"$and": [{"language": "id"}, {"$not": {"category": "sensor"}}]}, [3, 5]),
+        ({"category": "tidak-ada"}, []),
+        ({"category": 1}, []),
+    ],
+)
+def test_select(index, expr, expected):
+    assert select(index, expr).tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        {"category": {"$in": ["plc"]}},
+        {"category": ["plc", {"x": 1}]},
+        {"warna": "merah"},
+        {"$xor": []},
+        {"$or": []},
+        {},
+    ],
+)
+def test_invalid_filter_raises(index, expr):
+    with pytest.raises(FilterError):
+        select(index, expr)
+
+
+def test_filtered_retrieval_only_returns_matching_docs(qa_pairs, make_collection):
+    questions = [p["question"] for p in qa_pairs]
+    topic = ["sensor" if "sensor" in q.lower() else "lain" for q in questions]
+    name = make_collection(questions, metadata={"topic": topic})
+
+    results = rag.retrieve("apa itu sensor", 10, name, {"topic": "lain"})
+
+    assert len(results) == 10
+    assert all(topic[r["id"]] == "lain" for r in results)
+    allowed = select(rag.get_index(name).filters, {"topic": "lain"})
+    assert np.isin([r["id"] for r in results], allowed).all()
+
+
+def test_merge_values():
+    assert merge_values([None, None]) is None
+    assert merge_values(["id", "id"]) == "id"
+    assert merge_values(["id", ["en", "id"], None]) == ["id", "en"]
+
+
+def test_dedup_merges_cluster_metadata():
+    questions = [
+        "Apa itu sensor suhu dan bagaimana cara kerjanya?",
+        "Apa itu sensor suhu dan bagaimana cara kerjanya ?",
+        "Bagaimana cara mengkalibrasi flow meter?",
+    ]
+    answers = ["A", "A", "B"]
+    metadata = {"language": ["id", "en", "id"], "product": ["x", None, None]}
+
+    _, _, _, merged, _ = _collapse_dataset(questions, answers, metadata, 0.7)
+
+    assert merged == {"language": [["id", "en"], "id"], "product": ["x", None]}
+    index = build_filter_index(merged, 2)
+    assert select(index, {"language": "en"}).tolist() == [0]
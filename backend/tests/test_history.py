@@ -0,0 +1,11 @@
+import requests
+
+
+def test_history_export_requires_auth(base_url):
+    r = requests.get(f"{base_url}/rag/rag/history/export", timeout=5)
+    assert r.status_code in (401, 403)
+
+
+def test_history_search_requires_auth(base_url):
+    r = requests.get(f"{base_url}/rag/rag/history/search?q=sensor", timeout=5)
+    assert r.status_code in (401, 403)
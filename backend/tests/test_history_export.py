@@ -0,0 +1,85 @@
+# backend/tests/test_history_export.py
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models_auth, rag  # noqa: F401
+from app.db import Base
+from app.models_history import QueryHistory
+
+START = datetime(2026, 1, 1)
+ROWS = 1200  # lebih dari dua halaman yield_per(EXPORT_FETCH_SIZE)
+
+
+@pytest.fixture
+def history_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(engine)
+    rows = []
+    for i in range(ROWS):
+        # user 1 dan 2 berselang-seling; satu baris per menit
+        rows.append(
+            {
+                "user_id": 1 + i % 2,
+                "query": f'cara kalibrasi "sensor" {i} ü',
+                "results": json.dumps([{"id": i, "score": 0.5}]),
+                "created_at": START + timedelta(minutes=i),
+            }
+        )
+    rows[0]["results"] = "bukan json"
+    with engine.begin() as conn:
+        conn.execute(insert(QueryHistory), rows)
+    monkeypatch.setattr(rag, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(rag, "EXPORT_CHUNK_BYTES", 1024)
+    return engine
+
+
+def _export(user_id, since=None, until=None, cursor=None):
+    chunks = list(rag._iter_history_ndjson(user_id, since, until, cursor))
+    body = b"".join(chunks).decode("utf-8")
+    assert body == "" or body.endswith("\n")
+    return chunks, [json.loads(line) for line in body.splitlines()]
+
+
+def test_every_line_is_one_row_in_id_order(history_db):
+    chunks, items = _export(1)
+
+    assert len(chunks) > 1
+    assert len(items) == ROWS // 2
+    ids = [it["id"] for it in items]
+    assert ids == sorted(ids)
+    assert ids == list(range(1, ROWS + 1, 2))
+    assert items[1]["query"] == 'cara kalibrasi "sensor" 2 ü'
+    assert items[1]["results"] == [{"id": 2, "score": 0.5}]
+    assert items[1]["created_at"] == (START + timedelta(minutes=2)).isoformat()
+    # kolom results lama yang bukan JSON array diekspor sebagai []
+    assert items[0]["results"] == []
+
+
+def test_only_own_rows_are_exported(history_db):
+    _, mine = _export(1)
+    _, theirs = _export(2)
+
+    assert {it["user_id"] for it in mine} == {1}
+    assert {it["user_id"] for it in theirs} == {2}
+    assert not {it["id"] for it in mine} & {it["id"] for it in theirs}
+
+
+def test_since_until_and_cursor(history_db):
+    since = START + timedelta(minutes=100)
+    until = START + timedelta(minutes=110)
+
+    _, items = _export(1, since=since, until=until)
+
+    # since inklusif, until eksklusif
+    assert [it["id"] for it in items] == list(range(101, 111, 2))
+    _, rest = _export(1, since=since, until=until, cursor=105)
+    assert [it["id"] for it in rest] == [107, 109]
+
+
+def test_empty_export(history_db):
+    assert _export(3) == ([], [])
+    assert _export(1, since=START + timedelta(days=365)) == ([], [])
@@ -0,0 +1,94 @@
+# backend/tests/test_history_search.py
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import models_auth, models_history  # noqa: F401
+from app.db import Base
+from app.history_search import (
+    FTS_TABLE,
+    backfill_search_index,
+    create_search_index,
+    ensure_search_index,
+    search_history,
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for i in range(10):
+            _insert(conn, f"cara kalibrasi sensor {i}")
+    return engine
+
+
+def _insert(conn, query, user_id=1):
+    conn.execute(
+        text(
+            "INSERT INTO query_history (user_id, query, results, created_at) "
+            "VALUES (:u, :q, '[]', :c)"
+        ),
+        {"u": user_id, "q": query, "c": datetime.utcnow()},
+    )
+
+
+def _integrity_ok(conn) -> None:
+    # raise jika isi index FTS tidak cocok dengan query_history
+    conn.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('integrity-check', 1)"
+        )
+    )
+
+
+def _ids(engine, q, user_id=1):
+    with engine.connect() as conn:
+        rows, total = search_history(conn, user_id, q, limit=50, offset=0)
+    return sorted(r["id"] for r in rows), total
+
+
+def test_changes_during_backfill_keep_index_consistent(engine):
+    with engine.begin() as conn:
+        max_id = create_search_index(conn)
+    assert max_id == 10
+    backfill_search_index(engine, 4, batch_size=2, pause_s=0)
+
+    with engine.begin() as conn:
+        # baris sudah di-backfill, belum di-backfill, dan baris baru
+        conn.execute(text("DELETE FROM query_history WHERE id IN (2, 7)"))
+        conn.execute(text("UPDATE query_history SET query = 'pompa' WHERE id = 8"))
+        _insert(conn, "cara kalibrasi sensor baru")
+    backfill_search_index(engine, max_id, batch_size=2, pause_s=0, after_id=4)
+
+    with engine.begin() as conn:
+        _integrity_ok(conn)
+    assert _ids(engine, "kalibrasi") == ([1, 3, 4, 5, 6, 9, 10, 11], 8)
+    assert _ids(engine, "pompa") == ([8], 1)
+
+
+def test_interrupted_backfill_resumes_on_startup(engine):
+    with engine.begin() as conn:
+        create_search_index(conn)
+    backfill_search_index(engine, 3, pause_s=0)
+    assert _ids(engine, "kalibrasi")[1] == 3
+
+    ensure_search_index(engine, background=False)
+
+    assert _ids(engine, "kalibrasi")[1] == 10
+    with engine.begin() as conn:
+        _integrity_ok(conn)
+
+
+def test_search_only_returns_own_history(engine):
+    ensure_search_index(engine, background=False)
+    with engine.begin() as conn:
+        _insert(conn, "cara kalibrasi sensor user dua", user_id=2)
+        _insert(conn, "rahasia pompa user dua", user_id=2)
+
+    assert _ids(engine, "kalibrasi", user_id=2) == ([11], 1)
+    assert _ids(engine, "kalibrasi", user_id=1)[1] == 10
+    assert _ids(engine, "rahasia", user_id=1) == ([], 0)
+    assert _ids(engine, "kalibrasi", user_id=3) == ([], 0)
@@ -0,0 +1,72 @@
+# backend/tests/test_impact.py
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from app import impact, rag
+from app.impact import ImpactIndex
+
+
+def _zipf_matrix(n_docs=4000, n_terms=2000, terms_per_doc=12, seed=0):
+    # distribusi term mirip teks: sedikit term sangat sering, banyak term jarang
+    rng = np.random.default_rng(seed)
+    p = 1.0 / np.arange(1, n_terms + 1)
+    rows = np.repeat(np.arange(n_docs), terms_per_doc)
+    cols = rng.choice(n_terms, size=len(rows), p=p / p.sum())
+    vals = rng.random(len(rows)) + 0.1
+    matrix = sparse.csr_matrix((vals, (rows, cols)), shape=(n_docs, n_terms))
+    matrix.sum_duplicates()
+    return normalize(matrix).tocsr(), rng
+
+
+def _full_top_k(matrix, q_vec, k):
+    scores = (matrix @ q_vec.T).toarray().ravel()
+    order = np.argsort(-scores, kind="stable")[:k]
+    return scores[order]
+
+
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_pruned_top_k_matches_full_product(k, monkeypatch):
+    # tanpa fallback exhaustive: setiap query lewat jalur pruning
+    monkeypatch.setattr(impact, "MAX_SEEN_FRACTION", 1.0)
+    matrix, rng = _zipf_matrix()
+    index = ImpactIndex(matrix)
+    for doc in rng.choice(matrix.shape[0], size=50, replace=False):
+        # query = beberapa term dari satu dokumen (+ satu term sering)
+        terms = matrix[doc].indices[:3].tolist() + [0]
+        q_vec = normalize(
+            sparse.csr_matrix(
+                (np.ones(len(terms)), ([0] * len(terms), terms)),
+                shape=(1, matrix.shape[1]),
+            )
+        )
+        rows, vals, counters = index.top_k(q_vec, k)
+
+        expected = _full_top_k(matrix, q_vec, k)
+        got = np.sort(vals)[::-1][:k]
+        np.testing.assert_array_equal(got, expected)
+        # skor dari pruning identik dengan skor scoring penuh per dokumen
+        full = (matrix[rows] @ q_vec.T).toarray().ravel()
+        np.testing.assert_array_equal(vals, full)
+        assert counters["exhaustive"] is False
+
+
+def test_score_with_pruning_matches_exhaustive(qa_pairs, make_collection, monkeypatch):
+    monkeypatch.setattr(rag, "RERANK_ENABLED", False)
+    monkeypatch.setattr(impact, "MAX_SEEN_FRACTION", 1.0)
+    questions = [p["question"] for p in qa_pairs]
+    name = make_collection(questions)
+
+    monkeypatch.setattr(rag, "PRUNING_ENABLED", True)
+    monkeypatch.setattr(rag, "PRUNING_MIN_DOCS", 0)
+    pruned = rag.get_index(name)
+    monkeypatch.setattr(rag, "PRUNING_ENABLED", False)
+    full = rag._store.reload(name)
+    assert pruned.impact is not None and full.impact is None
+
+    for query in questions[::25] + ["sensor suhu", "cara kalibrasi pompa"]:
+        expected = rag._score(full, query, 5)
+        got = rag._score(pruned, query, 5)
+        assert [r["score"] for r in got] == [r["score"] for r in expected]
+        assert [r["id"] for r in got] == [r["id"] for r in expected]
@@ -0,0 +1,133 @@
+# backend/tests/test_index_store.py
+import threading
+import time
+from types import SimpleNamespace
+
+from scipy import sparse
+
+from app.index_store import IndexStore
+
+
+class _Loader:
+    """
+    Loader palsu: matrix berukuran `sizes[name]` baris, mencatat setiap load.
+    """
+
+    def __init__(self, sizes=None, delay_s=0.0):
+        self.sizes = sizes or {}
+        self.delay_s = delay_s
+        self.calls = []
+
+    def __call__(self, name):
+        self.calls.append(name)
+        time.sleep(self.delay_s)
+        rows = self.sizes.get(name, 10)
+        matrix = sparse.identity(rows, format="csr")
+        vectorizer = SimpleNamespace(vocabulary_={})
+        return vectorizer, matrix, ["a"] * rows, ["q"] * rows, None, None, None
+
+
+def test_lazy_load_happens_once():
+    loader = _Loader()
+    store = IndexStore(loader)
+    assert store.peek("a") is None
+    assert loader.calls == []
+
+    first = store.get("a")
+    second = store.get("a")
+
+    assert first is second
+    assert loader.calls == ["a"]
+
+
+def test_concurrent_misses_load_once():
+    loader = _Loader(delay_s=0.05)
+    store = IndexStore(loader)
+    barrier = threading.Barrier(8)
+    got = []
+
+    def worker():
+        barrier.wait()
+        got.append(store.get("a"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loader.calls == ["a"]
+    assert len({id(ix) for ix in got}) == 1
+
+
+def test_miss_after_load_finished_does_not_reload():
+    loader = _Loader()
+    store = IndexStore(loader)
+    index = store.get("a")
+
+    # thread yang miss sebelum load selesai lalu masuk single-flight baru
+    again = store._loads.do("a", lambda: store._load_missing("a"))
+
+    assert again is index
+    assert again.generation == index.generation
+    assert loader.calls == ["a"]
+
+
+def test_lru_eviction_under_memory_budget():
+    loader = _Loader({"a": 100, "b": 100, "c": 100})
+    probe = IndexStore(loader)
+    size = probe.get("a").nbytes
+    store = IndexStore(loader, memory_budget_bytes=2 * size)
+
+    store.get("a")
+    store.get("b")
+    store.get("a")  # b sekarang paling lama tidak dipakai
+    store.get("c")
+
+    assert store.peek("a") is not None
+    assert store.peek("b") is None
+    assert store.peek("c") is not None
+    stats = store.stats()
+    assert stats["collections"]["b"]["evictions"] == 1
+    assert stats["loaded_bytes"] <= store.memory_budget_bytes
+
+
+def test_collection_larger_than_budget_stays_loaded():
+    loader = _Loader({"big": 1000})
+    store = IndexStore(loader, memory_budget_bytes=1)
+
+    index = store.get("big")
+
+    assert store.peek("big") is index
+
+
+def test_stats_counts_queries_but_not_internal_gets():
+    store = IndexStore(_Loader())
+    store.get("a")
+    store.get("a")
+    store.get("a", count=False)
+    store.get("b", count=False)
+
+    stats = store.stats()["collections"]
+
+    assert stats["a"]["queries"] == 2
+    assert stats["a"]["loads"] == 1
+    assert stats["a"]["loaded"] is True
+    assert stats["a"]["docs"] == 10
+    assert stats["a"]["qps"] > 0
+    assert stats["b"]["queries"] == 0
+    assert stats["b"]["qps"] == 0
+
+
+def test_reload_bumps_generation_and_evict_unloads():
+    loader = _Loader()
+    store = IndexStore(loader)
+    old = store.get("a")
+
+    new = store.reload("a")
+
+    assert new.generation > old.generation
+    assert store.get("a") is new
+    assert store.evict("a") is True
+    assert store.evict("a") is False
+    assert store.stats()["collections"]["a"]["loaded"] is False
@@ -0,0 +1,34 @@
+# backend/tests/test_profiling.py
+import pstats
+
+from app import profiling
+from app.batching import MicroBatcher
+
+
+def _scoring_work(group, payloads):
+    return [sum(i * i for i in range(p)) for p in payloads]
+
+
+def test_batch_scoring_is_profiled_on_executor_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    batcher = MicroBatcher(_scoring_work, max_wait_s=0)
+    req = profiling._ProfileRequest(forced=True)
+    token = profiling._current.set(req)
+    try:
+        assert batcher.submit("g", 1000) == sum(i * i for i in range(1000))
+    finally:
+        profiling._current.reset(token)
+
+    assert len(req.workers) == 1
+    endpoint = profiling.cProfile.Profile()
+    endpoint.enable()
+    endpoint.disable()
+    profiling.save_profile(endpoint, {"id": req.id}, req.workers)
+    stats = pstats.Stats(str(tmp_path / f"{req.id}.prof"))
+    assert any(fn == "_scoring_work" for _, _, fn in stats.stats)
+
+
+def test_unprofiled_batch_has_no_profiler():
+    batcher = MicroBatcher(_scoring_work, max_wait_s=0)
+    assert profiling.current_request() is None
+    assert batcher.submit("g", 10) == sum(i * i for i in range(10))
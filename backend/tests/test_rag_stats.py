@@ -0,0 +1,11 @@
+import requests
+
+
+def test_rag_stats_requires_auth(base_url):
+    r = requests.get(f"{base_url}/rag/rag/stats", timeout=5)
+    assert r.status_code in (401, 403)
+
+
+def test_rag_suggest_requires_auth(base_url):
+    r = requests.get(f"{base_url}/rag/rag/suggest", params={"q": "apa"}, timeout=5)
+    assert r.status_code in (401, 403)
@@ -0,0 +1,35 @@
+# backend/tests/test_rerank.py
+import numpy as np
+
+from app import rag
+
+
+def _rerank_index(qa_pairs, make_collection, monkeypatch):
+    monkeypatch.setattr(rag, "RERANK_ENABLED", True)
+    questions = [p["question"] for p in qa_pairs]
+    index = rag.get_index(make_collection(questions, rerank=True))
+    assert index.rerank is not None
+    return index, questions
+
+
+def test_misspelled_query_retrieves_right_doc(qa_pairs, make_collection, monkeypatch):
+    index, questions = _rerank_index(qa_pairs, make_collection, monkeypatch)
+    target = next(i for i, q in enumerate(questions) if "turbidity sensor" in q)
+    # "turbidty" tidak ada di vocabulary kata -> tahap pertama tidak cocok
+    assert index.vectorizer.transform(["turbidty"]).nnz == 0
+
+    results = rag._score(index, "turbidty", 3)
+
+    assert results[0]["id"] == target
+    assert results[0]["score"] > 0
+
+
+def test_char_candidates_respect_filter(qa_pairs, make_collection, monkeypatch):
+    index, questions = _rerank_index(qa_pairs, make_collection, monkeypatch)
+    target = next(i for i, q in enumerate(questions) if "turbidity sensor" in q)
+    allowed = np.array([i for i in range(len(questions)) if i != target])
+
+    results = rag._score(index, "turbidty", 3, allowed)
+
+    assert target not in [r["id"] for r in results]
+    assert all(r["id"] in set(allowed.tolist()) for r in results)
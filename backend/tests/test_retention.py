@@ -0,0 +1,251 @@
+# backend/tests/test_retention.py
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app import models_auth, models_history, retention  # noqa: F401
+from app.db import Base
+from app.history_search import ensure_search_index
+from app.retention import (
+    _drop_partition_sql,
+    _month_start,
+    _next_month,
+    _partition_name,
+    convert_to_partitioned,
+    ensure_partitions,
+    expired_partitions,
+    is_partitioned,
+    purge_expired,
+    reclaim_space,
+    run_retention,
+    vacuum,
+)
+
+PG_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def _insert_history(engine, created):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO users (id, username, hashed_password, created_at) "
+                "VALUES (1, 'u', 'x', :c)"
+            ),
+            {"c": datetime.utcnow()},
+        )
+        for i, ts in enumerate(created):
+            conn.execute(
+                text(
+                    "INSERT INTO query_history (user_id, query, results, created_at) "
+                    "VALUES (1, :q, '[]', :c)"
+                ),
+                {"q": f"query sensor {i}", "c": ts},
+            )
+
+
+def _insert_history_row(engine, ts):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO query_history (user_id, query, results, created_at) "
+                "VALUES (1, 'query baru', '[]', :c)"
+            ),
+            {"c": ts},
+        )
+
+
+def test_purge_expired_batches(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    old = [now - timedelta(days=400 + i) for i in range(25)]
+    fresh = [now - timedelta(days=i) for i in range(5)]
+    _insert_history(engine, old + fresh)
+
+    deletes = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, *args):
+        if statement.startswith("DELETE"):
+            deletes.append(statement)
+
+    deleted = purge_expired(engine, now - timedelta(days=365), batch_size=10, pause_s=0)
+
+    assert deleted == 25
+    # 10 + 10 + 5: batch terakhir lebih kecil dari batch_size -> berhenti
+    assert len(deletes) == 3
+    with engine.connect() as conn:
+        left = conn.execute(text("SELECT COUNT(*) FROM query_history")).scalar()
+    assert left == 5
+
+
+def _sqlite_engine(path, auto_vacuum=None):
+    engine = create_engine(f"sqlite:///{path}")
+    if auto_vacuum:
+        with engine.connect() as conn:
+            conn.exec_driver_sql(f"PRAGMA auto_vacuum = {auto_vacuum}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def test_run_retention_sqlite_purges_and_reclaims_space(tmp_path):
+    engine = _sqlite_engine(tmp_path / "db.sqlite", auto_vacuum="INCREMENTAL")
+    now = datetime.utcnow()
+    _insert_history(engine, [now - timedelta(days=400 + i) for i in range(3000)])
+    size_full = os.path.getsize(tmp_path / "db.sqlite")
+
+    report = run_retention(engine, retention_days=365)
+
+    assert report["partitions_dropped"] == {}
+    assert report["rows_purged"] == report["rows_deleted_in_batches"] == 3000
+    assert report["size_after"]["rows"] == 0
+    assert report["space"]["incremental"] is True
+    assert report["space"]["pages_freed"] > 0
+    assert report["space"]["free_pages"] == 0
+    assert os.path.getsize(tmp_path / "db.sqlite") < size_full
+
+    # run tanpa baris terhapus tidak menyentuh file
+    assert "space" not in run_retention(engine, retention_days=365)
+
+
+def test_reclaim_space_without_incremental_vacuum_only_reports(tmp_path):
+    engine = _sqlite_engine(tmp_path / "db.sqlite")
+    now = datetime.utcnow()
+    _insert_history(engine, [now - timedelta(days=400 + i) for i in range(3000)])
+    purge_expired(engine, now, pause_s=0)
+
+    space = reclaim_space(engine)
+
+    assert space["incremental"] is False
+    assert space["pages_freed"] == 0
+    assert space["free_pages"] > 0
+
+    # sekali vacuum: freelist kosong dan run berikutnya memakai incremental
+    vacuum(engine)
+    _insert_history_row(engine, now - timedelta(days=400))
+    purge_expired(engine, now, pause_s=0)
+    assert reclaim_space(engine)["incremental"] is True
+
+
+def test_run_retention_partitioned_drops_then_purges(tmp_path, monkeypatch):
+    engine = _sqlite_engine(tmp_path / "db.sqlite")
+    calls = []
+    monkeypatch.setattr(retention, "is_partitioned", lambda e: True)
+    monkeypatch.setattr(
+        retention, "ensure_partitions", lambda e: calls.append("ensure")
+    )
+
+    def _drop(e, cutoff):
+        calls.append("drop")
+        return {"query_history_p202001": 7}
+
+    def _purge(e, cutoff, stop=None):
+        calls.append("purge")
+        return 3
+
+    monkeypatch.setattr(retention, "drop_expired_partitions", _drop)
+    monkeypatch.setattr(retention, "purge_expired", _purge)
+    monkeypatch.setattr(retention, "reclaim_space", lambda e: None)
+
+    report = run_retention(engine, retention_days=30)
+
+    assert calls == ["ensure", "drop", "purge"]
+    assert report["partitions_dropped"] == {"query_history_p202001": 7}
+    assert report["rows_purged"] == 10
+    assert report["rows_deleted_in_batches"] == 3
+
+
+def test_expired_partitions_selects_by_upper_bound():
+    names = [
+        "query_history_p202403",
+        "query_history_default",
+        "query_history_p202312",
+        "query_history_p202401",
+        "query_history_p202402",
+        "query_history_p2024",
+        "other_p202301",
+    ]
+
+    # partisi Februari berakhir 1 Maret -> kedaluwarsa tepat saat cutoff 1 Maret
+    assert expired_partitions(names, datetime(2024, 3, 1)) == [
+        "query_history_p202312",
+        "query_history_p202401",
+        "query_history_p202402",
+    ]
+    # di tengah bulan, partisi bulan berjalan masih berisi baris aktif
+    assert expired_partitions(names, datetime(2024, 2, 15)) == [
+        "query_history_p202312",
+        "query_history_p202401",
+    ]
+    assert expired_partitions(names, datetime(2023, 12, 31)) == []
+    # batas tahun: Desember berakhir 1 Januari tahun berikutnya
+    assert expired_partitions(["query_history_p202312"], datetime(2024, 1, 1)) == [
+        "query_history_p202312"
+    ]
+
+
+def test_drop_partition_sql_detaches_before_drop():
+    assert _drop_partition_sql("query_history_p202401") == [
+        "ALTER TABLE query_history DETACH PARTITION query_history_p202401",
+        "DROP TABLE query_history_p202401",
+    ]
+
+
+@pytest.fixture
+def pg_engine():
+    if not PG_URL:
+        pytest.skip("TEST_POSTGRES_URL tidak di-set")
+    engine = create_engine(PG_URL)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS query_history CASCADE"))
+        conn.execute(text("DROP TABLE IF EXISTS query_history_old CASCADE"))
+        conn.execute(text("DROP TABLE IF EXISTS users CASCADE"))
+    Base.metadata.create_all(engine)
+    yield engine
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS query_history CASCADE"))
+        conn.execute(text("DROP TABLE IF EXISTS users CASCADE"))
+    engine.dispose()
+
+
+def test_convert_to_partitioned_postgres(pg_engine):
+    now = datetime.utcnow()
+    created = [now - timedelta(days=d) for d in (200, 95, 40, 3, 0)]
+    # baris di luar rentang months_ahead (mis. jam server maju)
+    created.append(_next_month(_next_month(_month_start(now))) + timedelta(days=200))
+    _insert_history(pg_engine, created)
+    # tabel lama punya index GIN full-text + index created_at
+    ensure_search_index(pg_engine, background=False)
+
+    result = convert_to_partitioned(pg_engine, months_ahead=1)
+
+    assert result == {"converted": True, "rows_copied": len(created)}
+    assert is_partitioned(pg_engine)
+    with pg_engine.connect() as conn:
+        in_default = conn.execute(
+            text("SELECT COUNT(*) FROM query_history_default")
+        ).scalar()
+        hits = conn.execute(
+            text(
+                "SELECT COUNT(*) FROM query_history "
+                "WHERE query_tsv @@ to_tsquery('simple', 'sensor')"
+            )
+        ).scalar()
+    assert in_default == 0
+    assert hits == len(created)
+
+    # baris baru di partisi DEFAULT dipindah saat partisi bulannya dibuat
+    far = _month_start(now + timedelta(days=31 * 14))
+    _insert_history_row(pg_engine, far + timedelta(days=2))
+    ensure_partitions(pg_engine, months_ahead=15)
+    with pg_engine.connect() as conn:
+        in_default = conn.execute(
+            text("SELECT COUNT(*) FROM query_history_default")
+        ).scalar()
+        moved = conn.execute(
+            text(f"SELECT COUNT(*) FROM {_partition_name(far)}")
+        ).scalar()
+    assert in_default == 0
+    assert moved == 1
@@ -0,0 +1,83 @@
+# backend/tests/test_singleflight.py
+import threading
+
+import pytest
+from pydantic import ValidationError
+
+from app.rag import MAX_TOP_K, RagQueryRequest
+from app.singleflight import SingleFlight
+
+
+def _run_concurrently(sf, key, fn, n):
+    started = threading.Barrier(n)
+    out = [None] * n
+
+    def worker(i):
+        started.wait()
+        try:
+            out[i] = sf.do(key, fn)
+        except Exception as e:
+            out[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_identical_calls_are_coalesced():
+    sf = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return ["hasil"]
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    out = _run_concurrently(sf, "k", compute, 8)
+
+    assert len(calls) == 1
+    assert all(r == ["hasil"] for r in out)
+    assert sf.stats() == {"executed": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_error_is_propagated_to_all_waiters():
+    sf = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise RuntimeError("index rusak")
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    out = _run_concurrently(sf, "k", compute, 4)
+
+    assert all(isinstance(r, RuntimeError) and str(r) == "index rusak" for r in out)
+    # key dilepas: pemanggilan berikutnya menghitung ulang
+    assert sf.do("k", lambda: "ok") == "ok"
+    assert sf.in_flight() == 0
+
+
+def test_different_keys_are_not_coalesced():
+    sf = SingleFlight()
+
+    assert sf.do("a", lambda: 1) == 1
+    assert sf.do("b", lambda: 2) == 2
+    assert sf.stats()["executed"] == 2
+
+
+@pytest.mark.parametrize("top_k", [0, -1, MAX_TOP_K + 1])
+def test_query_rejects_invalid_top_k(top_k):
+    with pytest.raises(ValidationError):
+        RagQueryRequest(query="sensor", top_k=top_k)
+
+
+def test_query_accepts_top_k_bounds():
+    assert RagQueryRequest(query="sensor").top_k == 3
+    assert RagQueryRequest(query="sensor", top_k=MAX_TOP_K).top_k == MAX_TOP_K
@@ -0,0 +1,92 @@
+# backend/tests/test_suggest.py
+import numpy as np
+import pytest
+
+from app import build_index
+from app.build_index import build_suggest_index
+from app.suggest import apply_popularity, normalize_prefix, suggest
+
+QUESTIONS = [
+    "ap",
+    "Apa",
+    "Apa itu PLC?",
+    "apa itu plc?",
+    "Apa itu SCADA?",
+    "Apakah sensor tahan air?",
+    "apb",
+    "Bagaimana cara kerja PLC?",
+]
+
+
+def _texts(index, prefix, limit=10):
+    return [s["text"] for s in suggest(index, prefix, limit)]
+
+
+def test_prefix_range_boundaries():
+    index = build_suggest_index(QUESTIONS)
+
+    assert set(_texts(index, "apa")) == {
+        "Apa",
+        "Apa itu PLC?",
+        "Apa itu SCADA?",
+        "Apakah sensor tahan air?",
+    }
+    assert _texts(index, "apb") == ["apb"]
+    assert _texts(index, "ab") == []
+    assert _texts(index, "zzz") == []
+
+
+def test_trailing_space_and_normalization():
+    index = build_suggest_index(QUESTIONS)
+
+    # spasi di akhir: "apa " tidak cocok dengan "apakah" maupun "apa"
+    assert set(_texts(index, "apa ")) == {"Apa itu PLC?", "Apa itu SCADA?"}
+    assert _texts(index, "  APA   itu p") == ["Apa itu PLC?"]
+    assert _texts(index, "   ") == []
+
+
+def test_limit_and_score_ordering():
+    index = build_suggest_index(QUESTIONS)
+
+    results = suggest(index, "apa", 2)
+
+    # "apa itu plc?" muncul dua kali; sisanya seri -> urutan alfabet
+    assert [r["text"] for r in results] == ["Apa itu PLC?", "Apa"]
+    assert [r["score"] for r in results] == [2.0, 1.0]
+    assert suggest(index, "apa", 0) == []
+
+
+def test_popularity_reorders():
+    index = apply_popularity(
+        build_suggest_index(QUESTIONS),
+        {"apa itu scada?": 3.0, "apa itu scada": 2.0, "tidak ada": 9.0},
+    )
+
+    assert _texts(index, "apa", 2) == ["Apa itu SCADA?", "Apa itu PLC?"]
+    assert index["block_max"].max() == 6.0
+
+
+def _brute_force(index, prefix, limit):
+    norm = normalize_prefix(prefix)
+    hits = [i for i, k in enumerate(index["keys"]) if k.startswith(norm)]
+    hits.sort(key=lambda i: (-index["scores"][i], i))
+    return [index["texts"][i] for i in hits[:limit]]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_block_skip_matches_brute_force(seed, monkeypatch):
+    # blok kecil supaya jalur skip per blok benar-benar dipakai
+    monkeypatch.setattr(build_index, "SUGGEST_BLOCK_SIZE", 4)
+    rng = np.random.default_rng(seed)
+    words = ["apa", "itu", "cara", "kerja", "sensor", "plc", "scada"]
+    questions = [
+        " ".join(rng.choice(words, size=rng.integers(2, 5))) + f" {i % 50}"
+        for i in range(2000)
+    ]
+    # skor bulat kecil -> banyak skor seri di batas top-N
+    popularity = {q: float(rng.integers(0, 3)) for q in questions[::3]}
+    index = apply_popularity(build_suggest_index(questions), popularity)
+
+    for prefix in ["a", "apa", "apa itu", "s", "plc sc", "kerja "]:
+        for limit in (1, 5, 20):
+            assert _texts(index, prefix, limit) == _brute_force(index, prefix, limit)
@@ -0,0 +1,190 @@
+# backend/tests/test_warmup.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models_auth, rag, warmup  # noqa: F401
+from app.build_index import (
+    ANSWERS_FILENAME,
+    FILTERS_FILENAME,
+    MATRIX_FILENAME,
+    QUESTIONS_FILENAME,
+    RERANK_FILENAME,
+    VECTORIZER_FILENAME,
+    build_tfidf_index,
+)
+from app.db import Base
+from app.models_history import QueryHistory
+
+QUESTIONS = [
+    "Apa itu sensor suhu?",
+    "Bagaimana cara kerja PLC?",
+    "Apa fungsi SCADA?",
+]
+
+
+@pytest.fixture
+def default_dir(tmp_path, monkeypatch):
+    """
+    Collection default diarahkan ke index sementara di tmp_path.
+    """
+    for const, filename in [
+        ("VECTORIZER_FILE", VECTORIZER_FILENAME),
+        ("MATRIX_FILE", MATRIX_FILENAME),
+        ("ANSWERS_FILE", ANSWERS_FILENAME),
+        ("QUESTIONS_FILE", QUESTIONS_FILENAME),
+        ("RERANK_FILE", RERANK_FILENAME),
+        ("FILTERS_FILE", FILTERS_FILENAME),
+    ]:
+        monkeypatch.setattr(rag, const, str(tmp_path / filename))
+    monkeypatch.setattr(rag, "WARMUP_ENABLED", False)
+    rag._store.evict(rag.DEFAULT_COLLECTION)
+    yield tmp_path
+    rag._store.evict(rag.DEFAULT_COLLECTION)
+
+
+def _build(path, answers, metadata=None):
+    build_tfidf_index(QUESTIONS, str(path), answers=answers, metadata=metadata)
+
+
+def test_reload_invalidates_cached_results(default_dir):
+    _build(default_dir, ["lama", "b", "c"])
+    assert rag.retrieve_shared("sensor suhu", 1)[0]["text"] == "lama"
+    assert rag.retrieve_shared("sensor suhu", 1)[0]["text"] == "lama"
+
+    _build(default_dir, ["baru", "b", "c"])
+    rag.reload_models()
+
+    assert rag.retrieve_shared("sensor suhu", 1)[0]["text"] == "baru"
+
+
+def test_warm_store_uses_generation_of_computation(default_dir):
+    _build(default_dir, ["lama", "b", "c"])
+    computed = rag._warm_compute(("sensor suhu", 1, None, None))
+
+    # index di-reload di antara compute dan store
+    _build(default_dir, ["baru", "b", "c"])
+    rag.reload_models()
+    rag._warm_store(("sensor suhu", 1, None, None), computed)
+
+    assert rag.retrieve_shared("sensor suhu", 1)[0]["text"] == "baru"
+
+
+class _NoDb:
+    def close(self):
+        pass
+
+
+def test_cancel_during_compute_skips_store(monkeypatch):
+    monkeypatch.setattr(warmup, "SessionLocal", _NoDb)
+    monkeypatch.setattr(
+        warmup,
+        "top_query_keys",
+        lambda db, since, limit: ([(("sensor", 3, None, None), 5)], 5),
+    )
+    stored = []
+    entered = threading.Event()
+    release = threading.Event()
+
+    def compute(key):
+        entered.set()
+        release.wait(5)
+        return ["hasil"]
+
+    warmer = warmup.CacheWarmer(compute, lambda key, r: stored.append(key))
+    warmer.start(1)
+    assert entered.wait(5)
+    warmer.stop()
+    release.set()
+    for _ in range(100):
+        if warmer.status()["state"] == "cancelled":
+            break
+        time.sleep(0.01)
+
+    assert warmer.status()["state"] == "cancelled"
+    assert stored == []
+
+
+def test_warm_up_is_not_counted_as_queries(default_dir):
+    _build(default_dir, ["a", "b", "c"])
+    rag.retrieve_shared("sensor suhu", 1)
+    before = rag._store.stats()["collections"][rag.DEFAULT_COLLECTION]["queries"]
+
+    key = ("apa fungsi scada", 1, None, None)
+    rag._warm_store(key, rag._warm_compute(key))
+
+    stats = rag._store.stats()["collections"][rag.DEFAULT_COLLECTION]
+    assert stats["queries"] == before
+
+
+def test_top_query_keys_groups_by_recorded_parameters(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    db = sessionmaker(bind=engine)()
+    for query, top_k, collection, filters in [
+        ("Sensor  Suhu", 3, None, None),
+        ("sensor suhu", 3, None, None),
+        ("sensor suhu", 5, None, None),
+        ("sensor suhu", 3, "lain", None),
+        ("sensor suhu", 3, None, '{"category": "a"}'),
+        ("sensor suhu", None, None, None),
+    ]:
+        db.add(
+            QueryHistory(
+                user_id=1,
+                query=query,
+                results="[]",
+                created_at=now,
+                top_k=top_k,
+                collection=collection,
+                filters=filters,
+            )
+        )
+    db.commit()
+
+    top, total = warmup.top_query_keys(db, now - timedelta(hours=1), 10)
+    db.close()
+
+    assert total == 6
+    assert top[0] == (("sensor suhu", 3, None, None), 2)
+    assert len(top) == 5
+
+
+def test_coverage_counts_only_warmed_keys(monkeypatch):
+    monkeypatch.setattr(warmup, "SessionLocal", _NoDb)
+    monkeypatch.setattr(warmup, "WARMUP_QPS", 0)
+    keys = [
+        (("a", 5, None, '{"category": "x"}'), 5),
+        (("b", None, None, None), 3),  # history lama tanpa parameter
+        (("c", 3, "lain", None), 2),  # collection tidak terload
+    ]
+    monkeypatch.setattr(warmup, "top_query_keys", lambda db, since, limit: (keys, 10))
+    stored = []
+
+    def compute(key):
+        return None if key[2] == "lain" else "hasil"
+
+    warmer = warmup.CacheWarmer(compute, lambda key, r: stored.append(key))
+    status = {}
+    warmer._run(threading.Event(), status, 1)
+
+    assert stored == [keys[0][0], ("b", warmup.WARMUP_TOP_K, None, None)]
+    assert (status["done"], status["skipped"], status["failed"]) == (2, 1, 0)
+    assert status["coverage"] == 0.5
+
+
+def test_warmed_key_with_filters_is_served_from_cache(default_dir):
+    _build(default_dir, ["a", "b", "c"], metadata={"category": ["x", "y", "x"]})
+    key = ("sensor suhu", 2, None, '{"category": "x"}')
+    rag._warm_store(key, rag._warm_compute(key))
+    hits = rag._result_cache.stats()["hits"]
+
+    results = rag.retrieve_shared("Sensor suhu", 2, None, {"category": "x"})
+
+    assert rag._result_cache.stats()["hits"] == hits + 1
+    assert {r["id"] for r in results} <= {0, 2}
@@ -0,0 +1,475 @@
+# backend/tools/loadtest.py
+"""
+Load test end-to-end: replay trace query (JSONL) ke API AutoMIND.
+
+Server dijalankan otomatis, in-process (uvicorn di thread) atau sebagai
+proses uvicorn lokal dengan beberapa worker, memakai database SQLite
+sementara (env SQLITE_PATH) yang dihapus setelah run, sehingga user
+sintetis dan history hasil load test tidak masuk database aplikasi.
+Harness mendaftarkan & login user sintetis, lalu menjalankan:
+- closed-loop: N thread konkuren, masing-masing kirim request berikutnya
+  segera setelah response diterima (--concurrency 1,8,32)
+- open-loop: request datang dengan laju tetap (Poisson) tanpa menunggu
+  response (--rates 20,50); latency dihitung dari jadwal kedatangan supaya
+  antrian ikut terukur
+
+Hasil (throughput, p50/p95/p99, error rate, CPU & RSS per worker) ditulis ke
+JSON. Contoh (dari folder backend):
+
+    python -m tools.loadtest --trace ../queries.jsonl --field query \
+        --mode workers --workers 4 --concurrency 1,8,32 --rates 50 \
+        --duration 20 --out loadtest_result.json
+
+Trace: satu JSON object per baris (field query diatur lewat --field, top_k
+opsional) atau satu string per baris.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+try:
+    import psutil  # type: ignore
+except Exception:
+    psutil = None
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# ---------------- trace ----------------
+def load_trace(path: str, field: str = "query") -> list[dict]:
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                obj = line
+            if isinstance(obj, str):
+                items.append({"query": obj})
+            elif isinstance(obj, dict) and obj.get(field):
+                item = {"query": str(obj[field])}
+                if "top_k" in obj:
+                    item["top_k"] = int(obj["top_k"])
+                if obj.get("collection"):
+                    item["collection"] = obj["collection"]
+                items.append(item)
+    if not items:
+        raise ValueError(f"Trace kosong / field '{field}' tidak ditemukan: {path}")
+    return items
+
+
+# ---------------- server ----------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_healthy(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server tidak sehat setelah {timeout}s: {base_url}")
+
+
+class InProcessServer:
+    """
+    Uvicorn di thread background dalam proses yang sama (1 worker).
+    CPU/RSS yang terukur ikut mencakup load generator.
+    """
+
+    def __init__(self, port: int):
+        import uvicorn
+
+        # SQLITE_PATH harus sudah di-set sebelum app.db diimport
+        if "app.db" in sys.modules:
+            raise RuntimeError("mode inprocess: app sudah terimport dengan DB lain")
+        from app.main import app
+
+        self.port = port
+        self._server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def worker_pids(self) -> list[int]:
+        return [os.getpid()]
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+class WorkerServer:
+    """
+    `uvicorn app.main:app --workers N` sebagai subprocess.
+    """
+
+    def __init__(self, port: int, workers: int):
+        self.port = port
+        self.workers = workers
+        self._proc = None
+
+    def start(self) -> None:
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        # SQLITE_PATH diwarisi dari environment harness
+        self._proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(self.port),
+                "--workers",
+                str(self.workers),
+                "--log-level",
+                "warning",
+            ],
+            cwd=backend_dir,
+        )
+
+    def worker_pids(self) -> list[int]:
+        children = _child_pids(self._proc.pid)
+        # dengan --workers 1 uvicorn tidak membuat child process
+        return children or [self._proc.pid]
+
+    def stop(self) -> None:
+        if self._proc is not None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+
+
+# ---------------- CPU / RSS per proses ----------------
+def _child_pids(pid: int) -> list[int]:
+    if psutil is not None:
+        try:
+            return [c.pid for c in psutil.Process(pid).children()]
+        except psutil.Error:
+            return []
+    pids = []
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[1]) == pid:
+                pids.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return pids
+
+
+def _proc_sample(pid: int):
+    """
+    (cpu_seconds user+system, rss_bytes) untuk satu proses, atau None.
+    """
+    if psutil is not None:
+        try:
+            p = psutil.Process(pid)
+            t = p.cpu_times()
+            return t.user + t.system, p.memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+        rss = int(fields[21]) * _PAGE_SIZE
+        return cpu, rss
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _sample_workers(pids: list[int]) -> dict:
+    return {pid: _proc_sample(pid) for pid in pids}
+
+
+def _worker_usage(before: dict, after: dict, wall_s: float) -> list[dict]:
+    out = []
+    for pid, end in after.items():
+        start = before.get(pid)
+        if end is None:
+            out.append({"pid": pid, "cpu_percent": None, "rss_bytes": None})
+            continue
+        cpu_pct = None
+        if start is not None and wall_s > 0:
+            cpu_pct = round(100.0 * (end[0] - start[0]) / wall_s, 1)
+        out.append({"pid": pid, "cpu_percent": cpu_pct, "rss_bytes": end[1]})
+    return out
+
+
+# ---------------- load generator ----------------
+def create_users(base_url: str, n: int) -> list[str]:
+    """
+    Register + login user sintetis, mengembalikan list bearer token.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    tokens = []
+    for i in range(n):
+        username = f"loadtest_{run_id}_{i}"
+        password = uuid.uuid4().hex
+        r = requests.post(
+            f"{base_url}/auth/register",
+            json={"username": username, "password": password},
+            timeout=30,
+        )
+        r.raise_for_status()
+        r = requests.post(
+            f"{base_url}/auth/login",
+            data={"username": username, "password": password},
+            timeout=30,
+        )
+        r.raise_for_status()
+        tokens.append(r.json()["access_token"])
+    return tokens
+
+
+class _Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.errors = 0
+        self.status_counts = {}
+
+    def record(self, latency_s: float, status) -> None:
+        with self._lock:
+            self.latencies.append(latency_s)
+            self.status_counts[str(status)] = self.status_counts.get(str(status), 0) + 1
+            if not (isinstance(status, int) and 200 <= status < 300):
+                self.errors += 1
+
+
+def _send(session, base_url, token, item, timeout):
+    body = {"query": item["query"], "top_k": item.get("top_k", 3)}
+    if item.get("collection"):
+        body["collection"] = item["collection"]
+    try:
+        r = session.post(
+            f"{base_url}/rag/rag/query",
+            json=body,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=timeout,
+        )
+        return r.status_code
+    except requests.RequestException as e:
+        return type(e).__name__
+
+
+def run_closed_loop(base_url, tokens, trace, concurrency, duration, timeout):
+    rec = _Recorder()
+    deadline = time.perf_counter() + duration
+    counter = {"i": 0}
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        session = requests.Session()
+        token = tokens[worker_id % len(tokens)]
+        while time.perf_counter() < deadline:
+            with lock:
+                item = trace[counter["i"] % len(trace)]
+                counter["i"] += 1
+            t0 = time.perf_counter()
+            status = _send(session, base_url, token, item, timeout)
+            rec.record(time.perf_counter() - t0, status)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return rec
+
+
+def run_open_loop(base_url, tokens, trace, rate, duration, timeout, max_in_flight):
+    rec = _Recorder()
+    local = threading.local()
+    rng = random.Random(0)
+
+    def fire(scheduled, item, token):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        status = _send(session, base_url, token, item, timeout)
+        # latency dari waktu kedatangan terjadwal (menghindari coordinated omission)
+        rec.record(time.perf_counter() - scheduled, status)
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        start = time.perf_counter()
+        next_at = start
+        i = 0
+        while next_at < start + duration:
+            now = time.perf_counter()
+            if next_at > now:
+                time.sleep(next_at - now)
+            pool.submit(fire, next_at, trace[i % len(trace)], tokens[i % len(tokens)])
+            i += 1
+            next_at += rng.expovariate(rate)
+    return rec
+
+
+def _summarize(rec: _Recorder, wall_s: float) -> dict:
+    lat_ms = np.array(rec.latencies) * 1000.0
+    n = len(lat_ms)
+
+    def pct(p):
+        return round(float(np.percentile(lat_ms, p)), 2) if n else None
+
+    return {
+        "requests": n,
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(n / wall_s, 2) if wall_s > 0 else 0.0,
+        "error_rate": round(rec.errors / n, 4) if n else 0.0,
+        "status_counts": rec.status_counts,
+        "latency_ms": {"p50": pct(50), "p95": pct(95), "p99": pct(99), "max": pct(100)},
+    }
+
+
+def run(args) -> dict:
+    """
+    Jalankan server dengan database sementara; database (user sintetis &
+    history) dihapus setelah run selesai.
+    """
+    db_dir = tempfile.mkdtemp(prefix="automind-loadtest-")
+    previous = os.environ.get("SQLITE_PATH")
+    os.environ["SQLITE_PATH"] = os.path.join(db_dir, "db.sqlite")
+    try:
+        return _run(args)
+    finally:
+        if previous is None:
+            os.environ.pop("SQLITE_PATH", None)
+        else:
+            os.environ["SQLITE_PATH"] = previous
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+def _run(args) -> dict:
+    port = args.port or _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    if args.mode == "inprocess":
+        server = InProcessServer(port)
+    else:
+        server = WorkerServer(port, args.workers)
+
+    server.start()
+    try:
+        _wait_healthy(base_url)
+        trace = load_trace(args.trace, args.field)
+        tokens = create_users(base_url, args.users)
+
+        # warm-up singkat supaya index sudah terload sebelum pengukuran
+        run_closed_loop(base_url, tokens, trace, 1, args.warmup, args.timeout)
+
+        phases = []
+        plans = [("closed", c) for c in args.concurrency] + [
+            ("open", r) for r in args.rates
+        ]
+        for kind, level in plans:
+            pids = server.worker_pids()
+            before = _sample_workers(pids)
+            t0 = time.perf_counter()
+            if kind == "closed":
+                rec = run_closed_loop(
+                    base_url, tokens, trace, level, args.duration, args.timeout
+                )
+            else:
+                rec = run_open_loop(
+                    base_url,
+                    tokens,
+                    trace,
+                    level,
+                    args.duration,
+                    args.timeout,
+                    args.max_in_flight,
+                )
+            wall = time.perf_counter() - t0
+            level_key = "concurrency" if kind == "closed" else "rate_rps"
+            phase = {
+                "kind": kind,
+                level_key: level,
+                **_summarize(rec, wall),
+                "workers": _worker_usage(before, _sample_workers(pids), wall),
+            }
+            phases.append(phase)
+            lat = phase["latency_ms"]
+            print(
+                f"[{kind} {level}] {phase['throughput_rps']} rps, "
+                f"p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms, "
+                f"errors={phase['error_rate']:.2%}"
+            )
+    finally:
+        server.stop()
+
+    return {
+        "mode": args.mode,
+        "workers": 1 if args.mode == "inprocess" else args.workers,
+        "trace": os.path.abspath(args.trace),
+        "trace_size": len(trace),
+        "users": args.users,
+        "duration_s": args.duration,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "phases": phases,
+    }
+
+
+def _int_list(val: str) -> list[int]:
+    return [int(v) for v in val.split(",") if v.strip()]
+
+
+def _float_list(val: str) -> list[float]:
+    return [float(v) for v in val.split(",") if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test AutoMIND API")
+    parser.add_argument("--trace", required=True, help="file JSONL berisi query")
+    parser.add_argument("--field", default="query", help="field query di trace")
+    parser.add_argument("--mode", choices=["inprocess", "workers"], default="workers")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32])
+    parser.add_argument("--rates", type=_float_list, default=[])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--out", default="loadtest_result.json")
+    args = parser.parse_args()
+
+    result = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"[OK] Hasil load test ditulis ke: {args.out}")